@@ -6,6 +6,8 @@ from sklearn.preprocessing import LabelEncoder
 from datetime import datetime, timedelta
 import warnings
 import os
+
+import noyaux
 warnings.filterwarnings('ignore')
 
 class AdvancedFootballPredictor:
@@ -109,65 +111,90 @@ class AdvancedFootballPredictor:
     def create_features(self, df):
         """Crée les features pour chaque match"""
         print("\n🔧 Création des features...")
-        features = []
-        
-        for idx, row in df.iterrows():
-            if idx % 500 == 0:
-                print(f"   Traitement: {idx}/{len(df)} matchs...")
-            
-            home_team = row['HomeTeam']
-            away_team = row['AwayTeam']
-            date = row['Date']
-            
-            # Forme récente
-            home_form, home_gf, home_ga, home_matches = self.calculate_team_form(df, home_team, date)
-            away_form, away_gf, away_ga, away_matches = self.calculate_team_form(df, away_team, date)
-            
-            # Confrontations directes
-            h2h_home, h2h_away, h2h_draws = self.calculate_h2h_stats(df, home_team, away_team, date)
-            
-            # Performance domicile/extérieur
-            home_wins_h, home_gf_h, home_ga_h = self.calculate_home_away_performance(df, home_team, date, True)
-            away_wins_a, away_gf_a, away_ga_a = self.calculate_home_away_performance(df, away_team, date, False)
-            
-            # Cotes des bookmakers (moyenne pour plus de robustesse)
-            odds_home = row.get('B365H', np.nan)
-            odds_draw = row.get('B365D', np.nan)
-            odds_away = row.get('B365A', np.nan)
-            
-            # Skip si pas assez d'historique
-            if home_matches < 3 or away_matches < 3:
-                continue
-            
-            feature = {
-                'home_form': home_form,
-                'away_form': away_form,
-                'form_diff': home_form - away_form,
-                'home_goals_for_avg': home_gf / home_matches if home_matches > 0 else 0,
-                'home_goals_against_avg': home_ga / home_matches if home_matches > 0 else 0,
-                'away_goals_for_avg': away_gf / away_matches if away_matches > 0 else 0,
-                'away_goals_against_avg': away_ga / away_matches if away_matches > 0 else 0,
-                'h2h_home_wins': h2h_home,
-                'h2h_away_wins': h2h_away,
-                'h2h_draws': h2h_draws,
-                'home_win_rate_home': home_wins_h / 10,
-                'away_win_rate_away': away_wins_a / 10,
-                'home_gf_home': home_gf_h,
-                'home_ga_home': home_ga_h,
-                'away_gf_away': away_gf_a,
-                'away_ga_away': away_ga_a,
-                'goal_diff': (home_gf - home_ga) - (away_gf - away_ga),
-                'odds_home': odds_home if not np.isnan(odds_home) else 2.0,
-                'odds_draw': odds_draw if not np.isnan(odds_draw) else 3.0,
-                'odds_away': odds_away if not np.isnan(odds_away) else 3.0,
-                'odds_favorite': 1 if odds_home < odds_away else 0,
-                'result': row['FTR']
-            }
-            
-            features.append(feature)
-        
+        n = len(df)
+        domicile = df['HomeTeam'].to_numpy(dtype=object)
+        exterieur = df['AwayTeam'].to_numpy(dtype=object)
+        dates = df['Date'].to_numpy()
+        type_buts = df['FTHG'].dtype
+        fthg = df['FTHG'].to_numpy(dtype=float).astype(np.int64)
+        ftag = df['FTAG'].to_numpy(dtype=float).astype(np.int64)
+        ftr = df['FTR'].to_numpy(dtype=object)
+        
+        # Forme récente : une ligne par équipe et par match (points, buts marqués, encaissés)
+        points_dom = np.select([ftr == 'H', ftr == 'D'], [3, 1], default=0)
+        points_ext = np.select([ftr == 'A', ftr == 'D'], [3, 1], default=0)
+        forme = self._sommes_precedentes(
+            np.r_[domicile, exterieur], np.r_[dates, dates],
+            np.column_stack([np.r_[points_dom, points_ext], np.r_[fthg, ftag], np.r_[ftag, fthg]]), 5)
+        home_form, home_gf, home_ga, home_matches = forme[:n].T
+        away_form, away_gf, away_ga, away_matches = forme[n:].T
+        
+        # Confrontations directes (paire d'équipes, quel que soit le lieu)
+        premiere = np.where(domicile <= exterieur, domicile, exterieur)
+        paires = premiere + '\x00' + np.where(domicile <= exterieur, exterieur, domicile)
+        gagnant = np.where(ftr == 'H', domicile, np.where(ftr == 'A', exterieur, None))
+        h2h = self._sommes_precedentes(paires, dates, np.column_stack([
+            (gagnant == premiere) & (ftr != 'D'), (gagnant != premiere) & (ftr != 'D'), ftr == 'D']), 10)
+        h2h_home = np.where(domicile == premiere, h2h[:, 0], h2h[:, 1])
+        h2h_away = np.where(domicile == premiere, h2h[:, 1], h2h[:, 0])
+        h2h_draws = h2h[:, 2]
+        
+        # Performance domicile/extérieur (10 derniers matchs au même lieu)
+        perf_dom = self._sommes_precedentes(domicile, dates, np.column_stack([ftr == 'H', fthg, ftag]), 10)
+        perf_ext = self._sommes_precedentes(exterieur, dates, np.column_stack([ftr == 'A', ftag, fthg]), 10)
+        
+        # Cotes des bookmakers (moyenne pour plus de robustesse)
+        odds_home = df['B365H'].to_numpy(dtype=float) if 'B365H' in df.columns else np.full(n, np.nan)
+        odds_draw = df['B365D'].to_numpy(dtype=float) if 'B365D' in df.columns else np.full(n, np.nan)
+        odds_away = df['B365A'].to_numpy(dtype=float) if 'B365A' in df.columns else np.full(n, np.nan)
+        
+        def moyenne(sommes, nb):
+            return np.where(nb > 0, sommes / np.maximum(nb, 1), 0)
+        
+        features = pd.DataFrame({
+            'home_form': home_form,
+            'away_form': away_form,
+            'form_diff': home_form - away_form,
+            'home_goals_for_avg': moyenne(home_gf, home_matches),
+            'home_goals_against_avg': moyenne(home_ga, home_matches),
+            'away_goals_for_avg': moyenne(away_gf, away_matches),
+            'away_goals_against_avg': moyenne(away_ga, away_matches),
+            'h2h_home_wins': h2h_home,
+            'h2h_away_wins': h2h_away,
+            'h2h_draws': h2h_draws,
+            'home_win_rate_home': perf_dom[:, 0] / 10,
+            'away_win_rate_away': perf_ext[:, 0] / 10,
+            'home_gf_home': moyenne(perf_dom[:, 1], perf_dom[:, 3]),
+            'home_ga_home': moyenne(perf_dom[:, 2], perf_dom[:, 3]),
+            'away_gf_away': moyenne(perf_ext[:, 1], perf_ext[:, 3]),
+            'away_ga_away': moyenne(perf_ext[:, 2], perf_ext[:, 3]),
+            'goal_diff': ((home_gf - home_ga) - (away_gf - away_ga)).astype(type_buts),
+            'odds_home': np.where(np.isnan(odds_home), 2.0, odds_home),
+            'odds_draw': np.where(np.isnan(odds_draw), 3.0, odds_draw),
+            'odds_away': np.where(np.isnan(odds_away), 3.0, odds_away),
+            'odds_favorite': (odds_home < odds_away).astype(np.int64),
+            'result': ftr
+        })
+        
+        # Skip si pas assez d'historique
+        features = features[(home_matches >= 3) & (away_matches >= 3)].reset_index(drop=True)
         print(f"✅ {len(features)} features créées")
-        return pd.DataFrame(features)
+        return features
+    
+    @staticmethod
+    def _sommes_precedentes(groupes, dates, valeurs, n_matches):
+        """
+        Sommes des colonnes de valeurs sur les n_matches dernières lignes du même groupe
+        strictement antérieures à la date de chaque ligne (lignes dans l'ordre chronologique),
+        + une dernière colonne : le nombre de lignes retenues.
+        """
+        codes, _ = pd.factorize(groupes)
+        ordre = np.lexsort((dates, codes)) # par groupe puis date (tri stable)
+        debuts, fins = noyaux.fenetres_precedentes(codes[ordre], dates[ordre], n_matches)
+        valeurs = np.column_stack([valeurs, np.ones(len(codes))]).astype(np.int64)
+        sommes = np.empty_like(valeurs)
+        sommes[ordre] = noyaux.sommes_fenetres(valeurs[ordre], debuts, fins)
+        return sommes
     
     def train(self, feature_df):
         """Entraîne le modèle"""
@@ -257,13 +284,11 @@ if __name__ == "__main__":
     predictor = AdvancedFootballPredictor()
     
     # Charger les données (remplace par ton chemin de fichier)
-
-
-filepath = r"C:\xampp\htdocs\ScriptMax\CSV_Data\data*\B1.csv"
-print(f"Le fichier existe ? {os.path.exists(filepath)}")
-print(f"Contenu du dossier CSV_Data:")
-for f in os.listdir(r"C:\xampp\htdocs\ScriptMax\CSV_Data"):
-    print(f"  - {f}")    
+    filepath = r"C:\xampp\htdocs\ScriptMax\CSV_Data\data*\B1.csv"
+    print(f"Le fichier existe ? {os.path.exists(filepath)}")
+    print(f"Contenu du dossier CSV_Data:")
+    for f in os.listdir(r"C:\xampp\htdocs\ScriptMax\CSV_Data"):
+        print(f"  - {f}")    
     try:
         df = predictor.load_data(filepath)
         
@@ -286,4 +311,4 @@ for f in os.listdir(r"C:\xampp\htdocs\ScriptMax\CSV_Data"):
         print("   Assure-toi que le chemin est correct et réessaye!")
         print("\n📝 Exemple de structure attendue:")
         print("   - Colonnes obligatoires: Date, HomeTeam, AwayTeam, FTHG, FTAG, FTR")
-        print("   - Colonnes optionnelles: B365H, B365D, B365A (cotes)")
\ No newline at end of file
+        print("   - Colonnes optionnelles: B365H, B365D, B365A (cotes)")
@@ -1,84 +1,183 @@
 import pandas as pd
-import glob
+import numpy as np
+import argparse
 import os
+import chargement
+import noyaux
+import registre_stats
 
 # --- CONFIGURATION ---
 DOSSIER_PRINCIPAL = "CSV_Data"
-DOSSIER_SAISON_ACTUELLE = "data2025" 
+DOSSIER_SAISON_ACTUELLE = "data2025"
 FICHIER_SORTIE = "rapport_safe_bets.html"
+COLONNES_REQUISES = ['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR'] # seules colonnes lues dans les CSV
 SEUIL_POURCENTAGE = 75.0 # On ne montre que ce qui arrive > 75% du temps
-
-def standardiser_colonnes(df):
-    mapping = {
-        'Home': 'HomeTeam', 'Home Team': 'HomeTeam',
-        'Away': 'AwayTeam', 'Away Team': 'AwayTeam',
-        'Res': 'FTR', 'Result': 'FTR', 'FTR': 'FTR',
-        'HG': 'FTHG', 'FTHG': 'FTHG', 'HomeGoals': 'FTHG',
-        'AG': 'FTAG', 'FTAG': 'FTAG', 'AwayGoals': 'FTAG',
-        'Date': 'Date'
-    }
-    return df.rename(columns=mapping)
-
-def get_equipes_actuelles():
+MIN_MATCHS = 20 # Minimum 20 matchs (tout l'historique) pour être fiable
+TOP_N = 50 # Lignes affichées par tableau (marché x fenêtre)
+
+# Marchés scannés (stats de registre_stats) : titre, description, couleur, libellé du %.
+# N'importe quelle stat du registre peut être scannée (titre générique si absente d'ici).
+MARCHES = {
+    'FT Marque': ("⚽ La Machine à Buts (Marque > 0.5)", "Équipes qui marquent au moins un but dans presque tous leurs matchs.", '#2980b9', '% Marque'),
+    'FT Invaincu': ("🛡️ L'Invincible (Ne perd pas / 1X2)", "Équipes qui font très rarement une défaite (Victoire ou Nul).", '#8e44ad', '% Invaincu'),
+    'FT +1.5': ("🔥 Le Match Ouvert (Over 1.5 Global)", "Matchs de cette équipe où il y a au moins 2 buts (peu importe qui marque).", '#e67e22', '% Over 1.5'),
+}
+SEUILS = {} # seuil propre à un marché (ex: {'FT BTTS': 65.0}), sinon SEUIL_POURCENTAGE
+
+# Fenêtres : lieu ('Dom' / 'Ext'), saisons (N dernières saisons jouées par l'équipe),
+# derniers (N derniers matchs, après les autres filtres) et minimum de matchs dans la fenêtre
+FENETRES = {
+    'tout': {'titre': "Tout l'historique", 'min_matchs': MIN_MATCHS},
+    '2_saisons': {'titre': "2 dernières saisons", 'saisons': 2, 'min_matchs': MIN_MATCHS},
+    '20_derniers': {'titre': "20 derniers matchs", 'derniers': 20, 'min_matchs': 20},
+    'domicile': {'titre': "À domicile", 'lieu': 'Dom', 'min_matchs': MIN_MATCHS // 2},
+    'exterieur': {'titre': "À l'extérieur", 'lieu': 'Ext', 'min_matchs': MIN_MATCHS // 2},
+}
+
+def get_equipes_actuelles(df_brut):
     print(f"🔍 Identification des équipes de la saison {DOSSIER_SAISON_ACTUELLE}...")
-    path = os.path.join(DOSSIER_PRINCIPAL, DOSSIER_SAISON_ACTUELLE, "*.csv")
-    files = glob.glob(path)
-    equipes = set()
-    for f in files:
-        try:
-            try: df = pd.read_csv(f, on_bad_lines='skip')
-            except: df = pd.read_csv(f, on_bad_lines='skip', encoding='latin1')
-            df = standardiser_colonnes(df)
-            equipes.update(df['HomeTeam'].dropna().unique())
-            equipes.update(df['AwayTeam'].dropna().unique())
-        except: pass
-    return list(equipes)
-
-def generer_html(df_score, df_no_loss, df_over):
-    """Génère un rapport avec 3 sections de stats sûres"""
-    
-    def make_rows(df, col_pct):
+    return chargement.equipes_saison(df_brut, DOSSIER_SAISON_ACTUELLE)
+
+# --- SCANNER (UNE PASSE GROUPÉE POUR TOUS LES MARCHÉS x FENÊTRES) ---
+
+def _chronologique(longue):
+    """Table longue triée par équipe puis date (ordre de chargement à date égale) : une plage par équipe."""
+    codes, equipes = pd.factorize(longue['Équipe'].astype(object))
+    dates = longue['Date'].to_numpy(dtype='datetime64[ns]').astype(np.int64) if 'Date' in longue.columns else np.zeros(len(longue), dtype=np.int64)
+    ordre = np.lexsort((dates, codes))
+    return longue.iloc[ordre].reset_index(drop=True), codes[ordre], pd.Index(equipes)
+
+def _apres(drapeaux, codes, bornes):
+    """Pour chaque ligne : nombre de lignes marquées qui la suivent dans la plage de son équipe."""
+    cumul = np.r_[0, np.cumsum(drapeaux)]
+    return cumul[bornes[1:]][codes] - cumul[1:]
+
+def appartenance(table, codes, bornes, fenetre):
+    """Lignes (triées par _chronologique) qui entrent dans la fenêtre, pour toutes les équipes à la fois."""
+    garde = np.ones(len(table), dtype=bool)
+    if 'lieu' in fenetre:
+        garde &= table['Domicile'].to_numpy() == (fenetre['lieu'] == 'Dom')
+    if 'saisons' in fenetre:
+        saisons = pd.factorize(chargement.detecter_saisons(table).to_numpy())[0]
+        nouvelle = np.r_[True, (saisons[1:] != saisons[:-1]) | (codes[1:] != codes[:-1])] if len(codes) else np.zeros(0, dtype=bool)
+        garde &= _apres(nouvelle, codes, bornes) < fenetre['saisons']
+    if 'derniers' in fenetre:
+        garde &= _apres(garde, codes, bornes) < fenetre['derniers']
+    return garde
+
+def scanner(longue, marches=tuple(MARCHES), fenetres=FENETRES, seuils=None):
+    """
+    Taux de réussite de chaque équipe pour chaque marché x fenêtre de la table longue masquée
+    (registre_stats.preparer_table) : une matrice (lignes x combinaisons) d'appartenances et de
+    réussites, sommée par plage d'équipe en une passe, puis seuils appliqués en bloc.
+    Une ligne par (équipe, fenêtre, marché) : Équipe, Ligue (dernière ligue jouée), Fenêtre,
+    Marché, Succès, Total, Pct, Seuil, Retenu.
+    """
+    seuils = {**SEUILS, **(seuils or {})}
+    table, codes, equipes = _chronologique(longue)
+    bornes = np.searchsorted(codes, np.arange(len(equipes) + 1))
+    masque = table[registre_stats.COLONNE_MASQUE].to_numpy()
+    noms = list(registre_stats.STATS)
+    n, n_fen, n_mar = len(table), len(fenetres), len(marches)
+
+    reussites = np.column_stack([((masque >> masque.dtype.type(noms.index(m))) & 1) == 1 for m in marches]).reshape(n, n_mar)
+    dans = np.column_stack([appartenance(table, codes, bornes, f) for f in fenetres.values()]).reshape(n, n_fen)
+    matrice = np.concatenate([dans, (dans[:, :, None] & reussites[:, None, :]).reshape(n, -1)], axis=1)
+    sommes = noyaux.sommes_fenetres(matrice, bornes[:-1], bornes[1:])
+
+    total = np.repeat(sommes[:, :n_fen], n_mar, axis=1).ravel()
+    succes = sommes[:, n_fen:].ravel()
+    matchs_equipe = np.repeat(np.diff(bornes), n_fen * n_mar)
+    seuil = np.tile([seuils.get(m, SEUIL_POURCENTAGE) for m in marches], len(equipes) * n_fen)
+    minimum = np.tile(np.repeat([f.get('min_matchs', MIN_MATCHS) for f in fenetres.values()], n_mar), len(equipes))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pct = np.where(total > 0, succes / total * 100, np.nan)
+    ligues = table['LeagueCode'].astype(object).to_numpy()[bornes[1:] - 1] if n else np.zeros(0, dtype=object)
+    return pd.DataFrame({
+        'Équipe': np.repeat(equipes.to_numpy(dtype=object), n_fen * n_mar),
+        'Ligue': np.repeat(ligues, n_fen * n_mar),
+        'Fenêtre': np.tile(np.repeat(list(fenetres), n_mar), len(equipes)),
+        'Marché': np.tile(list(marches), len(equipes) * n_fen),
+        'Succès': succes, 'Total': total, 'Pct': pct, 'Seuil': seuil,
+        'Retenu': (pct >= seuil) & (total >= minimum) & (matchs_equipe >= MIN_MATCHS),
+    })
+
+# --- RAPPORT HTML ---
+
+def generer_html(resultats, marches, fenetres):
+    """Une section par marché, un tableau par fenêtre (les TOP_N meilleurs taux au-dessus du seuil)."""
+    retenus = resultats[resultats['Retenu']].sort_values(['Pct', 'Total', 'Équipe'], ascending=[False, False, True])
+    tableaux = {cle: d.head(TOP_N) for cle, d in retenus.groupby(['Marché', 'Fenêtre'], sort=False)}
+    comptes = retenus.groupby(['Marché', 'Fenêtre']).size()
+    seuils = resultats.groupby('Marché')['Seuil'].first()
+
+    def make_rows(df):
         rows = ""
-        for i, row in df.iterrows():
+        for i, (_, row) in enumerate(df.iterrows()):
             rows += f"""
             <tr>
                 <td class="rank">{i+1}</td>
                 <td class="league">{row['Ligue']}</td>
                 <td class="team">{row['Équipe']}</td>
-                <td class="pct">{row[col_pct]:.1f}%</td>
+                <td class="pct">{row['Pct']:.1f}%</td>
                 <td class="details">{row['Succès']}/{row['Total']} matchs</td>
             </tr>
             """
         return rows
 
+    def ancre(marche, fenetre):
+        return f"m{list(marches).index(marche)}-f{list(fenetres).index(fenetre)}"
+
+    sommaire = "<tr><th>Marché</th>" + "".join(f"<th>{f['titre']}</th>" for f in fenetres.values()) + "</tr>"
+    sections = ""
+    for marche, (titre, description, couleur, libelle) in marches.items():
+        sommaire += f"<tr><td class='team'>{titre}</td>" + "".join(
+            f"<td><a href='#{ancre(marche, fen)}'>{comptes.get((marche, fen), 0)}</a></td>" for fen in fenetres) + "</tr>"
+        sections += f"""
+            <div class="section">
+                <h2 style="color: {couleur}; border-bottom: 3px solid {couleur};">{titre}</h2>
+                <p>{description} Seuil : {seuils.get(marche, SEUIL_POURCENTAGE)}%.</p>"""
+        for fen, fenetre in fenetres.items():
+            df = tableaux.get((marche, fen))
+            sections += f"""
+                <h3 id="{ancre(marche, fen)}">{fenetre['titre']} <span class="details">(min. {fenetre.get('min_matchs', MIN_MATCHS)} matchs)</span></h3>"""
+            if df is None:
+                sections += "<p class='empty'>Aucune équipe au-dessus du seuil.</p>"
+                continue
+            sections += f"""
+                <table>
+                    <thead><tr><th>#</th><th>Ligue</th><th>Équipe</th><th>{libelle}</th><th>Historique</th></tr></thead>
+                    <tbody>{make_rows(df)}</tbody>
+                </table>"""
+        sections += "\n            </div>"
+
     html = f"""
     <!DOCTYPE html>
     <html lang="fr">
     <head>
         <meta charset="UTF-8">
-        <title>Analyse Safe Bets (>75%)</title>
+        <title>Analyse Safe Bets (>{SEUIL_POURCENTAGE:.0f}%)</title>
         <style>
             body {{ font-family: 'Segoe UI', sans-serif; background-color: #f0f2f5; padding: 20px; color: #333; }}
             .container {{ max-width: 1100px; margin: 0 auto; }}
             h1 {{ text-align: center; color: #2c3e50; }}
             .subtitle {{ text-align: center; color: #7f8c8d; margin-bottom: 40px; }}
-            
+
             .section {{ background: white; padding: 20px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.05); margin-bottom: 40px; }}
             h2 {{ border-bottom: 2px solid #eee; padding-bottom: 10px; margin-top: 0; }}
-            
+            h3 {{ margin-top: 30px; color: #2c3e50; }}
+
             table {{ width: 100%; border-collapse: collapse; }}
             th {{ background: #34495e; color: white; padding: 10px; text-align: left; }}
             td {{ padding: 10px; border-bottom: 1px solid #eee; }}
             tr:hover {{ background: #f8f9fa; }}
-            
+
             .rank {{ font-weight: bold; color: #bbb; width: 30px; }}
             .team {{ font-weight: 600; }}
             .pct {{ font-weight: bold; color: #27ae60; font-size: 1.1em; }}
             .league {{ font-size: 0.85em; color: #7f8c8d; text-transform: uppercase; }}
-            
-            .card-header-score {{ color: #2980b9; border-color: #2980b9; }}
-            .card-header-noloss {{ color: #8e44ad; border-color: #8e44ad; }}
-            .card-header-over {{ color: #e67e22; border-color: #e67e22; }}
+            .details {{ font-size: 0.85em; color: #7f8c8d; font-weight: normal; }}
+            .empty {{ color: #95a5a6; font-style: italic; }}
         </style>
     </head>
     <body>
@@ -87,104 +186,52 @@ def generer_html(df_score, df_no_loss, df_over):
             <p class="subtitle">Statistiques historiques basées sur les équipes actuelles (Seuil: {SEUIL_POURCENTAGE}%)</p>
 
             <div class="section">
-                <h2 class="card-header-score" style="border-bottom: 3px solid #2980b9;">⚽ La Machine à Buts (Marque > 0.5)</h2>
-                <p>Équipes qui marquent au moins un but dans presque tous leurs matchs.</p>
-                <table>
-                    <thead><tr><th>#</th><th>Ligue</th><th>Équipe</th><th>% Marque</th><th>Historique</th></tr></thead>
-                    <tbody>{make_rows(df_score, '% Marque')}</tbody>
-                </table>
-            </div>
-
-            <div class="section">
-                <h2 class="card-header-noloss" style="border-bottom: 3px solid #8e44ad;">🛡️ L'Invincible (Ne perd pas / 1X2)</h2>
-                <p>Équipes qui font très rarement une défaite (Victoire ou Nul).</p>
-                <table>
-                    <thead><tr><th>#</th><th>Ligue</th><th>Équipe</th><th>% Invaincu</th><th>Historique</th></tr></thead>
-                    <tbody>{make_rows(df_no_loss, '% Invaincu')}</tbody>
-                </table>
-            </div>
-
-            <div class="section">
-                <h2 class="card-header-over" style="border-bottom: 3px solid #e67e22;">🔥 Le Match Ouvert (Over 1.5 Global)</h2>
-                <p>Matchs de cette équipe où il y a au moins 2 buts (peu importe qui marque).</p>
-                <table>
-                    <thead><tr><th>#</th><th>Ligue</th><th>Équipe</th><th>% +1.5 Buts</th><th>Historique</th></tr></thead>
-                    <tbody>{make_rows(df_over, '% Over 1.5')}</tbody>
-                </table>
+                <h2>📋 Sommaire (équipes au-dessus du seuil)</h2>
+                <table>{sommaire}</table>
             </div>
+            {sections}
         </div>
     </body>
     </html>
     """
-    
+
     with open(FICHIER_SORTIE, "w", encoding="utf-8") as f:
         f.write(html)
     print(f"\n✨ Rapport généré : {os.path.abspath(FICHIER_SORTIE)}")
 
-def analyser_historique():
+def analyser_historique(df_brut=None, marches=None, fenetres=None, seuils=None):
+    """
+    Si df_brut (chargement.charger_historique) est fourni, aucun CSV n'est relu.
+    marches : stats de registre_stats (défaut : MARCHES) ; fenetres : clés de FENETRES ou
+    dict {nom: fenêtre} (défaut : toutes).
+    """
     print(f"📚 Chargement de l'historique...")
-    equipes_actives = get_equipes_actuelles()
+    if df_brut is None:
+        df_brut = chargement.charger_historique(DOSSIER_PRINCIPAL, colonnes=chargement.COLONNES_CLES + COLONNES_REQUISES)
+    equipes_actives = get_equipes_actuelles(df_brut)
     if not equipes_actives: return
 
-    fichiers = glob.glob(f"{DOSSIER_PRINCIPAL}/**/*.csv", recursive=True)
-    all_data = []
-
-    for f in fichiers:
-        if "fixtures.csv" in f: continue
-        try:
-            try: df = pd.read_csv(f, on_bad_lines='skip')
-            except: df = pd.read_csv(f, on_bad_lines='skip', encoding='latin1')
-            df = standardiser_colonnes(df)
-            
-            cols_req = ['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR']
-            if all(c in df.columns for c in cols_req):
-                df = df[cols_req].dropna()
-                for c in ['FTHG', 'FTAG']: df[c] = pd.to_numeric(df[c], errors='coerce')
-                df['Ligue'] = os.path.basename(f).replace('.csv', '')
-                all_data.append(df)
-        except: pass
-
-    if not all_data: print("❌ Aucune donnée."); return
-    df_global = pd.concat(all_data, ignore_index=True)
-    
-    res_score = []
-    res_noloss = []
-    res_over = []
-
-    for eq in equipes_actives:
-        # Matchs de l'équipe
-        d = df_global[(df_global['HomeTeam'] == eq) | (df_global['AwayTeam'] == eq)]
-        nb = len(d)
-        if nb < 20: continue # Minimum 20 matchs pour être fiable
-        
-        ligue = d.iloc[-1]['Ligue']
-
-        # 1. MARQUE UN BUT (Score > 0)
-        # Domicile et marque OU Extérieur et marque
-        matchs_avec_but = d[((d['HomeTeam'] == eq) & (d['FTHG'] > 0)) | ((d['AwayTeam'] == eq) & (d['FTAG'] > 0))]
-        pct_score = (len(matchs_avec_but) / nb) * 100
-        if pct_score >= SEUIL_POURCENTAGE:
-            res_score.append({'Équipe': eq, 'Ligue': ligue, '% Marque': pct_score, 'Succès': len(matchs_avec_but), 'Total': nb})
-
-        # 2. NE PERD PAS (Double Chance)
-        # Domicile et Pas A (donc H ou D) OU Extérieur et Pas H (donc A ou D)
-        matchs_no_loss = d[((d['HomeTeam'] == eq) & (d['FTR'] != 'A')) | ((d['AwayTeam'] == eq) & (d['FTR'] != 'H'))]
-        pct_noloss = (len(matchs_no_loss) / nb) * 100
-        if pct_noloss >= SEUIL_POURCENTAGE:
-             res_noloss.append({'Équipe': eq, 'Ligue': ligue, '% Invaincu': pct_noloss, 'Succès': len(matchs_no_loss), 'Total': nb})
-
-        # 3. OVER 1.5
-        matchs_over = d[(d['FTHG'] + d['FTAG']) > 1.5]
-        pct_over = (len(matchs_over) / nb) * 100
-        if pct_over >= SEUIL_POURCENTAGE:
-            res_over.append({'Équipe': eq, 'Ligue': ligue, '% Over 1.5': pct_over, 'Succès': len(matchs_over), 'Total': nb})
-
-    # Tri et Génération
-    df_score = pd.DataFrame(res_score).sort_values('% Marque', ascending=False).head(50)
-    df_noloss = pd.DataFrame(res_noloss).sort_values('% Invaincu', ascending=False).head(50)
-    df_over = pd.DataFrame(res_over).sort_values('% Over 1.5', ascending=False).head(50)
-
-    generer_html(df_score, df_noloss, df_over)
+    df = chargement.filtrer_historique(df_brut, COLONNES_REQUISES)
+    if df.empty: print("❌ Aucune donnée."); return
+    df = df.join(df_brut[['Date', 'Saison']])
+
+    marches = {m: MARCHES.get(m, (f"📈 {m}", f"Équipes dont les matchs valident « {m} » presque à chaque fois.", '#34495e', f"% {m}")) for m in (marches or MARCHES)}
+    if fenetres is None: fenetres = FENETRES
+    elif not isinstance(fenetres, dict): fenetres = {f: FENETRES[f] for f in fenetres}
+    resultats = scanner(registre_stats.preparer_table(df, equipes_actives), list(marches), fenetres, seuils)
+    print(f"🔎 {len(marches)} marchés x {len(fenetres)} fenêtres : {int(resultats['Retenu'].sum())} lignes au-dessus du seuil.")
+
+    generer_html(resultats, marches, fenetres)
 
 if __name__ == "__main__":
-    analyser_historique()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Safe Bets : équipes au-dessus d'un seuil pour chaque marché x fenêtre.")
+    parser.add_argument('--marches', nargs='+', choices=list(registre_stats.STATS), default=None, help="Défaut : les marchés de MARCHES.")
+    parser.add_argument('--fenetres', nargs='+', choices=list(FENETRES), default=None, help="Défaut : toutes les fenêtres.")
+    parser.add_argument('--derniers', type=int, nargs='+', default=[], help="Fenêtres supplémentaires : N derniers matchs.")
+    parser.add_argument('--seuil', type=float, default=None)
+    args = parser.parse_args()
+
+    if args.seuil is not None: SEUIL_POURCENTAGE = args.seuil
+    fenetres = {f: FENETRES[f] for f in (args.fenetres or FENETRES)}
+    fenetres.update({f"{k}_derniers": {'titre': f"{k} derniers matchs", 'derniers': k, 'min_matchs': k} for k in args.derniers})
+    analyser_historique(marches=args.marches, fenetres=fenetres)
@@ -1,11 +1,16 @@
-import pandas as pd
-import glob
 import os
+import chargement
+import registre_stats
+import requetes_series
 
 # --- 1. CONFIGURATION ---
-DOSSIER_CSV = "CSV_Data/data2025" 
+DOSSIER_CSV = "CSV_Data/data2025" # saison en cours : équipes affichées (les séries couvrent tout l'historique)
 FICHIER_SORTIE = "rapport_sans_nul.html"
+COLONNES_REQUISES = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR'] # seules colonnes lues dans les CSV
+SERIE_MIN = 3 # Série affichée à partir de 3 matchs sans l'événement
+SERIE_FEU = 8 # Mise en avant des très grosses séries
 
+# Noms affichés (les autres ligues gardent leur code)
 LIGUES_CIBLES = {
     'F1': '🇫🇷 Ligue 1', 'F2': '🇫🇷 Ligue 2',
     'D1': '🇩🇪 Bundesliga', 'D2': '🇩🇪 Bundesliga 2',
@@ -14,37 +19,54 @@ LIGUES_CIBLES = {
     'E0': '🇬🇧 Premier League', 'E1': '🇬🇧 Championship'
 }
 
-def standardiser_colonnes(df):
-    mapping = {
-        'Home': 'HomeTeam', 'Home Team': 'HomeTeam',
-        'Away': 'AwayTeam', 'Away Team': 'AwayTeam',
-        'Res': 'FTR', 'Result': 'FTR', 'FTR': 'FTR',
-        'Date': 'Date', 'Match Date': 'Date'
-    }
-    return df.rename(columns=mapping)
+COULEURS_RESULTATS = {'V': '#28a745', 'N': '#95a5a6', 'D': '#dc3545'}
 
-def calculer_serie_sans_nul(df_equipe):
-    df_equipe = df_equipe.sort_values(by='Date', ascending=False)
-    serie = 0
-    for resultat in df_equipe['FTR']:
-        if resultat != 'D': serie += 1
-        else: break
-    return serie
+def formater_details_html(derniers):
+    """Transforme ['V', 'D', 'V'] (le plus récent d'abord) en petites pastilles colorées"""
+    return "".join(f'<span class="pill" style="background:{COULEURS_RESULTATS.get(res, "#bbb")}">{res}</span>' for res in derniers)
 
-def formater_details_html(details_str):
-    """Transforme 'V, D, V' en petites pastilles colorées"""
-    html = ""
-    for res in details_str.split(', '):
-        color = "#28a745" if res == 'H' or res == 'A' or res == 'V' else "#dc3545" # Vert pour Victoire (simplifié), Rouge pour Défaite
-        # Note: Dans le fichier CSV, 'H'/'A' sont les vainqueurs. 
-        # Pour simplifier l'affichage visuel ici sans re-calculer qui a gagné exactement:
-        # On va garder le texte brut mais le mettre dans une pastille grise si on est pas sûr, 
-        # ou on laisse le texte simple.
-        # Mieux : on garde le texte brut.
-        pass
-    return details_str
+def generer_html(tableaux):
+    options_html = ""
+    sections_html = ""
+
+    for i, (ev, df) in enumerate(tableaux.items()):
+        libelle = requetes_series.EVENEMENTS.get(ev, ev)
+        options_html += f'<option value="{i}">Sans {libelle} ({ev})</option>'
+        rows_html = ""
+        for _, row in df.iterrows():
+            serie, record = row[f'{ev}_Depuis'], row[f'{ev}_Record_Sans']
+            feu = serie >= SERIE_FEU or serie == record
+            row_class = "top-serie" if feu else ""
+            fire_icon = "🔥 " if feu else ""
+            rows_html += f"""
+        <tr class="{row_class}">
+            <td class="ligue-badge">{row['Ligue']}</td>
+            <td class="team-name">{row['Équipe']}</td>
+            <td style="text-align:center"><span class="serie-val">{fire_icon}{serie}</span></td>
+            <td style="text-align:center">{record} <span class="ligue-badge">({row[f'{ev}_Annee_Record']})</span></td>
+            <td style="text-align:center">{row[f'{ev}_Pct']:.1f}%</td>
+            <td>{formater_details_html(row['Derniers'])}</td>
+        </tr>
+        """
+        sections_html += f"""
+            <div id="section-{i}" class="event-section" style="display: {'block' if i == 0 else 'none'};">
+            <p class="subtitle">Équipes sans <strong>{libelle}</strong> depuis au moins <strong>{SERIE_MIN} matchs</strong> (toutes ligues, toutes saisons).</p>
+            <table>
+                <thead>
+                    <tr>
+                        <th>Ligue</th>
+                        <th>Équipe</th>
+                        <th style="text-align:center">Série en cours</th>
+                        <th style="text-align:center">Record (Année)</th>
+                        <th style="text-align:center">% avec</th>
+                        <th>Derniers Résultats</th>
+                    </tr>
+                </thead>
+                <tbody>{rows_html}</tbody>
+            </table>
+            </div>
+        """
 
-def generer_html(df_resultats):
     html_content = f"""
     <!DOCTYPE html>
     <html lang="fr">
@@ -54,119 +76,67 @@ def generer_html(df_resultats):
         <title>Séries Sans Match Nul</title>
         <style>
             body {{ font-family: 'Segoe UI', sans-serif; background-color: #f4f6f9; padding: 20px; color: #333; }}
-            .container {{ max-width: 900px; margin: 0 auto; background: white; padding: 30px; border-radius: 12px; box-shadow: 0 4px 15px rgba(0,0,0,0.05); }}
+            .container {{ max-width: 1000px; margin: 0 auto; background: white; padding: 30px; border-radius: 12px; box-shadow: 0 4px 15px rgba(0,0,0,0.05); }}
             h1 {{ text-align: center; color: #2c3e50; margin-bottom: 10px; }}
             .subtitle {{ text-align: center; color: #7f8c8d; margin-bottom: 30px; }}
-            
+            select {{ width: 100%; padding: 12px; font-size: 16px; border-radius: 8px; border: 2px solid #ddd; cursor: pointer; }}
+
             table {{ width: 100%; border-collapse: collapse; margin-top: 20px; }}
             th {{ background-color: #34495e; color: white; padding: 12px 15px; text-align: left; font-weight: 600; }}
             td {{ padding: 12px 15px; border-bottom: 1px solid #eee; }}
             tr:hover {{ background-color: #f8f9fa; }}
-            
+
             .serie-val {{ font-weight: bold; font-size: 1.1em; color: #e67e22; }}
             .ligue-badge {{ font-size: 0.85em; color: #7f8c8d; }}
             .team-name {{ font-weight: 600; color: #2c3e50; }}
-            
-            /* Highlight pour les très grosses séries */
+            .pill {{ display: inline-block; width: 22px; height: 22px; line-height: 22px; margin-right: 3px; border-radius: 50%; color: white; font-size: 0.75em; font-weight: bold; text-align: center; }}
+
+            /* Highlight pour les très grosses séries (ou égalant le record) */
             .fire {{ color: #c0392b; font-weight: bold; }}
             tr.top-serie td {{ background-color: #fff8e1; }}
         </style>
+        <script>
+            function changeEvent(select) {{
+                var sections = document.getElementsByClassName('event-section');
+                for(var i=0; i<sections.length; i++) sections[i].style.display = 'none';
+                document.getElementById('section-' + select.value).style.display = 'block';
+            }}
+        </script>
     </head>
     <body>
         <div class="container">
-            <h1>🚫 Séries "Sans Match Nul"</h1>
-            <p class="subtitle">Équipes n'ayant pas fait de match nul depuis au moins <strong>3 matchs</strong>.</p>
-            
-            <table>
-                <thead>
-                    <tr>
-                        <th>Ligue</th>
-                        <th>Équipe</th>
-                        <th style="text-align:center">Série en cours</th>
-                        <th>Derniers Résultats</th>
-                    </tr>
-                </thead>
-                <tbody>
-    """
-    
-    for _, row in df_resultats.iterrows():
-        ligue = row['Ligue']
-        equipe = row['Équipe']
-        serie = row['Série Sans Nul']
-        details = row['Détails']
-        
-        row_class = "top-serie" if serie >= 8 else ""
-        fire_icon = "🔥 " if serie >= 8 else ""
-        
-        html_content += f"""
-        <tr class="{row_class}">
-            <td class="ligue-badge">{ligue}</td>
-            <td class="team-name">{equipe}</td>
-            <td style="text-align:center"><span class="serie-val">{fire_icon}{serie}</span></td>
-            <td style="color:#666; font-size:0.9em;">{details}</td>
-        </tr>
-        """
-        
-    html_content += """
-                </tbody>
-            </table>
+            <h1>🚫 Séries "Sans Match Nul" (et autres événements)</h1>
+            <select onchange="changeEvent(this)">{options_html}</select>
+            {sections_html}
         </div>
     </body>
     </html>
     """
-    
+
     with open(FICHIER_SORTIE, "w", encoding="utf-8") as f:
         f.write(html_content)
     print(f"✅ Rapport généré : {os.path.abspath(FICHIER_SORTIE)}")
 
-def main():
+def main(df_brut=None):
+    """Si df_brut (chargement.charger_historique) est fourni, aucun CSV n'est relu."""
     print(f"🔍 Analyse des séries...")
-    resultats_globaux = []
-
-    for code_ligue, nom_ligue in LIGUES_CIBLES.items():
-        fichier = os.path.join(DOSSIER_CSV, f"{code_ligue}.csv")
-        if not os.path.exists(fichier): continue
-
-        try:
-            try: df = pd.read_csv(fichier, on_bad_lines='skip')
-            except: df = pd.read_csv(fichier, on_bad_lines='skip', encoding='latin1')
-            
-            df = standardiser_colonnes(df)
-            df['Date'] = pd.to_datetime(df['Date'], dayfirst=True, errors='coerce')
-            if df['Date'].isna().mean() > 0.8:
-                 df['Date'] = pd.to_datetime(df['Date'], dayfirst=False, errors='coerce')
-            df = df.dropna(subset=['Date', 'HomeTeam', 'AwayTeam', 'FTR'])
-
-            equipes = sorted(list(set(df['HomeTeam'].unique()) | set(df['AwayTeam'].unique())))
-            
-            for equipe in equipes:
-                df_eq = df[(df['HomeTeam'] == equipe) | (df['AwayTeam'] == equipe)]
-                serie = calculer_serie_sans_nul(df_eq)
-                
-                if serie >= 3:
-                    # Récupérer les résultats pour l'affichage
-                    # Note: FTR = H (Home Win), A (Away Win), D (Draw)
-                    # Pour simplifier l'affichage, on montre juste le FTR brut
-                    derniers_res = df_eq.sort_values('Date', ascending=False)['FTR'].head(serie).tolist()
-                    str_res = ", ".join(derniers_res[:5])
-                    if len(derniers_res) > 5: str_res += "..."
-                    
-                    resultats_globaux.append({
-                        'Ligue': nom_ligue,
-                        'Équipe': equipe,
-                        'Série Sans Nul': serie,
-                        'Détails': str_res
-                    })
+    if df_brut is None:
+        df_brut = chargement.charger_historique(chargement.DOSSIER_PRINCIPAL_DATA, colonnes=COLONNES_REQUISES)
+    df = chargement.filtrer_historique(df_brut, COLONNES_REQUISES)
+    if df.empty:
+        print("Aucune série trouvée.")
+        return
 
-        except Exception as e:
-            print(f"Erreur {nom_ligue}: {e}")
+    # Toutes ligues et saisons en une passe groupée par événement ; équipes de la saison en cours affichées
+    sech = requetes_series.secheresses(registre_stats.preparer_table(df))
+    sech = sech[sech.index.isin(chargement.equipes_saison(df_brut, os.path.basename(DOSSIER_CSV)))]
+    sech['Ligue'] = sech['Ligue'].map(lambda code: LIGUES_CIBLES.get(code, code))
 
-    if resultats_globaux:
-        df_final = pd.DataFrame(resultats_globaux)
-        df_final = df_final.sort_values(by=['Série Sans Nul', 'Ligue'], ascending=[False, True])
-        generer_html(df_final)
-    else:
-        print("Aucune série trouvée.")
+    tableaux = {}
+    for ev in requetes_series.EVENEMENTS:
+        d = sech[sech[f'{ev}_Depuis'] >= SERIE_MIN].reset_index()
+        tableaux[ev] = d.sort_values(by=[f'{ev}_Depuis', 'Ligue'], ascending=[False, True])
+    generer_html(tableaux)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
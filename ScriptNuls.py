@@ -1,7 +1,11 @@
 import pandas as pd
 import glob
 import os
+import chargement
+import fenetres_stats
 import datetime
+import rangs_ligue
+import registre_stats
 
 # --- 1. CONFIGURATION DES LIGUES ---
 LIGUES_A_ANALYSER = {
@@ -29,6 +33,7 @@ LIGUES_A_ANALYSER = {
 DOSSIER_PRINCIPAL = "CSV_Data"
 SAISON_ACTUELLE_DOSSIER = "data2025" 
 FICHIER_SORTIE = "rapport_nuls_toutes_ligues.html"
+COLONNES_REQUISES = ['HomeTeam', 'AwayTeam', 'FTR'] # seules colonnes lues dans les CSV
 
 def standardiser_colonnes(df):
     """
@@ -43,16 +48,17 @@ def standardiser_colonnes(df):
     }
     return df.rename(columns=mapping)
 
-def get_current_teams(dossier_base, ligue_code):
+def get_current_teams(dossier_base, ligue_code, df_brut=None):
     """Récupère les équipes de la saison actuelle pour filtrer."""
+    if df_brut is not None:
+        return chargement.equipes_saison(df_brut, SAISON_ACTUELLE_DOSSIER, codes=[ligue_code]) or None
     chemin_actuel = os.path.join(dossier_base, SAISON_ACTUELLE_DOSSIER, f"{ligue_code}.csv")
     
     if not os.path.exists(chemin_actuel):
         return None
     
     try:
-        try: df = pd.read_csv(chemin_actuel, on_bad_lines='skip')
-        except: df = pd.read_csv(chemin_actuel, on_bad_lines='skip', encoding='latin1')
+        df = chargement.lire_csv(chemin_actuel, chargement.COLONNES_CLES)
         
         df = standardiser_colonnes(df)
         equipes = set(df['HomeTeam'].dropna().unique()) | set(df['AwayTeam'].dropna().unique())
@@ -60,28 +66,33 @@ def get_current_teams(dossier_base, ligue_code):
     except:
         return None
 
-def analyser_ligue(code_ligue, nom_ligue):
+def analyser_ligue(code_ligue, nom_ligue, df_brut=None, bilan=None):
     print(f"Traitement Nuls : {nom_ligue} ({code_ligue})...")
     
-    equipes_actuelles = get_current_teams(DOSSIER_PRINCIPAL, code_ligue)
+    equipes_actuelles = get_current_teams(DOSSIER_PRINCIPAL, code_ligue, df_brut)
+    if bilan is not None:
+        return lire_bilan(bilan, code_ligue, equipes_actuelles)
     
     pattern = f"{DOSSIER_PRINCIPAL}/**/{code_ligue}.csv"
-    fichiers = glob.glob(pattern, recursive=True)
+    fichiers = glob.glob(pattern, recursive=True) if df_brut is None else []
     
-    if not fichiers:
+    all_data = []
+    if df_brut is not None:
+        # Historique déjà chargé par le pipeline : simple filtre, aucune relecture
+        df = chargement.filtrer_historique(df_brut, COLONNES_REQUISES, codes=[code_ligue])
+        if not df.empty: all_data.append(df[COLONNES_REQUISES])
+    elif not fichiers:
         return None
 
-    all_data = []
     for f in fichiers:
         try:
-            try: df = pd.read_csv(f, on_bad_lines='skip')
-            except: df = pd.read_csv(f, on_bad_lines='skip', encoding='latin1')
+            df = chargement.lire_csv(f, COLONNES_REQUISES)
             
             df = standardiser_colonnes(df)
             
             # On a besoin du résultat final (FTR) pour calculer les nuls
             if 'FTR' in df.columns:
-                df = df[['HomeTeam', 'AwayTeam', 'FTR']].dropna()
+                df = df[COLONNES_REQUISES].dropna()
                 # On remplace les éventuels NaN par "NA" pour éviter les bugs
                 df['FTR'] = df['FTR'].fillna('NA')
                 all_data.append(df)
@@ -122,6 +133,23 @@ def analyser_ligue(code_ligue, nom_ligue):
         
     return {'df': df_final, 'pct_global': pct_global}
 
+def lire_bilan(bilan, code_ligue, equipes_actuelles):
+    """Même résultat qu'analyser_ligue, lu dans le bilan de toutes les ligues (rangs_ligue.bilan_ligues)."""
+    if code_ligue not in bilan['ligues'].index: return None
+    pct_global = bilan['ligues'].at[code_ligue, 'FT Nuls_Pct']
+    pct_global_pondere = bilan['ligues'].at[code_ligue, 'FT Nuls_Pct_Pondere']
+    equipes = bilan['equipes'].loc[code_ligue]
+    if not equipes_actuelles:
+        equipes_actuelles = list(equipes.index)
+
+    equipes = equipes.reindex(equipes_actuelles).dropna(subset=['Matchs'])
+    equipes = equipes[equipes['Matchs'] > 10]
+    df_final = pd.DataFrame({'Équipe': equipes.index, '% Nuls': equipes['FT Nuls_Pct'].to_numpy(), '% Nuls Pondéré': equipes['FT Nuls_Pct_Pondere'].to_numpy(), 'Matchs': equipes['Matchs'].astype(int).to_numpy()})
+    if not df_final.empty:
+        df_final = df_final.sort_values(by='% Nuls', ascending=False).reset_index(drop=True)
+
+    return {'df': df_final, 'pct_global': pct_global, 'pct_global_pondere': pct_global_pondere}
+
 def generer_html(data_global):
     options_html = '<option value="" disabled selected>-- Choisir une Ligue --</option>'
     sections_html = ""
@@ -150,6 +178,7 @@ def generer_html(data_global):
                 <td class="rank">{rank}</td>
                 <td class="team">{row['Équipe']}</td>
                 <td class="pct">{pct:.1f}%</td>
+                <td class="matchs">{fenetres_stats.formater_pondere(row.get('% Nuls Pondéré'))}</td>
                 <td class="matchs">{row['Matchs']}</td>
                 <td class="{diff_class}">{diff_str}</td>
             </tr>
@@ -161,6 +190,7 @@ def generer_html(data_global):
                 <h2>{nom}</h2>
                 <div class="global-stat">
                     Moyenne historique : <strong>{pct_glob:.1f}%</strong> de matchs nuls
+                    (pondérée : <strong>{fenetres_stats.formater_pondere(ligue_data.get('pct_global_pondere'))}</strong>)
                 </div>
             </div>
             <table>
@@ -169,6 +199,7 @@ def generer_html(data_global):
                         <th width="50">#</th>
                         <th>Équipe</th>
                         <th>% Nuls</th>
+                        <th title="Demi-vie : {fenetres_stats.DEMI_VIE_JOURS} jours">% Pondéré</th>
                         <th>Historique</th>
                         <th>/ Moyenne</th>
                     </tr>
@@ -242,12 +273,20 @@ def generer_html(data_global):
         f.write(html)
     print(f"\n✨ Rapport généré : {os.path.abspath(FICHIER_SORTIE)}")
 
-def main():
+def main(df_brut=None):
     print("--- Démarrage de l'analyse Multi-Ligues Matchs Nuls ---")
     data_global = {}
+    if df_brut is None:
+        df_brut = chargement.charger_historique(DOSSIER_PRINCIPAL, colonnes=chargement.COLONNES_CLES + COLONNES_REQUISES)
+    # Moyennes de ligue et % par équipe (bruts et pondérés dans le temps) de toutes les ligues en une seule passe groupée
+    bilan = None
+    df = chargement.filtrer_historique(df_brut, COLONNES_REQUISES, codes=list(LIGUES_A_ANALYSER))
+    if not df.empty:
+        df = df.join(df_brut[['Date']])
+        bilan = rangs_ligue.bilan_ligues(registre_stats.preparer_table(df), ['FT Nuls'], demi_vie_jours=fenetres_stats.DEMI_VIE_JOURS)
     
     for code, nom in LIGUES_A_ANALYSER.items():
-        res = analyser_ligue(code, nom)
+        res = analyser_ligue(code, nom, df_brut, bilan)
         if res:
             data_global[code] = res
             
@@ -1,6 +1,11 @@
 import pandas as pd
 import glob
 import os
+import chargement
+import fenetres_stats
+import distribution_buts
+import rangs_ligue
+import registre_stats
 
 # --- CONFIGURATION DES LIGUES ---
 # Codes CSV et Noms d'affichage
@@ -19,6 +24,7 @@ LIGUES_A_ANALYSER = {
 
 DOSSIER_PRINCIPAL = "CSV_Data"
 FICHIER_SORTIE = "rapport_over15_multi.html"
+COLONNES_REQUISES = ['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG'] # seules colonnes lues dans les CSV
 SAISON_ACTUELLE_DOSSIER = "data2025" 
 
 def standardiser_colonnes(df):
@@ -32,8 +38,10 @@ def standardiser_colonnes(df):
     }
     return df.rename(columns=mapping)
 
-def get_current_teams(dossier_base, ligue_code):
+def get_current_teams(dossier_base, ligue_code, df_brut=None):
     """Récupère la liste des équipes de la saison actuelle pour filtrer."""
+    if df_brut is not None:
+        return chargement.equipes_saison(df_brut, SAISON_ACTUELLE_DOSSIER, codes=[ligue_code]) or None
     # On cherche le fichier .csv (ex: F1.csv) dans le dossier 2025
     chemin_actuel = os.path.join(dossier_base, SAISON_ACTUELLE_DOSSIER, f"{ligue_code}.csv")
     
@@ -41,8 +49,7 @@ def get_current_teams(dossier_base, ligue_code):
         return None # Fichier pas trouvé, on ne filtre pas (ou on skip)
     
     try:
-        try: df = pd.read_csv(chemin_actuel, on_bad_lines='skip')
-        except: df = pd.read_csv(chemin_actuel, on_bad_lines='skip', encoding='latin1')
+        df = chargement.lire_csv(chemin_actuel, chargement.COLONNES_CLES)
         
         df = standardiser_colonnes(df)
         equipes = set(df['HomeTeam'].dropna().unique()) | set(df['AwayTeam'].dropna().unique())
@@ -50,28 +57,34 @@ def get_current_teams(dossier_base, ligue_code):
     except:
         return None
 
-def analyser_ligue(code_ligue, nom_ligue):
+def analyser_ligue(code_ligue, nom_ligue, df_brut=None, bilan=None):
     """Analyse l'historique complet pour UNE ligue."""
     print(f"Traitement de {nom_ligue} ({code_ligue})...")
     
     # 1. Équipes actuelles
-    equipes_actuelles = get_current_teams(DOSSIER_PRINCIPAL, code_ligue)
+    equipes_actuelles = get_current_teams(DOSSIER_PRINCIPAL, code_ligue, df_brut)
     if not equipes_actuelles:
         print(f"   ⚠️ Pas de données 2025 trouvées pour {code_ligue}. Sautée.")
         return None
+    if bilan is not None:
+        return lire_bilan(bilan, code_ligue, equipes_actuelles)
 
     # 2. Historique
     pattern = f"{DOSSIER_PRINCIPAL}/**/{code_ligue}.csv"
-    fichiers = glob.glob(pattern, recursive=True)
+    fichiers = glob.glob(pattern, recursive=True) if df_brut is None else []
     
     all_data = []
+    if df_brut is not None:
+        # Historique déjà chargé par le pipeline : simple filtre, aucune relecture
+        df = chargement.filtrer_historique(df_brut, COLONNES_REQUISES, codes=[code_ligue])
+        if not df.empty: all_data.append(df[COLONNES_REQUISES])
+
     for f in fichiers:
         try:
-            try: df = pd.read_csv(f, on_bad_lines='skip')
-            except: df = pd.read_csv(f, on_bad_lines='skip', encoding='latin1')
+            df = chargement.lire_csv(f, COLONNES_REQUISES)
             df = standardiser_colonnes(df)
             if 'FTHG' in df.columns and 'FTAG' in df.columns:
-                df = df[['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG']].dropna()
+                df = df[COLONNES_REQUISES].dropna()
                 df['FTHG'] = pd.to_numeric(df['FTHG'], errors='coerce')
                 df['FTAG'] = pd.to_numeric(df['FTAG'], errors='coerce')
                 all_data.append(df)
@@ -85,14 +98,13 @@ def analyser_ligue(code_ligue, nom_ligue):
 
     pct_global = (df_global['IsOver1.5'].sum() / len(df_global)) * 100
 
+    # Distribution des buts de toutes les équipes en un passage (ligne 1.5 lue dans les cumuls)
+    distrib = distribution_buts.calculer_distributions(registre_stats.table_longue(df_global, equipes_actuelles))
+    tableau = distribution_buts.tableau_lignes(distrib, 'total', lignes=[1.5])
     resultats = []
     for equipe in equipes_actuelles:
-        matchs_eq = df_global[(df_global['HomeTeam'] == equipe) | (df_global['AwayTeam'] == equipe)]
-        nb_joues = len(matchs_eq)
-        if nb_joues > 0:
-            nb_over = matchs_eq['IsOver1.5'].sum()
-            pct = (nb_over / nb_joues) * 100
-            resultats.append({'Équipe': equipe, '% Over 1.5': pct, 'Matchs': nb_joues})
+        if equipe in tableau.index:
+            resultats.append({'Équipe': equipe, '% Over 1.5': tableau.at[equipe, '% +1.5'], 'Matchs': tableau.at[equipe, 'Matchs']})
 
     df_final = pd.DataFrame(resultats)
     if not df_final.empty:
@@ -100,6 +112,19 @@ def analyser_ligue(code_ligue, nom_ligue):
         
     return {'df': df_final, 'pct_global': pct_global}
 
+def lire_bilan(bilan, code_ligue, equipes_actuelles):
+    """Même résultat qu'analyser_ligue, lu dans le bilan de toutes les ligues (rangs_ligue.bilan_ligues)."""
+    if code_ligue not in bilan['ligues'].index: return None
+    pct_global = bilan['ligues'].at[code_ligue, 'FT +1.5_Pct']
+    pct_global_pondere = bilan['ligues'].at[code_ligue, 'FT +1.5_Pct_Pondere']
+    equipes = bilan['equipes'].loc[code_ligue]
+    equipes = equipes.reindex(equipes_actuelles).dropna(subset=['Matchs'])
+    df_final = pd.DataFrame({'Équipe': equipes.index, '% Over 1.5': equipes['FT +1.5_Pct'].to_numpy(), '% Over 1.5 Pondéré': equipes['FT +1.5_Pct_Pondere'].to_numpy(), 'Matchs': equipes['Matchs'].astype(int).to_numpy()})
+    if not df_final.empty:
+        df_final = df_final.sort_values(by='% Over 1.5', ascending=False).reset_index(drop=True)
+
+    return {'df': df_final, 'pct_global': pct_global, 'pct_global_pondere': pct_global_pondere}
+
 def generer_html_multi(resultats_par_ligue):
     """Génère le HTML avec menu déroulant."""
     
@@ -135,6 +160,7 @@ def generer_html_multi(resultats_par_ligue):
                 <td class="rank">{rank}</td>
                 <td class="team">{row['Équipe']}</td>
                 <td class="pct">{pct:.2f}%</td>
+                <td class="matchs">{fenetres_stats.formater_pondere(row.get('% Over 1.5 Pondéré'))}</td>
                 <td class="matchs">{row['Matchs']}</td>
                 <td class="{diff_class}">{diff_sign}{diff:.2f}%</td>
             </tr>
@@ -144,10 +170,11 @@ def generer_html_multi(resultats_par_ligue):
         <div id="section-{code}" class="league-section" style="display: {display_style};">
             <div class="stats-box">
                 Moyenne historique <strong>{nom}</strong> : <strong>{pct_glob:.2f}%</strong> de matchs +1.5 buts
+                (pondérée : <strong>{fenetres_stats.formater_pondere(data.get('pct_global_pondere'))}</strong>)
             </div>
             <table>
                 <thead>
-                    <tr><th style="text-align:center">#</th><th>Équipe</th><th>% Réussite</th><th>Matchs</th><th>Écart / Moy.</th></tr>
+                    <tr><th style="text-align:center">#</th><th>Équipe</th><th>% Réussite</th><th title="Demi-vie : {fenetres_stats.DEMI_VIE_JOURS} jours">% Pondéré</th><th>Matchs</th><th>Écart / Moy.</th></tr>
                 </thead>
                 <tbody>{rows_html}</tbody>
             </table>
@@ -212,11 +239,19 @@ def generer_html_multi(resultats_par_ligue):
         f.write(html_content)
     print(f"\n✨ Rapport généré : {os.path.abspath(FICHIER_SORTIE)}")
 
-def main():
+def main(df_brut=None):
     data_global = {}
+    if df_brut is None:
+        df_brut = chargement.charger_historique(DOSSIER_PRINCIPAL, colonnes=chargement.COLONNES_CLES + COLONNES_REQUISES)
+    # Moyennes de ligue et % par équipe (bruts et pondérés dans le temps) de toutes les ligues en une seule passe groupée
+    bilan = None
+    df = chargement.filtrer_historique(df_brut, COLONNES_REQUISES, codes=list(LIGUES_A_ANALYSER))
+    if not df.empty:
+        df = df.join(df_brut[['Date']])
+        bilan = rangs_ligue.bilan_ligues(registre_stats.preparer_table(df), ['FT +1.5'], demi_vie_jours=fenetres_stats.DEMI_VIE_JOURS)
     
     for code, nom in LIGUES_A_ANALYSER.items():
-        res = analyser_ligue(code, nom)
+        res = analyser_ligue(code, nom, df_brut, bilan)
         if res:
             data_global[code] = res
             
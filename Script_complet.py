@@ -5,6 +5,17 @@ import os
 import json
 import datetime
 import requests # Pour Discord
+import bits_series
+import chargement
+import fenetres_stats
+import forme
+import hasards_series
+import instrumentation
+import parallele
+import rangs_ligue
+import registre_stats
+import requetes_series
+import survie_series
 
 # ==============================================================================
 # CONFIGURATION RAPIDE
@@ -12,99 +23,40 @@ import requests # Pour Discord
 DISCORD_WEBHOOK_URL = "" 
 DOSSIER_PRINCIPAL_DATA = "CSV_Data" 
 LIGUES_A_IGNORER = [] 
+N_WORKERS = 1 # > 1 : statistiques calculées ligue par ligue sur plusieurs processus
+COLONNES_REQUISES = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'HTHG', 'HTAG', 'FTR', 'HTR', 'Div'] # seules colonnes lues dans les CSV
 
 # ==============================================================================
 # 1. CONFIGURATION & DICTIONNAIRES
 # ==============================================================================
 LEAGUE_NAME_MAPPING = {
-    'epl-2025-GMTStandardTime': 'Premier League', 
-    'championship-2025-GMTStandardTime': 'Championship', 
-    'bundesliga-2025-UTC': 'Bundesliga',
+    # Codes football-data : les calendriers fixturedownload (epl-2025-..., bundesliga-2025-UTC...)
+    # y sont rattachés par chargement.reconcilier_sources, sous les noms d'équipes canoniques
+    'E0': 'Premier League', 
+    'E1': 'Championship', 
+    'D1': 'Bundesliga',
     'D2': 'Bundesliga 2', #A faire
-    'ligue-1-2025-UTC': 'Ligue 1', 
+    'F1': 'Ligue 1', 
     'F2': 'Ligue 2', # A faire
-    'serie-a-2025-UTC': 'Serie A', 
+    'I1': 'Serie A', 
     'I2': 'Serie B', # A faire
     'SP2': 'La Liga 2', # A faire
-    'primeira-liga-2025-UTC': 'Liga Portugal',
+    'P1': 'Liga Portugal',
     'B1': 'Jupiler Pro League',# A faire
     'SC0': 'Scottish Premiership',# A faire
-    'super-lig-2025-TurkeyStandardTime': 'Süper Lig',
+    'T1': 'Süper Lig',
     'G1': 'Super League (Grèce)',# A faire
-    'eredivisie-2025-WEuropeStandardTime': 'Eredivisie',
-    'la-liga-2025-UTC': 'La Liga',
+    'N1': 'Eredivisie',
+    'SP1': 'La Liga',
 
 
 
 }
 
-STATS_COLUMNS_BASE = [
-    'FT Marque', 'FT CS', 'FT No CS',
-    'FT -0.5', 'FT +1.5', 'FT -1.5', 'FT +2.5', 'FT -2.5', 'FT +3.5', 'FT -3.5', 
-    'FT Nuls', 
-    'MT +0.5', 'MT -0.5', 'MT +1.5', 'MT -1.5'
-]
+STATS_COLUMNS_BASE = registre_stats.STATS_PRINCIPALES # définitions : registre_stats.STATS
 
 # ==============================================================================
-# 2. CALCULS STATISTIQUES
-# ==============================================================================
-
-def trouver_max_serie(df_equipe, col_condition):
-    if col_condition not in df_equipe.columns or df_equipe.empty: return 0, "N/A"
-    df_equipe = df_equipe.sort_values('Date')
-    df_equipe['groupe'] = (df_equipe[col_condition] != df_equipe[col_condition].shift()).cumsum()
-    series_true = df_equipe[df_equipe[col_condition] == True]
-    if series_true.empty: return 0, "N/A"
-    lengths = series_true.groupby('groupe').size()
-    max_s = int(lengths.max())
-    groupes_max = lengths[lengths == max_s].index
-    dates = []
-    for g in groupes_max:
-        d = series_true[series_true['groupe'] == g]['Date'].max()
-        if pd.notna(d): dates.append(d)
-    annee = max(dates).year if dates else "N/A"
-    return max_s, annee
-
-def trouver_serie_en_cours(df_equipe, col_condition):
-    if col_condition not in df_equipe.columns: return 0
-    conditions = df_equipe.sort_values('Date')[col_condition].tolist()
-    serie = 0
-    for c in reversed(conditions):
-        if c: serie += 1
-        else: break
-    return serie
-
-def calculer_pourcentage(df_equipe, col_condition):
-    if col_condition not in df_equipe.columns or df_equipe.empty: return 0.0
-    return (df_equipe[col_condition].sum() / len(df_equipe)) * 100
-
-def calculer_score_forme(df_equipe, equipe):
-    if 'FTR' not in df_equipe.columns: return 0, "N/A"
-    df_f = df_equipe[df_equipe['FTR'] != 'NA'].sort_values('Date').tail(5)
-    if len(df_f) < 5: return 0, "Pas assez de matchs"
-    scores = []
-    res_str = []
-    ponderations = [0.2, 0.4, 0.6, 0.8, 1.0]
-    idx = 0
-    for _, row in df_f.iterrows():
-        s = 0
-        r = row['FTR']
-        if (row['HomeTeam'] == equipe and r == 'H') or (row['AwayTeam'] == equipe and r == 'A'):
-            s = 5; res_str.append('V')
-        elif r == 'D':
-            s = 1; res_str.append('N')
-        else:
-            s = -3; res_str.append('D')
-        bm = row['FTHG'] if row['HomeTeam'] == equipe else row['FTAG']
-        be = row['FTAG'] if row['HomeTeam'] == equipe else row['FTHG']
-        if bm >= 3: s += 2
-        if be == 0: s += 2
-        scores.append(s * ponderations[idx])
-        idx += 1
-    return sum(scores), ", ".join(reversed(res_str))
-
-# ==============================================================================
-# 3. CHARGEMENT ET NORMALISATION DES DONNÉES
+# 2. CHARGEMENT ET NORMALISATION DES DONNÉES
 # ==============================================================================
 
 def normaliser_csv_specifique(df):
@@ -153,18 +105,15 @@ def charger_tout_depuis_csv(liste_fichiers):
     
     # 1. Chargement Brut
     for f in liste_fichiers:
-        try:
-            df_t = pd.read_csv(f, on_bad_lines='skip')
-        except:
-            try: df_t = pd.read_csv(f, encoding='latin1', on_bad_lines='skip')
-            except: continue
+        df_t = chargement.lire_csv(f, COLONNES_REQUISES)
+        if df_t is None: continue
         
         df_t = normaliser_csv_specifique(df_t)
         
         # Date Parsing
         df_t['Date'] = pd.to_datetime(df_t['Date'], dayfirst=True, errors='coerce')
         if df_t['Date'].isna().all():
-             df_t = pd.read_csv(f, on_bad_lines='skip')
+             df_t = chargement.lire_csv(f, COLONNES_REQUISES)
              df_t = normaliser_csv_specifique(df_t)
              df_t['Date'] = pd.to_datetime(df_t['Date'], dayfirst=False, errors='coerce')
         
@@ -175,23 +124,24 @@ def charger_tout_depuis_csv(liste_fichiers):
     
     # 2. Fusion Globale
     df_master = pd.concat(all_dfs, ignore_index=True)
+    return preparer_historique(df_master)
+
+def preparer_historique(df_master):
+    """Dédoublonne, sépare historique / futur et calcule les totaux (à partir d'un DataFrame déjà fusionné)."""
+    df_master = df_master.copy()
     
     # 3. NETTOYAGE DES DOUBLONS (CRUCIAL)
-    # On veut garder la ligne qui a un score (FTHG) si elle existe.
-    # On trie : les lignes avec FTHG valide (non NaN) en premier (ou dernier selon le sort)
-    # En Pandas, sort_values met les NaN à la fin par défaut.
-    # Donc si on garde le 'first', on garde celui qui a un score.
-    if 'FTHG' in df_master.columns:
-        df_master = df_master.sort_values(by=['Date', 'FTHG'], na_position='last')
-    
-    # On supprime les doublons basés sur Date + Equipes
-    # (Si deux fichiers contiennent le même match, on en garde un seul)
-    taille_avant = len(df_master)
-    df_master = df_master.drop_duplicates(subset=['Date', 'HomeTeam', 'AwayTeam'], keep='first')
-    taille_apres = len(df_master)
+    # Un même match peut venir de plusieurs fichiers (football-data et calendrier fixturedownload,
+    # avec d'autres noms d'équipes et l'heure du coup d'envoi) : une seule ligne par match, celle
+    # qui a un score, complétée par les autres (déjà fait par le chargement partagé, idempotent).
+    with instrumentation.mesurer_etape('dedoublonnage') as m:
+        taille_avant = len(df_master)
+        df_master = chargement.reconcilier_sources(df_master)
+        taille_apres = len(df_master)
     
-    if taille_avant > taille_apres:
-        print(f"🧹 Nettoyage : {taille_avant - taille_apres} matchs en double supprimés.")
+        if taille_avant > taille_apres:
+            print(f"🧹 Nettoyage : {taille_avant - taille_apres} matchs en double supprimés.")
+        m['lignes'] = taille_apres
 
     # 4. Séparation Historique / Futur
     cols_req = ['Date', 'HomeTeam', 'AwayTeam']
@@ -211,25 +161,13 @@ def charger_tout_depuis_csv(liste_fichiers):
         if col in df_final_hist.columns:
             df_final_hist[col] = pd.to_numeric(df_final_hist[col], errors='coerce').fillna(0)
             
-    # Booléens
+    # Totaux (les booléens des statistiques sont évalués par registre_stats)
     if 'FTHG' in df_final_hist.columns:
         df_final_hist['TotalGoals'] = df_final_hist['FTHG'] + df_final_hist['FTAG']
-        df_final_hist['Cond_Moins_0_5_FT'] = df_final_hist['TotalGoals'] < 0.5
-        df_final_hist['Cond_Plus_1_5_FT'] = df_final_hist['TotalGoals'] > 1.5
-        df_final_hist['Cond_Moins_1_5_FT'] = df_final_hist['TotalGoals'] < 1.5
-        df_final_hist['Cond_Plus_2_5_FT'] = df_final_hist['TotalGoals'] > 2.5
-        df_final_hist['Cond_Moins_2_5_FT'] = df_final_hist['TotalGoals'] < 2.5
-        df_final_hist['Cond_Plus_3_5_FT'] = df_final_hist['TotalGoals'] > 3.5
-        df_final_hist['Cond_Moins_3_5_FT'] = df_final_hist['TotalGoals'] < 3.5
     if 'HTHG' in df_final_hist.columns:
         df_final_hist['TotalHTGoals'] = df_final_hist['HTHG'] + df_final_hist['HTAG']
-        df_final_hist['Cond_Plus_0_5_HT'] = df_final_hist['TotalHTGoals'] > 0.5
-        df_final_hist['Cond_Moins_0_5_HT'] = df_final_hist['TotalHTGoals'] < 0.5
-        df_final_hist['Cond_Plus_1_5_HT'] = df_final_hist['TotalHTGoals'] > 1.5
-        df_final_hist['Cond_Moins_1_5_HT'] = df_final_hist['TotalHTGoals'] < 1.5
     if 'FTR' in df_final_hist.columns:
         df_final_hist['FTR'] = df_final_hist['FTR'].fillna('NA')
-        df_final_hist['Cond_Draw_FT'] = df_final_hist['FTR'] == 'D'
         
     return df_final_hist.sort_values('Date'), df_final_future.sort_values('Date')
 
@@ -237,6 +175,7 @@ def decouvrir_ligues(dossier):
     fichiers = glob.glob(f"{dossier}/**/*.csv", recursive=True)
     ligues = {}
     print("\nRecherche des fichiers (Filtre activé)...")
+    colonnes_equipes = chargement.variantes_colonnes([])
     for f in fichiers:
         code = os.path.basename(f).replace('.csv', '')
         
@@ -246,7 +185,7 @@ def decouvrir_ligues(dossier):
             
         if code.lower() == 'fixtures': continue 
         try:
-            df = pd.read_csv(f, encoding='latin1', on_bad_lines='skip')
+            df = pd.read_csv(f, encoding='latin1', on_bad_lines='skip', usecols=lambda c: c in colonnes_equipes)
             # Petite pré-lecture
             if 'Home Team' in df.columns: 
                 df.rename(columns={'Home Team': 'HomeTeam', 'Away Team': 'AwayTeam'}, inplace=True)
@@ -276,30 +215,38 @@ def charger_fixtures_externes(dossier):
     except: return pd.DataFrame()
 
 # ==============================================================================
-# 4. ANALYSE HYBRIDE
+# 3. ANALYSE HYBRIDE
 # ==============================================================================
 
-def analyser_donnees(df, ligues_dict, df_future_embedded, df_fixtures_global):
+def analyser_donnees(df, ligues_dict, df_future_embedded, df_fixtures_global, dossier_cache_bits=bits_series.DOSSIER_CACHE_BITS):
     resultats = []
-    conditions = {
-        'FT Marque': 'Cond_FT_Score', 'FT CS': 'Cond_FT_CS', 'FT No CS': 'Cond_FT_No_CS',
-        'FT -0.5': 'Cond_Moins_0_5_FT', 'FT +1.5': 'Cond_Plus_1_5_FT',
-        'FT -1.5': 'Cond_Moins_1_5_FT', 'FT +2.5': 'Cond_Plus_2_5_FT',
-        'FT -2.5': 'Cond_Moins_2_5_FT', 'FT +3.5': 'Cond_Plus_3_5_FT',
-        'FT -3.5': 'Cond_Moins_3_5_FT', 'FT Nuls': 'Cond_Draw_FT', 
-        'MT +0.5': 'Cond_Plus_0_5_HT', 'MT -0.5': 'Cond_Moins_0_5_HT',
-        'MT +1.5': 'Cond_Plus_1_5_HT', 'MT -1.5': 'Cond_Moins_1_5_HT',
-    }
+    # Toutes les statistiques du registre évaluées en une passe sur la table longue
+    with instrumentation.mesurer_etape('conditions') as m:
+        equipes_ligues = [eq for equipes in ligues_dict.values() for eq in equipes]
+        table = registre_stats.preparer_table(df, equipes_ligues)
+        matchs_equipes = registre_stats.par_equipe(table)
+        m['lignes'] = len(table)
+    with instrumentation.mesurer_etape('bits'):
+        resumes = bits_series.resumer(bits_series.charger_ou_empaqueter(table, STATS_COLUMNS_BASE, dossier_cache_bits)).to_dict('index')
+    with instrumentation.mesurer_etape('forme'):
+        formes = forme.forme_actuelle(table)
+    with instrumentation.mesurer_etape('lieux'):
+        lieux = requetes_series.series_par_lieu(table, STATS_COLUMNS_BASE)
+    with instrumentation.mesurer_etape('saisons'):
+        saisons = requetes_series.series_saison_actuelle(table, STATS_COLUMNS_BASE)
+    with instrumentation.mesurer_etape('fenetres'):
+        recents = fenetres_stats.taux_recents(fenetres_stats.construire_index(table, STATS_COLUMNS_BASE))
     print("\nCalcul des statistiques en cours...")
     for code, equipes in ligues_dict.items():
         nom_ligue = LEAGUE_NAME_MAPPING.get(code, code)
         for eq in equipes:
-            df_eq = df[(df['HomeTeam'] == eq) | (df['AwayTeam'] == eq)].copy()
-            if df_eq.empty: continue
+            if eq not in matchs_equipes: continue
+            df_eq = matchs_equipes[eq]
             rec = {'Équipe': eq, 'Ligue': nom_ligue}
             
             # -- LOGIQUE PROCHAIN MATCH (HYBRIDE) --
             prochain = "Pas de match prévu"
+            adversaire = lieu = None
             match_trouve = False
             
             # 1. Chercher dans le fichier de la ligue
@@ -310,6 +257,7 @@ def analyser_donnees(df, ligues_dict, df_future_embedded, df_fixtures_global):
                     if match['HomeTeam'] == eq: adv = match['AwayTeam']; cote = "Dom"
                     else: adv = match['HomeTeam']; cote = "Ext"
                     prochain = f"{adv} ({cote}) - {match['Date'].strftime('%d/%m')}"
+                    adversaire, lieu = adv, cote
                     match_trouve = True
             
             # 2. Si pas trouvé, chercher dans fixtures.csv
@@ -320,35 +268,26 @@ def analyser_donnees(df, ligues_dict, df_future_embedded, df_fixtures_global):
                     if match['HomeTeam'] == eq: adv = match['AwayTeam']; cote = "Dom"
                     else: adv = match['HomeTeam']; cote = "Ext"
                     prochain = f"{adv} ({cote}) - {match['Date'].strftime('%d/%m')}"
+                    adversaire, lieu = adv, cote
             
             rec['Prochain_Match'] = prochain
+            rec['Adversaire'] = adversaire
+            rec['Lieu_Prochain'] = lieu
 
-            score, str_forme = calculer_score_forme(df_eq, eq)
+            score, str_forme = formes[eq]
             rec['Form_Score'] = score
             rec['Form_Last_5_Str'] = str_forme
             if 'FTHG' in df_eq.columns:
-                df_eq['BM'] = np.where(df_eq['HomeTeam'] == eq, df_eq['FTHG'], df_eq['FTAG'])
-                df_eq['BE'] = np.where(df_eq['HomeTeam'] == eq, df_eq['FTAG'], df_eq['FTHG'])
-                df_eq['Cond_FT_Score'] = df_eq['BM'] > 0
-                df_eq['Cond_FT_CS'] = df_eq['BE'] == 0
-                df_eq['Cond_FT_No_CS'] = df_eq['BE'] > 0
                 l5 = df_eq['TotalGoals'].tail(5).fillna(0).astype(int).tolist()
                 rec['Last_5_FT_Goals'] = ",".join(map(str, l5))
             else: rec['Last_5_FT_Goals'] = ""
-            for nom_stat, col in conditions.items():
-                if col in df_eq.columns:
-                    max_s, annee = trouver_max_serie(df_eq, col)
-                    curr_s = trouver_serie_en_cours(df_eq, col)
-                    pct = calculer_pourcentage(df_eq, col)
-                    rec[f'{nom_stat}_Record'] = max_s
-                    rec[f'{nom_stat}_Annee_Record'] = annee
-                    rec[f'{nom_stat}_EnCours'] = curr_s
-                    rec[f'{nom_stat}_Pct'] = pct
+            # Record / Année / En cours / % de chaque stat : bitsets de l'équipe (bits_series)
+            rec.update(resumes[eq])
             resultats.append(rec)
-    return pd.DataFrame(resultats)
+    return pd.DataFrame(resultats).join(lieux, on='Équipe').join(saisons, on='Équipe').join(recents, on='Équipe')
 
 # ==============================================================================
-# 5. GÉNÉRATION HTML
+# 4. GÉNÉRATION HTML
 # ==============================================================================
 
 def generer_html(df_complet, df_brisees, nom_fichier):
@@ -375,15 +314,18 @@ def generer_html(df_complet, df_brisees, nom_fichier):
                 alertes_rouges.append({
                     'Ligue': row['Ligue'], 'Équipe': row['Équipe'], 
                     'Statistique': stat, 'Record': rec, 
-                    'Année': row.get(col_an, '-'), 'Série': curr
+                    'Année': row.get(col_an, '-'), 'Série': curr,
+                    'Survie': row.get(f'{stat}_Survie'), 'Hasard': row.get(f'{stat}_Hasard'),
+                    'Lieux': requetes_series.formater_lieux(row, stat),
+                    'Saison': requetes_series.formater_saison(row, stat)
                 })
 
     def render_table_alertes(data_list):
         if not data_list: return '<div class="empty-state">✅ Aucune alerte rouge.</div>'
         df = pd.DataFrame(data_list).sort_values(['Ligue', 'Équipe'])
-        html = '<table class="data-table"><thead><tr><th>Ligue</th><th>Équipe</th><th>Statistique</th><th>Série</th><th>Record</th><th>Type</th></tr></thead><tbody>'
+        html = f'<table class="data-table"><thead><tr><th>Ligue</th><th>Équipe</th><th>Statistique</th><th>Série</th><th>Record</th><th>Prolongation (+{survie_series.HORIZON})</th><th>Historique n → n+1</th><th>Dom / Ext</th><th>Saison (Record)</th><th>Type</th></tr></thead><tbody>'
         for _, r in df.iterrows():
-            html += f"<tr><td><span class='league-tag'>{r['Ligue']}</span></td><td class='fw-bold'>{r['Équipe']}</td><td>{r['Statistique']}</td><td class='text-center font-mono fw-bold'>{r['Série']}</td><td class='text-center'>{r['Record']} <span class='year-tag'>({r['Année']})</span></td><td class='text-center'><span class='badge badge-rouge'>ROUGE</span></td></tr>"
+            html += f"<tr><td><span class='league-tag'>{r['Ligue']}</span></td><td class='fw-bold'>{r['Équipe']}</td><td>{r['Statistique']}</td><td class='text-center font-mono fw-bold'>{r['Série']}</td><td class='text-center'>{r['Record']} <span class='year-tag'>({r['Année']})</span></td><td class='text-center font-mono'>{survie_series.formater_survie(r['Survie'])}</td><td class='text-center font-mono'>{survie_series.formater_survie(r['Hasard'])}</td><td class='text-center'>{r['Lieux']}</td><td class='text-center font-mono'>{r['Saison']}</td><td class='text-center'><span class='badge badge-rouge'>ROUGE</span></td></tr>"
         html += "</tbody></table>"
         return html
 
@@ -405,15 +347,16 @@ def generer_html(df_complet, df_brisees, nom_fichier):
         col_rec = f'{stat_name}_Record'
         if col_rec not in df_in.columns: return ""
         cols = ['Ligue', 'Équipe', col_rec, f'{stat_name}_Annee_Record', f'{stat_name}_EnCours', f'{stat_name}_Pct']
+        cols += [c for c in df_in.columns if c.startswith((f'{stat_name}_Dom_', f'{stat_name}_Ext_', f'{stat_name}_Saison_')) or c in ('Lieu_Prochain', f'{stat_name}_Pct_Recent', f'{stat_name}_Pctile', f'{stat_name}_Z')]
         df = df_in[cols].copy().sort_values(col_rec, ascending=False)
-        html = '<table class="data-table filterable"><thead><tr><th>Ligue</th><th>Équipe</th><th>Série En Cours</th><th>Record (Année)</th><th>% Réussite</th></tr></thead><tbody>'
+        html = f'<table class="data-table filterable"><thead><tr><th>Ligue</th><th>Équipe</th><th>Série En Cours</th><th>Record (Année)</th><th>Saison (Record)</th><th>Dom / Ext</th><th>% Réussite</th><th>% {fenetres_stats.FENETRE_RECENTE} derniers</th><th>Rang Ligue</th></tr></thead><tbody>'
         for _, r in df.iterrows():
             rec = r[col_rec]
             curr = r[f'{stat_name}_EnCours']
             row_cls = "row-alert-red" if curr > 0 and curr == rec else ""
             pct = r[f'{stat_name}_Pct']
             pct_bar = f"<div class='pct-track'><div class='pct-fill' style='width:{pct}%'></div></div><span class='pct-text'>{pct:.1f}%</span>"
-            html += f"<tr class='{row_cls}'><td><span class='league-tag'>{r['Ligue']}</span></td><td class='fw-bold'>{r['Équipe']}</td><td class='text-center fw-bold'>{curr}</td><td class='text-center'>{rec} <span class='year-tag'>({r.get(f'{stat_name}_Annee_Record','-')})</span></td><td>{pct_bar}</td></tr>"
+            html += f"<tr class='{row_cls}'><td><span class='league-tag'>{r['Ligue']}</span></td><td class='fw-bold'>{r['Équipe']}</td><td class='text-center fw-bold'>{curr}</td><td class='text-center'>{rec} <span class='year-tag'>({r.get(f'{stat_name}_Annee_Record','-')})</span></td><td class='text-center font-mono'>{requetes_series.formater_saison(r, stat_name)}</td><td class='text-center'>{requetes_series.formater_lieux(r, stat_name)}</td><td>{pct_bar}</td><td class='text-center font-mono'>{fenetres_stats.formater_recent(r.get(f'{stat_name}_Pct_Recent'))}</td><td class='text-center font-mono'>{rangs_ligue.formater_rang(r, stat_name)}</td></tr>"
         html += "</tbody></table>"
         return html
 
@@ -495,7 +438,7 @@ def generer_html(df_complet, df_brisees, nom_fichier):
         .data-table { width: 100%; border-collapse: collapse; margin-top: 10px; font-size: 0.95em; }
         .data-table th { text-align: left; padding: 12px; background: #f8fafc; border-bottom: 2px solid #e2e8f0; color: #64748b; }
         .data-table td { padding: 12px; border-bottom: 1px solid #e2e8f0; }
-        .badge-rouge { background: #fef2f2; color: var(--red); } .row-alert-red { background: #fef2f2; } .row-alert-red td { color: #991b1b; }
+        .ctx-actif { background: #eef2ff; color: #3730a3; border-radius: 4px; padding: 1px 5px; } .badge-rouge { background: #fef2f2; color: var(--red); } .row-alert-red { background: #fef2f2; } .row-alert-red td { color: #991b1b; }
         .pill { display: inline-block; width: 22px; height: 22px; text-align: center; line-height: 22px; border-radius: 4px; color: white; font-size: 0.75em; font-weight: bold; margin-right: 2px; }
         .pill-v { background: var(--green); } .pill-n { background: #fbbf24; color: #78350f; } .pill-d { background: var(--red); }
         .pct-track { width: 80px; height: 6px; background: #e2e8f0; border-radius: 3px; display: inline-block; margin-right: 8px; }
@@ -584,12 +527,21 @@ def generer_html(df_complet, df_brisees, nom_fichier):
                 let rec = teamData[stat + '_Record'];
                 let curr = teamData[stat + '_EnCours'];
                 let an = teamData[stat + '_Annee_Record'] || '-';
+                let lieux = ['Dom', 'Ext'].filter(l => teamData[stat + '_' + l + '_Record'] !== undefined && teamData[stat + '_' + l + '_Record'] !== '').map(l => {{
+                    let t = `${{l}} ${{teamData[stat + '_' + l + '_EnCours']}} (${{teamData[stat + '_' + l + '_Record']}})`;
+                    return teamData.Lieu_Prochain === l ? `<strong class="ctx-actif">${{t}}</strong>` : t;
+                }}).join(' · ');
+                let recent = teamData[stat + '_Pct_Recent'];
+                recent = (recent !== undefined && recent !== '') ? `{fenetres_stats.FENETRE_RECENTE} derniers : ${{Math.round(recent)}}%` : '';
+                let pctile = teamData[stat + '_Pctile'], z = teamData[stat + '_Z'];
+                let rang = (pctile !== undefined && pctile !== '' && pctile !== null) ? `Ligue : P${{Math.round(pctile)}}` + ((z !== '' && z !== null) ? ` · z ${{z >= 0 ? '+' : ''}}${{z.toFixed(1)}}` : '') : '';
+                let saison = teamData[stat + '_Saison_Record'] !== undefined ? `Saison : ${{teamData[stat + '_Saison_EnCours']}} / ${{teamData[stat + '_Saison_Record']}}` : '';
                 
                 if(rec !== undefined) {{
                     let isAlert = (curr > 0 && curr === rec);
                     let cls = isAlert ? 'alert' : '';
                     let icon = isAlert ? '🚨 ' : '';
-                    html += `<div class="stat-box ${{cls}}"><div class="stat-name">${{icon}}${{stat}}</div><div class="stat-val">Série : ${{curr}}</div><div class="stat-rec">Record : ${{rec}} (${{an}})</div></div>`;
+                    html += `<div class="stat-box ${{cls}}"><div class="stat-name">${{icon}}${{stat}}</div><div class="stat-val">Série : ${{curr}}</div><div class="stat-rec">Record : ${{rec}} (${{an}})</div><div class="stat-rec">${{saison}}</div><div class="stat-rec">${{recent}}</div><div class="stat-rec">${{rang}}</div><div class="stat-rec">${{lieux}}</div></div>`;
                 }}
             }});
             html += `</div></div>`;
@@ -616,7 +568,7 @@ def generer_html(df_complet, df_brisees, nom_fichier):
     except Exception as e: print(f"Erreur HTML: {e}")
 
 # ==============================================================================
-# 6. GESTION DU CACHE
+# 5. GESTION DU CACHE
 # ==============================================================================
 
 def comparer_cache(df_new, fichier_cache):
@@ -634,44 +586,99 @@ def comparer_cache(df_new, fichier_cache):
                 temp['Statistique'] = stat
                 temp = temp.rename(columns={c_old: 'Série Précédente'})
                 brisees.append(temp)
-        return pd.concat(brisees) if brisees else pd.DataFrame()
+        df_brisees = pd.concat(brisees) if brisees else pd.DataFrame()
+        df_brisees.attrs['cache_hits'] = len(df_m) # équipes retrouvées dans le cache
+        return df_brisees
     except: return pd.DataFrame()
 
 # ==============================================================================
 # MAIN
 # ==============================================================================
 
-if __name__ == "__main__":
+def main(df_brut=None, n_workers=N_WORKERS):
+    """Analyse complète. Si df_brut (chargement.charger_historique) est fourni, aucun CSV n'est relu."""
     print("--- DÉMARRAGE ANALYSE ---")
-    ligues, fichiers = decouvrir_ligues(DOSSIER_PRINCIPAL_DATA)
+    with instrumentation.mesurer_etape('decouverte') as m:
+        if df_brut is None:
+            ligues, fichiers = decouvrir_ligues(DOSSIER_PRINCIPAL_DATA)
+        else:
+            ligues = chargement.equipes_par_fichier(df_brut, codes=LEAGUE_NAME_MAPPING.keys())
+        m['ligues'] = len(ligues)
     if not ligues:
         print(f"ERREUR: Aucun fichier CSV trouvé dans {DOSSIER_PRINCIPAL_DATA}")
-        exit()
+        return
     
     # 1. Chargement TOUT depuis les fichiers de ligue (Historique + Futurs intégrés + Nettoyage Doublons)
-    df_hist, df_fixtures_embedded = charger_tout_depuis_csv(fichiers)
-    if df_hist is None: exit()
+    with instrumentation.mesurer_etape('chargement') as m:
+        if df_brut is None: df_hist, df_fixtures_embedded = charger_tout_depuis_csv(fichiers)
+        else: df_hist, df_fixtures_embedded = preparer_historique(df_brut)
+        if df_hist is not None: m['lignes'] = len(df_hist)
+    if df_hist is None: return
+    
+    # Table compacte : catégories partagées, buts int8, colonnes bookmakers écartées
+    with instrumentation.mesurer_etape('compaction') as m:
+        dtype_equipes = chargement.type_equipes(df_hist, df_fixtures_embedded)
+        df_hist_compact = chargement.compacter_matchs(df_hist, dtype_equipes)
+        m['memoire_avant_mo'], m['memoire_apres_mo'] = chargement.rapport_memoire('historique', df_hist, df_hist_compact)
+        df_hist = df_hist_compact
+        if not df_fixtures_embedded.empty: df_fixtures_embedded = chargement.compacter_matchs(df_fixtures_embedded, dtype_equipes)
     
     # 2. Chargement du fichier "fixtures.csv" GLOBAL
-    df_fixtures_global = charger_fixtures_externes(DOSSIER_PRINCIPAL_DATA)
+    if df_brut is None: df_fixtures_global = charger_fixtures_externes(DOSSIER_PRINCIPAL_DATA)
+    else:
+        df_fixtures_global = df_brut[chargement.est_fichier_fixtures(df_brut)].dropna(subset=['Date', 'HomeTeam', 'AwayTeam'])
+        df_fixtures_global = df_fixtures_global[df_fixtures_global['Date'] >= pd.Timestamp.now().normalize()]
     
     # 3. Analyse
-    df_resultats = analyser_donnees(df_hist, ligues, df_fixtures_embedded, df_fixtures_global)
+    with instrumentation.mesurer_etape('series', chaude=True) as m:
+        if n_workers and n_workers > 1:
+            df_resultats = parallele.executer_par_ligue(analyser_donnees, df_hist, ligues, df_fixtures_embedded,
+                                                        df_fixtures_global, n_workers=n_workers)
+        else:
+            df_resultats = analyser_donnees(df_hist, ligues, df_fixtures_embedded, df_fixtures_global)
+        m['lignes'] = len(df_resultats)
+
+    # Probabilités de prolongation après la fusion des lots : le taux de l'adversaire est lu dans toute la table
+    table_hist = registre_stats.preparer_table(df_hist)
+    with instrumentation.mesurer_etape('survie') as m:
+        trans = survie_series.transitions(table_hist, STATS_COLUMNS_BASE)
+        df_resultats = survie_series.ajouter_probabilites(df_resultats, trans, STATS_COLUMNS_BASE)
+        m['lignes'] = len(df_resultats)
+
+    # Tables de hasard (n -> n+1) sur tout l'historique, mises à jour avec les seuls nouveaux matchs
+    with instrumentation.mesurer_etape('hasards') as m:
+        tables_hasard = hasards_series.mettre_a_jour(table_hist, stats=STATS_COLUMNS_BASE)
+        df_resultats = hasards_series.ajouter_taux(df_resultats, tables_hasard, STATS_COLUMNS_BASE)
+        m['lignes'] = tables_hasard['matchs']
+
+    # Percentile et z-score de chaque équipe dans sa ligue, toutes stats en une passe groupée
+    with instrumentation.mesurer_etape('rangs') as m:
+        df_resultats = rangs_ligue.ajouter_rangs(df_resultats, STATS_COLUMNS_BASE)
+        m['lignes'] = len(df_resultats)
     
     CACHE_FILE = "cache_series.csv"
-    df_brisees = comparer_cache(df_resultats, CACHE_FILE)
-    df_resultats.to_csv(CACHE_FILE, index=False)
+    with instrumentation.mesurer_etape('cache') as m:
+        df_brisees = comparer_cache(df_resultats, CACHE_FILE)
+        df_resultats.to_csv(CACHE_FILE, index=False)
+        m['cache_hits'] = df_brisees.attrs.get('cache_hits', 0)
+        m['lignes'] = len(df_brisees)
     
-    generer_html(df_resultats, df_brisees, "index.html")
+    with instrumentation.mesurer_etape('html', chaude=True):
+        generer_html(df_resultats, df_brisees, "index.html")
     
     if DISCORD_WEBHOOK_URL:
-        rouges = []
-        for stat in STATS_COLUMNS_BASE:
-            mask = (df_resultats[f'{stat}_EnCours'] > 0) & (df_resultats[f'{stat}_EnCours'] == df_resultats[f'{stat}_Record'])
-            for _, row in df_resultats[mask].iterrows(): rouges.append(f"**{row['Équipe']}** ({row['Ligue']}) : {stat} ({row[f'{stat}_EnCours']})")
-        if rouges:
-            msg = "🚨 **ALERTES ROUGES** 🚨\n\n" + "\n".join(rouges[:15])
-            if len(rouges) > 15: msg += f"\n... +{len(rouges)-15} autres"
-            try: requests.post(DISCORD_WEBHOOK_URL, json={"content": msg})
-            except: pass
-    print("\n--- TERMINÉ ---")
\ No newline at end of file
+        with instrumentation.mesurer_etape('notification') as m:
+            rouges = []
+            for stat in STATS_COLUMNS_BASE:
+                mask = (df_resultats[f'{stat}_EnCours'] > 0) & (df_resultats[f'{stat}_EnCours'] == df_resultats[f'{stat}_Record'])
+                for _, row in df_resultats[mask].iterrows(): rouges.append(f"**{row['Équipe']}** ({row['Ligue']}) : {stat} ({row[f'{stat}_EnCours']}) - prolongation {survie_series.formater_survie(row.get(f'{stat}_Survie'))}")
+            m['lignes'] = len(rouges)
+            if rouges:
+                msg = "🚨 **ALERTES ROUGES** 🚨\n\n" + "\n".join(rouges[:15])
+                if len(rouges) > 15: msg += f"\n... +{len(rouges)-15} autres"
+                try: requests.post(DISCORD_WEBHOOK_URL, json={"content": msg})
+                except: pass
+    print("\n--- TERMINÉ ---")
+
+if __name__ == "__main__":
+    main()
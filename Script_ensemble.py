@@ -1,6 +1,4 @@
 import pandas as pd
-import numpy as np
-import glob 
 import os   
 import re   
 import requests 
@@ -9,6 +7,18 @@ import time
 import datetime
 import json     
 import warnings
+import affiches
+import bits_series
+import chargement
+import distribution_buts
+import forme
+import hasards_series
+import instrumentation
+import parallele
+import rangs_ligue
+import registre_stats
+import requetes_series
+import survie_series
 
 # =============================================================================
 # 1. CONFIGURATION & MAPPINGS
@@ -49,6 +59,11 @@ STAT_TO_ODD_COLUMN_MAP = {
     'FT CS': 'API_BTTS_Yes', 'FT No CS': 'API_BTTS_No'
 }
 
+N_WORKERS = 1 # > 1 : statistiques calculées ligue par ligue sur plusieurs processus
+FICHIER_HASARDS = "hasards_series_ensemble.npz" # historique différent de Script_complet : tables séparées
+COLONNES_REQUISES = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'HTHG', 'HTAG', 'FTR', 'HTR', 'Div'] + affiches.COLONNES_COTES # seules colonnes lues dans les CSV
+
+# Statistiques affichées dans le rapport (définitions : registre_stats.STATS)
 STATS_COLUMNS_BASE = [
     'FT Marque', 'FT CS', 'FT No CS', 'FT -0.5', 'FT +1.5', 'FT -1.5', 'FT +2.5', 
     'FT -2.5', 'FT +3.5', 'FT -3.5', 'FT Nuls', 'MT +0.5', 'MT -0.5'
@@ -72,6 +87,7 @@ CSS_GLOBAL = """
     .sub-nav { background-color: #333; padding: 10px; display: flex; flex-wrap: wrap; justify-content: center; gap: 10px; position: sticky; top: 85px; z-index: 999; }
     .sub-nav a { color: #ccc; text-decoration: none; font-size: 0.85em; padding: 6px 12px; border-radius: 4px; transition: background 0.2s; cursor: pointer; }
     .sub-nav a:hover { background-color: #555; color: white; } .sub-nav a.active { background-color: #555; color: white; border-bottom: 3px solid #007bff; }
+    .ctx-actif { background-color: #e8eaf6; color: #283593; border-radius: 4px; padding: 1px 5px; }
     .alert-button { border-left: 3px solid #ffc107; } .pre-alert-button { border-left: 3px solid #f57c00; }
     .broken-button { border-left: 3px solid #dc3545; } .dashboard-button { border-left: 3px solid #007bff; }
     .main-content { padding: 20px; max-width: 1200px; margin: 0 auto; }
@@ -198,53 +214,6 @@ def formater_forme_html(forme_string):
     pills = [mapping.get(resultat.strip(), resultat) for resultat in forme_string.split(',')]
     return " ".join(pills)
 
-def trouver_max_serie_pour_colonne(df_equipe, nom_colonne_condition):
-    if nom_colonne_condition not in df_equipe.columns or 'Date' not in df_equipe.columns: return 0, "N/A"
-    df_equipe = df_equipe.sort_values(by='Date')
-    df_equipe['streak_group'] = (df_equipe[nom_colonne_condition] != df_equipe[nom_colonne_condition].shift()).cumsum()
-    streaks_when_true = df_equipe[df_equipe[nom_colonne_condition] == True]
-    if streaks_when_true.empty: return 0, "N/A"
-    streak_lengths = streaks_when_true.groupby('streak_group').size()
-    max_streak = int(streak_lengths.max())
-    groupes_max = streak_lengths[streak_lengths == max_streak].index
-    dates_possibles = streaks_when_true[streaks_when_true['streak_group'].isin(groupes_max)]['Date']
-    last_date = dates_possibles.max()
-    return max_streak, last_date.year
-
-def trouver_serie_en_cours_pour_colonne(df_equipe, nom_colonne_condition):
-    if nom_colonne_condition not in df_equipe.columns: return 0 
-    df_equipe = df_equipe.sort_values(by='Date')
-    conditions_list = df_equipe[nom_colonne_condition].tolist()
-    serie_en_cours = 0
-    for condition_remplie in reversed(conditions_list):
-        if condition_remplie: serie_en_cours += 1
-        else: break
-    return serie_en_cours
-
-def calculer_pourcentage_reussite(df_equipe, nom_colonne_condition):
-    if nom_colonne_condition not in df_equipe.columns or df_equipe.empty: return 0.0
-    return (df_equipe[nom_colonne_condition].sum() / len(df_equipe)) * 100
-
-def calculer_score_de_forme(df_equipe, equipe):
-    if 'FTR' not in df_equipe.columns or 'FTHG' not in df_equipe.columns: return 0, "N/A"
-    df_equipe_forme = df_equipe[~df_equipe['FTR'].isna() & (df_equipe['FTR'] != 'NA')].copy().sort_values(by='Date')
-    last_5 = df_equipe_forme.tail(5)
-    if len(last_5) < 5: return 0, "Pas assez de matchs"
-    scores = []; details = []; weights = [0.2, 0.4, 0.6, 0.8, 1.0]; idx = 0
-    for _, match in last_5.iterrows():
-        s = 0; res = match['FTR']
-        is_home = match['HomeTeam'] == equipe
-        if (is_home and res == 'H') or (not is_home and res == 'A'): s += 5; r = "V"
-        elif res == 'D': s += 1; r = "N"
-        else: s -= 3; r = "D"
-        hg = match['FTHG']; ag = match['FTAG']
-        my_goals = hg if is_home else ag
-        opp_goals = ag if is_home else hg
-        if my_goals >= 3: s += 2
-        if opp_goals == 0: s += 2
-        scores.append(s * weights[idx]); idx += 1; details.append(r)
-    return sum(scores), ", ".join(reversed(details))
-
 def analyser_cache_series(df_actuel, df_cache):
     print("Comparaison avec le cache...")
     if df_cache.empty: return pd.DataFrame(columns=['Ligue', 'Équipe', 'Statistique', 'Série Précédente']), 0, 0
@@ -273,7 +242,7 @@ def envoyer_notifications_discord(alertes_rouges, webhook_url):
     print(f"Envoi de {len(alertes_rouges)} notifications vers Discord...")
     message_description = ""
     for alerte in alertes_rouges:
-        message_description += f"**{alerte['Équipe']}** ({alerte['Ligue']}) : **{alerte['Statistique']}** (Série: **{alerte['Série en Cours']}**)\n"
+        message_description += f"**{alerte['Équipe']}** ({alerte['Ligue']}) : **{alerte['Statistique']}** (Série: **{alerte['Série en Cours']}**, prolongation {alerte.get('Prolongation', '-')})\n"
     if len(message_description) > 1900: message_description = message_description[:1900] + "\n... et plus encore."
     data = { "content": f"🚨 **{len(alertes_rouges)} Alertes Rouges Détectées !** 🚨", "embeds": [ { "title": "Rapport des Séries au Record", "description": message_description, "color": 15158332, "footer": { "text": f"Analyse effectuée le {datetime.datetime.now().strftime('%d/%m/%Y %H:%M')}" } } ] }
     try:
@@ -282,22 +251,27 @@ def envoyer_notifications_discord(alertes_rouges, webhook_url):
     except Exception as e:
         print(f"  - ERREUR Discord: {e}")
 
+def envoyer_affiches_discord(df_affiches, webhook_url):
+    message = affiches.formater_discord(df_affiches)
+    if not message: return
+    if len(message) > 1900: message = message[:1900] + "\n... et plus encore."
+    try:
+        requests.post(webhook_url, json={"content": message})
+        print("  - Affiches envoyées sur Discord.")
+    except Exception as e:
+        print(f"  - ERREUR Discord: {e}")
+
 def calculer_stats_over15_historique(df):
     print("Calcul de l'historique Over 1.5...")
-    df['TotalGoals'] = pd.to_numeric(df['FTHG'], errors='coerce') + pd.to_numeric(df['FTAG'], errors='coerce')
-    df['IsOver15'] = df['TotalGoals'] > 1.5
-    stats_list = []
-    equipes = sorted(list(set(df['HomeTeam'].unique()) | set(df['AwayTeam'].unique())))
-    for eq in equipes:
-        d = df[(df['HomeTeam'] == eq) | (df['AwayTeam'] == eq)]
-        nb = len(d)
-        if nb < 20: continue
-        nb_over = d['IsOver15'].sum()
-        pct = (nb_over / nb) * 100
-        derniere_ligue = d.iloc[-1]['LeagueCode'] if not d.empty else 'X0'
-        nom_ligue = LEAGUE_NAME_MAPPING.get(derniere_ligue, derniere_ligue)
-        stats_list.append({'Ligue': nom_ligue, 'Équipe': eq, 'Matchs Joués': nb, 'Over 1.5': nb_over, '% Over 1.5': pct})
-    df_ov = pd.DataFrame(stats_list)
+    longue = registre_stats.table_longue(df)
+    tableau = distribution_buts.tableau_lignes(distribution_buts.calculer_distributions(longue), 'total', lignes=[1.5])
+    tableau = tableau[tableau['Matchs'] >= 20]
+    derniere_ligue = longue.groupby('Équipe', sort=False, observed=True)['LeagueCode'].last().astype(object)
+    df_ov = pd.DataFrame({
+        'Ligue': [LEAGUE_NAME_MAPPING.get(derniere_ligue[eq], derniere_ligue[eq]) for eq in tableau.index],
+        'Équipe': tableau.index, 'Matchs Joués': tableau['Matchs'].to_numpy(),
+        'Over 1.5': tableau['+1.5'].to_numpy(), '% Over 1.5': tableau['% +1.5'].to_numpy()
+    })
     if not df_ov.empty: df_ov = df_ov.sort_values('% Over 1.5', ascending=False)
     return df_ov
 
@@ -315,7 +289,7 @@ def colorier_tableau_alertes_v22(row):
     if alt == 'Rouge': s = 'background-color: #ffebee; color: #c62828; font-weight: bold;'
     elif alt == 'Orange': s = 'background-color: #fff3e0; color: #f57c00; font-weight: bold;'
     elif alt == 'Vert': s = 'background-color: #e8f5e9; color: #2e7d32; font-weight: bold;'
-    return [s + 'text-align: left; font-weight: normal; color: #333;', s, s, s, s+'text-align:center; font-weight: normal;', s, s+'font-weight: normal; font-size: 0.9em;', s+'color: #17a2b8; font-weight: normal;', s+'color: #0056b3; text-align: center;', s]
+    return [s + 'text-align: left; font-weight: normal; color: #333;', s, s, s, s+'text-align:center; font-weight: normal;', s, s+'font-weight: normal; font-size: 0.9em;', s+'color: #17a2b8; font-weight: normal;', s+'color: #0056b3; text-align: center;', s+'text-align: center;', s+'text-align: center;', s+'text-align: center; font-weight: normal;', s+'text-align: center; font-weight: normal;', s+'text-align: center; font-weight: normal;', s]
 
 def colorier_forme_v22(row):
     sc = row['Score de Forme']; s = ''
@@ -334,8 +308,7 @@ def charger_donnees_robuste(fichiers_csv):
     print(f"Chargement de {len(fichiers_csv)} fichiers...")
     for f in fichiers_csv:
         try:
-            try: df = pd.read_csv(f, on_bad_lines='skip')
-            except: df = pd.read_csv(f, on_bad_lines='skip', encoding='latin1')
+            df = chargement.lire_csv(f, COLONNES_REQUISES)
             df = standardiser_colonnes(df)
             
             with warnings.catch_warnings():
@@ -351,8 +324,13 @@ def charger_donnees_robuste(fichiers_csv):
             all_dfs.append(df)
         except Exception as e: print(f"Erreur fichier {f}: {e}")
     if not all_dfs: return None
-    df_final = pd.concat(all_dfs, ignore_index=True)
+    return preparer_donnees(pd.concat(all_dfs, ignore_index=True))
+
+def preparer_donnees(df_final):
+    """Nettoyage et totaux de buts sur un DataFrame déjà fusionné (copie, l'original n'est pas modifié)."""
     df_final = df_final.dropna(subset=['HomeTeam', 'AwayTeam'])
+    # Matchs joués seulement : les calendriers fixturedownload contiennent aussi les matchs à venir (sans score)
+    if 'FTHG' in df_final.columns: df_final = df_final[df_final['FTHG'].notna()]
     df_final = df_final.sort_values(by='Date')
     for col in ['FTHG', 'FTAG', 'HTHG', 'HTAG']:
         if col in df_final.columns:
@@ -362,12 +340,6 @@ def charger_donnees_robuste(fichiers_csv):
     df_final['TotalGoals'] = df_final['FTHG'] + df_final['FTAG']
     if 'HTHG' in df_final.columns: df_final['TotalHTGoals'] = df_final['HTHG'] + df_final['HTAG']
     else: df_final['TotalHTGoals'] = 0
-    df_final['Cond_Moins_0_5_FT'] = df_final['TotalGoals'] < 0.5; df_final['Cond_Plus_1_5_FT'] = df_final['TotalGoals'] > 1.5
-    df_final['Cond_Moins_1_5_FT'] = df_final['TotalGoals'] < 1.5; df_final['Cond_Plus_2_5_FT'] = df_final['TotalGoals'] > 2.5
-    df_final['Cond_Moins_2_5_FT'] = df_final['TotalGoals'] < 2.5; df_final['Cond_Plus_3_5_FT'] = df_final['TotalGoals'] > 3.5
-    df_final['Cond_Moins_3_5_FT'] = df_final['TotalGoals'] < 3.5; df_final['Cond_Plus_0_5_HT'] = df_final['TotalHTGoals'] > 0.5
-    df_final['Cond_Moins_0_5_HT'] = df_final['TotalHTGoals'] < 0.5; df_final['Cond_Plus_1_5_HT'] = df_final['TotalHTGoals'] > 1.5
-    df_final['Cond_Moins_1_5_HT'] = df_final['TotalHTGoals'] < 1.5; df_final['Cond_Draw_FT'] = df_final['FTR'] == 'D'
     return df_final
 
 def charger_cotes_via_api(api_key, codes_ligues):
@@ -376,6 +348,7 @@ def charger_cotes_via_api(api_key, codes_ligues):
     sports = [ODDS_API_LEAGUE_MAP[c] for c in codes_ligues if c in ODDS_API_LEAGUE_MAP]
     if not sports: return {}
     final_dict = {}
+    ligues_api = {sport: code for code, sport in ODDS_API_LEAGUE_MAP.items()}
     try:
         resp = requests.get("https://api.the-odds-api.com/v4/sports/soccer/odds/", params={
             'apiKey': api_key, 'regions': 'eu', 'markets': 'h2h,totals', 'sports': ','.join(sports[:15]), 'oddsFormat': 'decimal', 'bookmakers': 'bet365'
@@ -400,39 +373,40 @@ def charger_cotes_via_api(api_key, codes_ligues):
                             if n == 'Over': odds[f'API_Over_{pt}'.replace('.','_')] = p
                             else: odds[f'API_Under_{pt}'.replace('.','_')] = p
                 if 'API_H' in odds and 'API_A' in odds: odds['API_12'] = round(1/(1/odds['API_H'] + 1/odds['API_A']), 2)
-                info = {'opponent': away, 'loc': 'Home', 'odds': odds, 'commence_time': m.get('commence_time')}
+                ligue = ligues_api.get(m.get('sport_key'))
+                info = {'opponent': away, 'loc': 'Home', 'odds': odds, 'commence_time': m.get('commence_time'), 'ligue': ligue}
                 final_dict[home] = info
-                final_dict[away] = {'opponent': home, 'loc': 'Away', 'odds': odds, 'commence_time': m.get('commence_time')}
+                final_dict[away] = {'opponent': home, 'loc': 'Away', 'odds': odds, 'commence_time': m.get('commence_time'), 'ligue': ligue}
     except: pass
     return final_dict
 
-def calculer_stats_globales(df, ligues_map, odds_dict):
+def calculer_stats_globales(df, ligues_map, odds_dict, dossier_cache_bits=bits_series.DOSSIER_CACHE_BITS):
     res = []
-    cols_map = {
-        'FT Marque': 'Cond_FT_Score', 'FT CS': 'Cond_FT_CS', 'FT No CS': 'Cond_FT_No_CS',
-        'FT -0.5': 'Cond_Moins_0_5_FT', 'FT +1.5': 'Cond_Plus_1_5_FT', 'FT -1.5': 'Cond_Moins_1_5_FT',
-        'FT +2.5': 'Cond_Plus_2_5_FT', 'FT -2.5': 'Cond_Moins_2_5_FT', 'FT +3.5': 'Cond_Plus_3_5_FT',
-        'FT -3.5': 'Cond_Moins_3_5_FT', 'FT Nuls': 'Cond_Draw_FT', 'MT +0.5': 'Cond_Plus_0_5_HT',
-        'MT -0.5': 'Cond_Moins_0_5_HT', 'MT +1.5': 'Cond_Plus_1_5_HT', 'MT -1.5': 'Cond_Moins_1_5_HT'
-    }
+    with instrumentation.mesurer_etape('conditions') as m:
+        equipes_ligues = [eq for equipes in ligues_map.values() for eq in equipes]
+        table = registre_stats.preparer_table(df, equipes_ligues)
+        matchs_equipes = registre_stats.par_equipe(table)
+        m['lignes'] = len(table)
+    with instrumentation.mesurer_etape('bits'):
+        resumes = bits_series.resumer(bits_series.charger_ou_empaqueter(table, dossier=dossier_cache_bits)).to_dict('index')
+    with instrumentation.mesurer_etape('forme'):
+        formes = forme.forme_actuelle(table)
+    with instrumentation.mesurer_etape('lieux'):
+        lieux = requetes_series.series_par_lieu(table)
+    with instrumentation.mesurer_etape('saisons'):
+        saisons = requetes_series.series_saison_actuelle(table)
     print("Calcul des stats...")
     for code, equipes in ligues_map.items():
         nom_ligue = LEAGUE_NAME_MAPPING.get(code, code)
         for eq in equipes:
-            d = df[(df['HomeTeam'] == eq) | (df['AwayTeam'] == eq)].copy()
-            if d.empty: continue
-            d = d.sort_values('Date')
-            d['ButsMarques'] = np.where(d['HomeTeam'] == eq, d['FTHG'], d['FTAG'])
-            d['ButsEncaisses'] = np.where(d['HomeTeam'] == eq, d['FTAG'], d['FTHG'])
-            d['Cond_FT_Score'] = d['ButsMarques'] > 0
-            d['Cond_FT_CS'] = d['ButsEncaisses'] == 0
-            d['Cond_FT_No_CS'] = d['ButsEncaisses'] > 0
+            if eq not in matchs_equipes: continue
+            d = matchs_equipes[eq].sort_values('Date')
             rec = {'Équipe': eq, 'Ligue': nom_ligue}
             if 'TotalGoals' in d.columns: rec['Last_5_FT_Goals'] = ", ".join(d['TotalGoals'].tail(5).astype(int).astype(str))
             else: rec['Last_5_FT_Goals'] = "N/A"
             if 'TotalHTGoals' in d.columns: rec['Last_5_MT_Goals'] = ", ".join(d['TotalHTGoals'].tail(5).astype(int).astype(str))
             else: rec['Last_5_MT_Goals'] = "N/A"
-            sc, det = calculer_score_de_forme(d, eq)
+            sc, det = formes[eq]
             rec['Form_Score'] = sc; rec['Form_Last_5_Str'] = det
             nxt = "N/A"; info = odds_dict.get(eq)
             if not info:
@@ -443,16 +417,13 @@ def calculer_stats_globales(df, ligues_map, odds_dict):
                 except: dt = "?"
                 nxt = f"{dt} -> {info['opponent']} ({'Dom' if info['loc']=='Home' else 'Ext'})"
             rec['Prochain_Match'] = nxt
-            for stat, col in cols_map.items():
-                mx, yr = trouver_max_serie_pour_colonne(d, col)
-                cur = trouver_serie_en_cours_pour_colonne(d, col)
-                pct = calculer_pourcentage_reussite(d, col)
-                rec[f'{stat}_Record'] = mx; rec[f'{stat}_Annee_Record'] = yr
-                rec[f'{stat}_EnCours'] = cur; rec[f'{stat}_Pct'] = pct
+            rec['Adversaire'] = info['opponent'] if info else None
+            rec['Lieu_Prochain'] = ('Dom' if info['loc'] == 'Home' else 'Ext') if info else None
+            rec.update(resumes[eq]) # Record / Année / En cours / % : bitsets (bits_series)
             res.append(rec)
-    return pd.DataFrame(res)
+    return pd.DataFrame(res).join(lieux, on='Équipe').join(saisons, on='Équipe')
 
-def sauvegarder_rapport_global_html(df, brisees, c_bris, c_act, df_last, df_over15, fichier, titre, odds):
+def sauvegarder_rapport_global_html(df, brisees, c_bris, c_act, df_last, df_over15, fichier, titre, odds, df_affiches=None):
     print("Génération du HTML...")
     rouges = []; pre = []
     for stat in STATS_COLUMNS_BASE:
@@ -481,7 +452,12 @@ def sauvegarder_rapport_global_html(df, brisees, c_bris, c_act, df_last, df_over
                     'Ligue': row['Ligue'], 'Équipe': row['Équipe'], 'Statistique': stat,
                     'Record': r, 'Année Record': row[col_yr], 'Série en Cours': c,
                     '5 Derniers Buts': row['Last_5_FT_Goals'], 'Prochain Match': row['Prochain_Match'],
-                    'Cote (Pari Inverse)': cote_val, 'Alerte': typ
+                    'Cote (Pari Inverse)': cote_val,
+                    'Prolongation': survie_series.formater_survie(row.get(f'{stat}_Survie')),
+                    'Historique n → n+1': survie_series.formater_survie(row.get(f'{stat}_Hasard')),
+                    'Dom / Ext': requetes_series.formater_lieux(row, stat),
+                    'Saison (Record)': requetes_series.formater_saison(row, stat),
+                    'Rang Ligue': rangs_ligue.formater_rang(row, stat), 'Alerte': typ
                 }
                 if typ == 'Rouge': rouges.append(item)
                 else: pre.append(item)
@@ -489,7 +465,7 @@ def sauvegarder_rapport_global_html(df, brisees, c_bris, c_act, df_last, df_over
     if not rouges: html_rouges = "<h3 class='no-alerts'>Aucune alerte Rouge.</h3>"
     else:
         dfr = pd.DataFrame(rouges).sort_values(['Ligue', 'Équipe'])
-        cols = ['Ligue', 'Équipe', 'Statistique', 'Record', 'Année Record', 'Série en Cours', '5 Derniers Buts', 'Prochain Match', 'Cote (Pari Inverse)', 'Alerte']
+        cols = ['Ligue', 'Équipe', 'Statistique', 'Record', 'Année Record', 'Série en Cours', '5 Derniers Buts', 'Prochain Match', 'Cote (Pari Inverse)', 'Prolongation', 'Historique n → n+1', 'Dom / Ext', 'Saison (Record)', 'Rang Ligue', 'Alerte']
         html_rouges = dfr[cols].style.apply(colorier_tableau_alertes_v22, axis=1).set_table_attributes('class="styled-table alerts-table filterable-table"').format({'Année Record': '{}'}).hide(axis="index").hide(['Alerte'], axis=1).to_html()
 
     if not pre: html_pre = "<h3 class='no-alerts'>Aucune pré-alerte.</h3>"
@@ -497,7 +473,7 @@ def sauvegarder_rapport_global_html(df, brisees, c_bris, c_act, df_last, df_over
         dfp = pd.DataFrame(pre)
         dfp['Alerte'] = pd.Categorical(dfp['Alerte'], ["Orange", "Vert"], ordered=True)
         dfp = dfp.sort_values(['Alerte', 'Ligue', 'Équipe'])
-        cols = ['Ligue', 'Équipe', 'Statistique', 'Record', 'Année Record', 'Série en Cours', '5 Derniers Buts', 'Prochain Match', 'Cote (Pari Inverse)', 'Alerte']
+        cols = ['Ligue', 'Équipe', 'Statistique', 'Record', 'Année Record', 'Série en Cours', '5 Derniers Buts', 'Prochain Match', 'Cote (Pari Inverse)', 'Prolongation', 'Historique n → n+1', 'Dom / Ext', 'Saison (Record)', 'Rang Ligue', 'Alerte']
         html_pre = dfp[cols].style.apply(colorier_tableau_alertes_v22, axis=1).set_table_attributes('class="styled-table alerts-table filterable-table"').format({'Année Record': '{}'}).hide(axis="index").hide(['Alerte'], axis=1).to_html()
 
     df_forme = df[['Ligue', 'Équipe', 'Form_Score', 'Form_Last_5_Str', 'Prochain_Match']].copy()
@@ -521,6 +497,10 @@ def sauvegarder_rapport_global_html(df, brisees, c_bris, c_act, df_last, df_over
     if df_over15.empty: html_over15 = "<h3 class='no-alerts'>Pas assez de données.</h3>"
     else: html_over15 = df_over15.style.set_table_attributes('class="styled-table filterable-table"').format({'% Over 1.5': '{:.1f}%'}).hide(axis="index").to_html()
 
+    if df_affiches is None: df_affiches = affiches.tableau_affiches(None, df)
+    html_affiches = affiches.generer_html(df_affiches)
+    n_signales = int((df_affiches['Signal'] != '').sum())
+
     with open(fichier, "w", encoding="utf-8") as f:
         f.write(f"""<!DOCTYPE html><html lang="fr"><head><meta charset="UTF-8"><title>{titre}</title>{CSS_GLOBAL}</head><body>
         <div class="app-header"><h1>ANALYSE FOOTBALL V55</h1><div class="mode-switcher"><button id="btn-statsmax" class="mode-btn btn-statsmax active" onclick="switchMode('statsmax')">📊 STATS MAX</button><button id="btn-over15" class="mode-btn btn-over15" onclick="switchMode('over15')">⚽ HISTO OVER 1.5</button></div></div>
@@ -532,6 +512,7 @@ def sauvegarder_rapport_global_html(df, brisees, c_bris, c_act, df_last, df_over
                 <a href="#" onclick="showSection('team-view-section', this)" class="team-button">Par Équipe</a>
                 <a href="#" onclick="showSection('alert-section', this)" class="alert-button">Alertes Rouges</a>
                 <a href="#" onclick="showSection('pre-alert-section', this)" class="pre-alert-button">Pré-Alertes</a>
+                <a href="#" onclick="showSection('fixtures-section', this)" class="fixtures-button">Affiches</a>
             </nav></header>
             <div class="main-content">
                 <div class="league-filter-container" id="league-filter-container">
@@ -547,6 +528,7 @@ def sauvegarder_rapport_global_html(df, brisees, c_bris, c_act, df_last, df_over
                         <div class="dashboard-card card-orange"><div class="card-title">Pré-Alertes</div><div class="card-value">{len(pre)}</div></div>
                         <div class="dashboard-card card-broken"><div class="card-title">Brisées</div><div class="card-value">{c_bris}</div></div>
                         <div class="dashboard-card card-api"><div class="card-title">Matchs API</div><div class="card-value">{len(odds)//2}</div></div>
+                        <div class="dashboard-card card-fixtures"><div class="card-title">Affiches Signalées</div><div class="card-value">{n_signales} / {len(df_affiches)}</div></div>
                     </div>
                     <h2 class="section-title">État de Forme (Top/Flop)</h2>{html_forme}
                 </div>
@@ -567,6 +549,11 @@ def sauvegarder_rapport_global_html(df, brisees, c_bris, c_act, df_last, df_over
                 </div>
                 <div class="section-container tab-content" id="alert-section"><h2 class="section-title">Alertes Rouges</h2>{html_rouges}</div>
                 <div class="section-container tab-content" id="pre-alert-section"><h2 class="section-title">Pré-Alertes</h2>{html_pre}</div>
+                <div class="section-container tab-content" id="fixtures-section">
+                    <h2 class="section-title">Affiches : séries des deux équipes ({affiches.HORIZON_JOURS} jours)</h2>
+                    <p>✅ Renfort : les séries des deux équipes vont dans le même sens. ⚔️ Conflit : elles ne peuvent pas se prolonger toutes les deux.</p>
+                    {html_affiches}
+                </div>
             </div>
         </div>
         <div id="section-over15" class="app-section">
@@ -587,26 +574,52 @@ def sauvegarder_rapport_global_html(df, brisees, c_bris, c_act, df_last, df_over
         </body></html>""")
     print(f"Succès! Rapport généré: {fichier}")
 
-if __name__ == "__main__":
+def main(df_brut=None, n_workers=N_WORKERS):
+    """Rapport V55. Si df_brut (chargement.charger_historique) est fourni, aucun CSV n'est relu."""
     dossier_csv = "CSV_Data"
     fichier_cache = "rapport_cache.csv"
-    csv_files = sorted([f for f in glob.glob(f"{dossier_csv}/**/*.csv", recursive=True) if "fixtures.csv" not in f])
-    if not csv_files: print("Erreur: Aucun CSV trouvé."); exit()
-    ligues_map = {}
-    for f in csv_files:
-         code = os.path.basename(f).replace('.csv','')
-         try:
-             try: dft = pd.read_csv(f, on_bad_lines='skip')
-             except: dft = pd.read_csv(f, on_bad_lines='skip', encoding='latin1')
-             dft = standardiser_colonnes(dft)
-             teams = sorted(list(set(dft['HomeTeam'].dropna().unique()) | set(dft['AwayTeam'].dropna().unique())))
-             if teams: ligues_map[code] = teams
-         except: pass
-
-    df_global = charger_donnees_robuste(csv_files)
-    if df_global is None or df_global.empty: exit()
-    odds = charger_cotes_via_api(config.API_KEY, ligues_map.keys()) if hasattr(config, 'API_KEY') else {}
-    df_res = calculer_stats_globales(df_global, ligues_map, odds)
+    if df_brut is None:
+        # Chargement partagé : sources réconciliées, les calendriers fixturedownload rattachés à leur ligue
+        df_brut = chargement.charger_historique(dossier_csv, colonnes=COLONNES_REQUISES)
+        if df_brut.empty: print("Erreur: Aucun CSV trouvé."); return
+    df_brut_complet = df_brut # matchs à venir (fixtures.csv compris) pour les affiches
+    with instrumentation.mesurer_etape('decouverte') as m:
+        df_brut = df_brut[~chargement.est_fichier_fixtures(df_brut)]
+        ligues_map = chargement.equipes_par_fichier(df_brut)
+        m['ligues'] = len(ligues_map)
+    with instrumentation.mesurer_etape('chargement') as m:
+        df_global = preparer_donnees(df_brut.dropna(subset=['Date']))
+        if df_global is not None: m['lignes'] = len(df_global)
+
+    if df_global is None or df_global.empty: return
+    with instrumentation.mesurer_etape('compaction') as m:
+        df_global_compact = chargement.compacter_matchs(df_global)
+        m['memoire_avant_mo'], m['memoire_apres_mo'] = chargement.rapport_memoire('historique', df_global, df_global_compact)
+        df_global = df_global_compact
+    with instrumentation.mesurer_etape('cotes') as m:
+        odds = charger_cotes_via_api(config.API_KEY, ligues_map.keys()) if hasattr(config, 'API_KEY') else {}
+        m['lignes'] = len(odds)
+    with instrumentation.mesurer_etape('series', chaude=True) as m:
+        if n_workers and n_workers > 1:
+            df_res = parallele.executer_par_ligue(calculer_stats_globales, df_global, ligues_map, odds, n_workers=n_workers)
+        else:
+            df_res = calculer_stats_globales(df_global, ligues_map, odds)
+        m['lignes'] = len(df_res)
+    # Prolongation après la fusion des lots : le taux de l'adversaire est lu dans toute la table des résultats
+    table_globale = registre_stats.preparer_table(df_global)
+    with instrumentation.mesurer_etape('survie') as m:
+        df_res = survie_series.ajouter_probabilites(df_res, survie_series.transitions(table_globale))
+        m['lignes'] = len(df_res)
+    with instrumentation.mesurer_etape('hasards') as m:
+        tables_hasard = hasards_series.mettre_a_jour(table_globale, FICHIER_HASARDS)
+        df_res = hasards_series.ajouter_taux(df_res, tables_hasard)
+        m['lignes'] = tables_hasard['matchs']
+    with instrumentation.mesurer_etape('rangs') as m:
+        df_res = rangs_ligue.ajouter_rangs(df_res)
+        m['lignes'] = len(df_res)
+    with instrumentation.mesurer_etape('affiches') as m:
+        df_affiches = affiches.tableau_affiches(affiches.prochains_matchs(df_brut_complet, odds), df_res, noms_ligues=LEAGUE_NAME_MAPPING)
+        m['lignes'] = len(df_affiches)
     print("\n--- RÉSULTATS ---")
     print(df_res.head())
     df_over15 = calculer_stats_over15_historique(df_global)
@@ -615,17 +628,29 @@ if __name__ == "__main__":
         mx = df_global['Date'].max()
         df_last = df_global[(df_global['Date'] > mx - pd.Timedelta(days=7)) & (df_global['Date'] <= mx)].copy()
         df_last['Ligue'] = df_last['LeagueCode'].map(LEAGUE_NAME_MAPPING).fillna(df_last['LeagueCode'])
-    df_cache = pd.DataFrame()
-    if os.path.exists(fichier_cache): 
-        try: df_cache = pd.read_csv(fichier_cache)
-        except: pass
-    df_bris, cb, ca = analyser_cache_series(df_res, df_cache)
+    with instrumentation.mesurer_etape('cache') as m:
+        df_cache = pd.DataFrame()
+        if os.path.exists(fichier_cache): 
+            try: df_cache = pd.read_csv(fichier_cache)
+            except: pass
+        df_bris, cb, ca = analyser_cache_series(df_res, df_cache)
+        if not df_cache.empty and not df_res.empty:
+            m['cache_hits'] = len(df_res[['Ligue', 'Équipe']].merge(df_cache[['Ligue', 'Équipe']].drop_duplicates()))
+        m['lignes'] = len(df_bris)
     if hasattr(config, 'DISCORD_WEBHOOK_URL') and config.DISCORD_WEBHOOK_URL:
-        alertes_rouges = []
-        for _, row in df_res.iterrows():
-            for stat in STATS_COLUMNS_BASE:
-                 if row[f'{stat}_EnCours'] > 0 and row[f'{stat}_EnCours'] == row[f'{stat}_Record']:
-                     alertes_rouges.append({'Ligue': row['Ligue'], 'Équipe': row['Équipe'], 'Statistique': stat, 'Série en Cours': row[f'{stat}_EnCours']})
-        envoyer_notifications_discord(alertes_rouges, config.DISCORD_WEBHOOK_URL)
-    sauvegarder_rapport_global_html(df_res, df_bris, cb, ca, df_last, df_over15, "Ft.html", "Rapport V55", odds)
-    df_res.to_csv(fichier_cache, index=False)
\ No newline at end of file
+        with instrumentation.mesurer_etape('notification') as m:
+            alertes_rouges = []
+            for _, row in df_res.iterrows():
+                for stat in STATS_COLUMNS_BASE:
+                     if row[f'{stat}_EnCours'] > 0 and row[f'{stat}_EnCours'] == row[f'{stat}_Record']:
+                         alertes_rouges.append({'Ligue': row['Ligue'], 'Équipe': row['Équipe'], 'Statistique': stat, 'Série en Cours': row[f'{stat}_EnCours'],
+                                                'Prolongation': survie_series.formater_survie(row.get(f'{stat}_Survie'))})
+            m['lignes'] = len(alertes_rouges)
+            envoyer_notifications_discord(alertes_rouges, config.DISCORD_WEBHOOK_URL)
+            envoyer_affiches_discord(df_affiches, config.DISCORD_WEBHOOK_URL)
+    with instrumentation.mesurer_etape('html', chaude=True):
+        sauvegarder_rapport_global_html(df_res, df_bris, cb, ca, df_last, df_over15, "Ft.html", "Rapport V55", odds, df_affiches)
+    df_res.to_csv(fichier_cache, index=False)
+
+if __name__ == "__main__":
+    main()
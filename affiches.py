@@ -0,0 +1,253 @@
+import pandas as pd
+import numpy as np
+import argparse
+from functools import lru_cache
+
+import chargement
+import registre_stats
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+HORIZON_JOURS = 7 # matchs à venir affichés : aujourd'hui et les N-1 jours suivants
+SERIE_MIN = 3 # série en cours prise en compte à partir de 3 matchs
+BUTS_MAX = 6 # scores FT de 0-0 à 6-6 (et toutes les mi-temps possibles) pour déduire les relations entre stats
+SOURCE_API_COTES = 'odds-api'
+TOP_DISCORD = 10
+
+# Cotes lues dans les fichiers football-data (fixtures.csv) : 1N2 et +/- 2.5 buts
+COLONNES_COTES = ['B365H', 'B365D', 'B365A', 'B365>2.5', 'B365<2.5']
+# Cote du match pour l'issue 1 / N / 2 : API d'abord, puis fichier
+COTES_1N2 = {'1': ['API_H', 'B365H'], 'N': ['API_D', 'B365D'], '2': ['API_A', 'B365A']}
+# Cote de l'événement d'une stat (quand un marché correspondant existe)
+COTES_STATS = {
+    'FT +1.5': ['API_Over_1_5'], 'FT -1.5': ['API_Under_1_5'],
+    'FT +2.5': ['API_Over_2_5', 'B365>2.5'], 'FT -2.5': ['API_Under_2_5', 'B365<2.5'],
+    'FT +3.5': ['API_Over_3_5'], 'FT -3.5': ['API_Under_3_5'],
+    'FT Nuls': ['API_D', 'B365D'],
+}
+
+# ==============================================================================
+# 1. RELATIONS ENTRE SÉRIES (DÉDUITES DU REGISTRE)
+# ==============================================================================
+
+@lru_cache(maxsize=None)
+def relations():
+    """
+    Relation entre une série de l'équipe à domicile (Stat_Dom) et une de l'équipe à
+    l'extérieur (Stat_Ext), évaluée sur tous les scores possibles avec les expressions
+    de registre_stats : 'Renfort' si l'un des deux événements entraîne l'autre
+    (domicile +2.5 et extérieur +1.5, domicile CS et extérieur Muet), 'Conflit' s'ils ne
+    peuvent pas arriver dans le même match (domicile +2.5 et extérieur -2.5).
+    Les paires sans relation ne figurent pas dans la table.
+    """
+    ft = np.arange(BUTS_MAX + 1)
+    fthg, ftag, hthg, htag = [g.ravel() for g in np.meshgrid(ft, ft, ft, ft, indexing='ij')]
+    possibles = (hthg <= fthg) & (htag <= ftag)
+    scores = pd.DataFrame({'FTHG': fthg[possibles], 'FTAG': ftag[possibles], 'HTHG': hthg[possibles], 'HTAG': htag[possibles]})
+    scores['HomeTeam'], scores['AwayTeam'] = 'Dom', 'Ext'
+    scores['FTR'] = np.select([scores['FTHG'] > scores['FTAG'], scores['FTHG'] < scores['FTAG']], ['H', 'A'], default='D')
+
+    masque = registre_stats.preparer_table(scores)[registre_stats.COLONNE_MASQUE].to_numpy()
+    bits = ((masque[:, None] >> np.arange(len(registre_stats.STATS), dtype=masque.dtype)) & 1).astype(bool)
+    dom, ext = bits[0::2], bits[1::2] # table longue : domicile puis extérieur pour chaque match
+    ensemble = (dom[:, :, None] & ext[:, None, :]).sum(axis=0) # scores où les deux événements arrivent
+    n_dom, n_ext = dom.sum(axis=0)[:, None], ext.sum(axis=0)[None, :]
+    renfort = (ensemble > 0) & ((ensemble == n_dom) | (ensemble == n_ext))
+    conflit = (ensemble == 0) & (n_dom > 0) & (n_ext > 0)
+
+    noms = pd.Index(registre_stats.STATS)
+    table = pd.DataFrame(np.select([renfort, conflit], ['Renfort', 'Conflit'], default=''), index=noms.rename('Stat_Dom'), columns=noms.rename('Stat_Ext'))
+    table = table.stack().rename('Relation').reset_index()
+    return table[table['Relation'] != ''].reset_index(drop=True)
+
+# ==============================================================================
+# 2. MATCHS À VENIR (FICHIERS + API DE COTES)
+# ==============================================================================
+
+def cotes_api_en_matchs(odds):
+    """
+    Dictionnaire {équipe: info} de Script_ensemble.charger_cotes_via_api -> une ligne par
+    match (côté domicile) : Date, équipes, LeagueCode, Source et colonnes API_*.
+    """
+    lignes = [{'Date': info.get('commence_time'), 'HomeTeam': equipe, 'AwayTeam': info['opponent'],
+               'LeagueCode': info.get('ligue'), **info.get('odds', {})}
+              for equipe, info in odds.items() if info.get('loc') == 'Home']
+    if not lignes: return pd.DataFrame(columns=chargement.COLONNES_CLES + ['LeagueCode', 'Source'])
+    api = pd.DataFrame(lignes)
+    api['Date'] = pd.to_datetime(api['Date'], errors='coerce', utc=True).dt.tz_localize(None)
+    api['Source'] = SOURCE_API_COTES
+    return api
+
+def _noms_canoniques(api, df_brut):
+    """Noms de l'API ramenés aux noms canoniques (table des équipes de tout l'historique)."""
+    colonnes = ['LeagueCode', 'HomeTeam', 'AwayTeam', 'Source']
+    tout = pd.concat([df_brut[colonnes], api[colonnes]], ignore_index=True)
+    ligues = chargement.ligue_canonique(tout['LeagueCode'])
+    table = chargement.table_equipes(tout, ligues)
+    ligues_api = ligues.iloc[len(df_brut):].to_numpy()
+    for col in ['HomeTeam', 'AwayTeam']:
+        api[col] = table['Canonique'].to_numpy()[table.index.get_indexer(pd.MultiIndex.from_arrays([ligues_api, api[col]]))]
+    return api
+
+def prochains_matchs(df_brut, odds=None, jours=HORIZON_JOURS, maintenant=None):
+    """
+    Matchs à venir de toutes les sources : fichier fixtures (rattaché à sa ligue par Div),
+    matchs sans score des fichiers de ligue (calendriers fixturedownload) et API de cotes.
+    Un match présent dans plusieurs sources est fusionné (chargement.reconcilier_sources) :
+    cotes de l'API et du fichier sur la même ligne.
+    """
+    debut = (pd.Timestamp(maintenant) if maintenant is not None else pd.Timestamp.now()).normalize()
+    fin = debut + pd.Timedelta(days=jours)
+    colonnes = chargement.COLONNES_CLES + ['LeagueCode', 'Source'] + [c for c in COLONNES_COTES if c in df_brut.columns]
+    a_venir = df_brut['Date'].between(debut, fin, inclusive='left')
+    if 'FTHG' in df_brut.columns: a_venir &= df_brut['FTHG'].isna()
+    futurs = df_brut.loc[a_venir, colonnes + (['Div'] if 'Div' in df_brut.columns else [])].copy()
+    if 'Div' in futurs.columns:
+        fixtures = chargement.est_fichier_fixtures(futurs)
+        futurs.loc[fixtures, 'LeagueCode'] = futurs.loc[fixtures, 'Div'].fillna('fixtures')
+        futurs = futurs.drop(columns='Div')
+
+    if odds:
+        api = cotes_api_en_matchs(odds)
+        api = api[api['Date'].between(debut, fin, inclusive='left')]
+        if not api.empty: futurs = pd.concat([futurs, _noms_canoniques(api, df_brut)], ignore_index=True)
+    if futurs.empty: return futurs
+    return chargement.reconcilier_sources(futurs.reset_index(drop=True)).sort_values(['Date', 'LeagueCode']).reset_index(drop=True)
+
+# ==============================================================================
+# 3. TABLEAU DES AFFICHES (JOINTURES VECTORISÉES)
+# ==============================================================================
+
+def series_actives(df_res, stats=registre_stats.STATS_PRINCIPALES, serie_min=SERIE_MIN):
+    """Table longue des séries en cours (Équipe, Stat, EnCours, Record, Pct, Survie) d'au moins serie_min matchs."""
+    base = df_res.drop_duplicates('Équipe')
+    stats = [stat for stat in stats if f'{stat}_EnCours' in base.columns]
+    n = len(base)
+    longue = pd.DataFrame({
+        'Équipe': np.tile(base['Équipe'].to_numpy(dtype=object), len(stats)),
+        'Stat': np.repeat(stats, n),
+        **{suite: np.concatenate([base[f'{stat}_{suite}'].to_numpy(dtype=float) if f'{stat}_{suite}' in base.columns else np.full(n, np.nan)
+                                  for stat in stats]) if stats else []
+           for suite in ('EnCours', 'Record', 'Pct', 'Survie')}})
+    longue = longue[longue['EnCours'] >= serie_min].copy()
+    longue['AuRecord'] = longue['EnCours'] >= longue['Record']
+    return longue.reset_index(drop=True)
+
+def _premiere_cote(matchs, choix):
+    """{clé: [colonnes par préférence]} -> table (Match, Clé, Cote) de la première cote renseignée."""
+    colonnes = [c for cols in choix.values() for c in cols if c in matchs.columns]
+    if not colonnes: return pd.DataFrame(columns=['Match', 'Clé', 'Cote'])
+    cotes = matchs[['Match'] + colonnes].melt(id_vars='Match', var_name='Colonne', value_name='Cote').dropna(subset=['Cote'])
+    preferences = pd.DataFrame([(cle, col, rang) for cle, cols in choix.items() for rang, col in enumerate(cols)], columns=['Clé', 'Colonne', 'Rang'])
+    cotes = cotes.merge(preferences, on='Colonne').sort_values(['Match', 'Clé', 'Rang'])
+    return cotes.drop_duplicates(['Match', 'Clé'])[['Match', 'Clé', 'Cote']]
+
+def croiser(matchs, series):
+    """
+    Paires de séries (domicile, extérieur) de chaque match ayant une relation : jointure des
+    séries des deux équipes sur le match, puis de la table des relations, puis des cotes de
+    l'événement. Une ligne par paire : Match, Stat_Dom, Stat_Ext, Relation, séries et cote.
+    """
+    dom = matchs[['Match', 'HomeTeam']].merge(series, left_on='HomeTeam', right_on='Équipe').drop(columns=['HomeTeam', 'Équipe'])
+    ext = matchs[['Match', 'AwayTeam']].merge(series, left_on='AwayTeam', right_on='Équipe').drop(columns=['AwayTeam', 'Équipe'])
+    paires = dom.merge(ext, on='Match', suffixes=('_Dom', '_Ext')).merge(relations(), on=['Stat_Dom', 'Stat_Ext'])
+    cotes = _premiere_cote(matchs, COTES_STATS).rename(columns={'Clé': 'Stat_Dom', 'Cote': 'Cote_Dom'})
+    paires = paires.merge(cotes, on=['Match', 'Stat_Dom'], how='left')
+    return paires.merge(cotes.rename(columns={'Stat_Dom': 'Stat_Ext', 'Cote_Dom': 'Cote_Ext'}), on=['Match', 'Stat_Ext'], how='left')
+
+def _texte_series(longue, suffixe=''):
+    """'FT +2.5 5/7 (54%)🔥' (en cours / record, % historique ; 🔥 : série égale au record)."""
+    pct = longue[f'Pct{suffixe}'].round().astype('Int64').astype(str).replace('<NA>', '-')
+    return (longue[f'Stat{suffixe}'] + ' ' + longue[f'EnCours{suffixe}'].astype(int).astype(str)
+            + '/' + longue[f'Record{suffixe}'].fillna(0).astype(int).astype(str) + ' (' + pct + '%)'
+            + np.where(longue[f'AuRecord{suffixe}'], '🔥', ''))
+
+def _joindre(textes, cles, index):
+    """Textes regroupés par match (' · '), alignés sur index ('' sans ligne)."""
+    if textes.empty: return pd.Series('', index=index)
+    return textes.groupby(cles.to_numpy(), sort=False).agg(' · '.join).reindex(index).fillna('')
+
+def tableau_affiches(matchs, df_res, stats=registre_stats.STATS_PRINCIPALES, serie_min=SERIE_MIN, noms_ligues=None):
+    """
+    Une ligne par match à venir : séries actives des deux équipes, renforts et conflits entre
+    elles, cotes 1N2 et nombre de séries au record. Tout est calculé par jointures et
+    regroupements sur les tables longues (aucune boucle par équipe).
+    Signal : 'Renfort', 'Conflit', 'Mixte' (les deux) ou '' ; tri par signal puis date.
+    """
+    colonnes = ['Date', 'Ligue', 'Domicile', 'Extérieur', 'Cote 1', 'Cote N', 'Cote 2', 'Séries Dom', 'Séries Ext',
+                'Renforts', 'Conflits', 'Nb Renforts', 'Nb Conflits', 'Records', 'Signal']
+    if matchs is None or matchs.empty: return pd.DataFrame(columns=colonnes)
+    matchs = matchs.reset_index(drop=True)
+    matchs['Match'] = matchs.index
+    series = series_actives(df_res, stats, serie_min)
+    paires = croiser(matchs, series)
+
+    tableau = pd.DataFrame({'Date': matchs['Date'], 'Ligue': matchs['LeagueCode'].map(noms_ligues or {}).fillna(matchs['LeagueCode']),
+                            'Domicile': matchs['HomeTeam'], 'Extérieur': matchs['AwayTeam']}, index=matchs['Match'])
+    cotes = _premiere_cote(matchs, COTES_1N2).pivot(index='Match', columns='Clé', values='Cote')
+    for issue in COTES_1N2: tableau[f'Cote {issue}'] = cotes[issue].reindex(tableau.index) if issue in cotes.columns else np.nan
+
+    for lieu, equipe in (('Dom', 'HomeTeam'), ('Ext', 'AwayTeam')):
+        equipes = matchs[['Match', equipe]].merge(series, left_on=equipe, right_on='Équipe').sort_values(['Match', 'EnCours'], ascending=[True, False])
+        tableau[f'Séries {lieu}'] = _joindre(_texte_series(equipes), equipes['Match'], tableau.index)
+        tableau[f'Records {lieu}'] = equipes.groupby('Match')['AuRecord'].sum().reindex(tableau.index).fillna(0).astype(int)
+    tableau['Records'] = tableau.pop('Records Dom') + tableau.pop('Records Ext')
+
+    cote = lambda c: np.where(paires[c].notna(), ' @' + paires[c].round(2).astype(str), '')
+    textes = _texte_series(paires, '_Dom') + cote('Cote_Dom') + ' / ' + _texte_series(paires, '_Ext') + cote('Cote_Ext')
+    for relation, colonne in (('Renfort', 'Renforts'), ('Conflit', 'Conflits')):
+        choix = (paires['Relation'] == relation).to_numpy()
+        tableau[colonne] = _joindre(textes[choix], paires.loc[choix, 'Match'], tableau.index)
+        tableau[f'Nb {colonne}'] = paires.loc[choix].groupby('Match').size().reindex(tableau.index).fillna(0).astype(int)
+
+    renfort, conflit = tableau['Nb Renforts'] > 0, tableau['Nb Conflits'] > 0
+    tableau['Signal'] = np.select([renfort & conflit, renfort, conflit], ['Mixte', 'Renfort', 'Conflit'], default='')
+    ordre_signal = tableau['Signal'].map({'Renfort': 0, 'Mixte': 1, 'Conflit': 2, '': 3})
+    tableau = tableau.assign(_ordre=ordre_signal).sort_values(['_ordre', 'Nb Renforts', 'Records', 'Date'], ascending=[True, False, False, True])
+    return tableau.drop(columns='_ordre').reset_index(drop=True)[colonnes]
+
+# ==============================================================================
+# 4. SORTIES (HTML, DISCORD)
+# ==============================================================================
+
+def generer_html(tableau, classes="styled-table affiches-table filterable-table"):
+    """Tableau HTML des affiches (Ligue en première colonne pour le filtre par ligue des rapports)."""
+    if tableau.empty: return "<h3 class='no-alerts'>Aucun match à venir.</h3>"
+    affiche = tableau.drop(columns=['Nb Renforts', 'Nb Conflits']).copy()
+    affiche['Date'] = affiche['Date'].dt.strftime('%d/%m %H:%M').str.replace(' 00:00', '', regex=False)
+    couleurs = {'Renfort': 'background-color: #e8f5e9;', 'Conflit': 'background-color: #fff3e0;', 'Mixte': 'background-color: #f3e5f5;'}
+    colonnes = ['Ligue', 'Date', 'Domicile', 'Extérieur', 'Cote 1', 'Cote N', 'Cote 2', 'Séries Dom', 'Séries Ext', 'Renforts', 'Conflits', 'Records', 'Signal']
+    return (affiche[colonnes].style.apply(lambda ligne: [couleurs.get(ligne['Signal'], '')] * len(ligne), axis=1)
+            .format({'Cote 1': '{:.2f}', 'Cote N': '{:.2f}', 'Cote 2': '{:.2f}'}, na_rep='-')
+            .set_table_attributes(f'class="{classes}"').hide(axis="index").to_html())
+
+def formater_discord(tableau, n=TOP_DISCORD):
+    """Message Discord des matchs avec renfort (puis conflits) : un match par ligne."""
+    signales = tableau[tableau['Signal'] != ''].head(n)
+    if signales.empty: return ""
+    lignes = (signales['Date'].dt.strftime('%d/%m') + ' **' + signales['Domicile'] + ' - ' + signales['Extérieur'] + '** (' + signales['Ligue'] + ') '
+              + np.where(signales['Nb Renforts'] > 0, '✅ ' + signales['Renforts'], '')
+              + np.where(signales['Nb Conflits'] > 0, ' ⚔️ ' + signales['Conflits'], ''))
+    message = f"📅 **{(tableau['Signal'] != '').sum()} affiches avec séries croisées**\n" + "\n".join(lignes)
+    restants = (tableau['Signal'] != '').sum() - len(signales)
+    return message + (f"\n... +{restants} autres" if restants > 0 else "")
+
+if __name__ == "__main__":
+    import bits_series
+    parser = argparse.ArgumentParser(description="Matchs à venir croisés avec les séries en cours des deux équipes.")
+    parser.add_argument('--jours', type=int, default=HORIZON_JOURS)
+    parser.add_argument('--depuis', default=None, help="Date de départ (défaut : aujourd'hui), ex: 2025-11-20.")
+    parser.add_argument('--serie-min', type=int, default=SERIE_MIN)
+    parser.add_argument('--relations', action='store_true', help="Affiche la table des relations entre stats.")
+    args = parser.parse_args()
+
+    if args.relations:
+        print(relations().pivot(index='Stat_Dom', columns='Stat_Ext', values='Relation').fillna('').loc[registre_stats.STATS_PRINCIPALES, registre_stats.STATS_PRINCIPALES].to_string())
+    colonnes = ['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'HTHG', 'HTAG', 'FTR', 'Div'] + COLONNES_COTES
+    df_brut = chargement.charger_historique(colonnes=colonnes)
+    df = chargement.filtrer_historique(df_brut, ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'HTHG', 'HTAG', 'FTR'])
+    resumes = bits_series.resumer(bits_series.empaqueter(registre_stats.preparer_table(df.sort_values('Date', kind='stable'))))
+    tableau = tableau_affiches(prochains_matchs(df_brut, jours=args.jours, maintenant=args.depuis), resumes.reset_index(), serie_min=args.serie_min)
+    with pd.option_context('display.max_colwidth', 80, 'display.width', 250):
+        print(tableau[tableau['Signal'] != ''].drop(columns=['Nb Renforts', 'Nb Conflits']).to_string(index=False))
@@ -0,0 +1,191 @@
+import pandas as pd
+import numpy as np
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+import contextlib
+import io
+
+import chargement
+import donnees_synthetiques
+import Script_complet
+import Script_ensemble
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+DOSSIER_RESULTATS = "resultats_benchmark"
+SEUIL_REGRESSION = 1.10 # +10 % de temps médian = régression signalée
+
+# ==============================================================================
+# 1. OUTILS
+# ==============================================================================
+
+def commit_actuel():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or "inconnu"
+    except Exception:
+        return "inconnu"
+
+def chronometrer(fonction, repetitions, silencieux=True, avant=None):
+    """Exécute fonction() repetitions fois ; renvoie (durées, dernier résultat). avant() : hors chrono, avant chaque répétition."""
+    durees = []
+    resultat = None
+    for _ in range(repetitions):
+        if avant is not None: avant()
+        sortie = io.StringIO() if silencieux else None
+        with contextlib.redirect_stdout(sortie) if silencieux else contextlib.nullcontext():
+            t0 = time.perf_counter()
+            resultat = fonction()
+            durees.append(time.perf_counter() - t0)
+    return durees, resultat
+
+def resumer(durees):
+    return {'min': min(durees), 'mediane': statistics.median(durees), 'max': max(durees), 'repetitions': durees}
+
+# ==============================================================================
+# 2. ÉTAPES MESURÉES
+# ==============================================================================
+
+def executer_benchmark(dossier_csv, repetitions=3, avec_ia=True):
+    """Chronomètre les étapes principales sur un dossier au format CSV_Data."""
+    mesures = {}
+    fichiers = chargement.lister_fichiers_csv(dossier_csv)
+    dossier_tmp = tempfile.mkdtemp(prefix="statsmax_bench_")
+
+    def mesurer(nom, fonction, avant=None):
+        durees, resultat = chronometrer(fonction, repetitions, avant=avant)
+        mesures[nom] = resumer(durees)
+        print(f"  {nom:<42} médiane {mesures[nom]['mediane']:8.3f} s")
+        return resultat
+
+    try:
+        # --- Chargement CSV ---
+        df_brut = mesurer('chargement.charger_historique', lambda: chargement.charger_historique(dossier_csv, fichiers))
+        mesurer('chargement.charger_historique[projection]',
+                lambda: chargement.charger_historique(dossier_csv, fichiers, Script_complet.COLONNES_REQUISES))
+        df_hist, df_futur = mesurer('complet.charger_tout_depuis_csv', lambda: Script_complet.charger_tout_depuis_csv(fichiers))
+        df_global = mesurer('ensemble.charger_donnees_robuste', lambda: Script_ensemble.charger_donnees_robuste(fichiers))
+
+        # --- Séries : cache des bitsets dans le dossier temporaire (le ./cache_bits réel n'est pas touché),
+        # vidé avant chaque répétition à froid, gardé pour la mesure [cache] ---
+        ligues = chargement.equipes_par_fichier(df_brut)
+        cache_bits = os.path.join(dossier_tmp, "cache_bits")
+        vider_cache = lambda: shutil.rmtree(cache_bits, ignore_errors=True)
+        analyse_complet = lambda: Script_complet.analyser_donnees(df_hist, ligues, df_futur, pd.DataFrame(), cache_bits)
+        analyse_ensemble = lambda: Script_ensemble.calculer_stats_globales(df_global, ligues, {}, cache_bits)
+        df_res_complet = mesurer('complet.analyser_donnees', analyse_complet, avant=vider_cache)
+        mesurer('complet.analyser_donnees[cache]', analyse_complet)
+        df_res_ensemble = mesurer('ensemble.calculer_stats_globales', analyse_ensemble, avant=vider_cache)
+        mesurer('ensemble.calculer_stats_globales[cache]', analyse_ensemble)
+
+        # --- Cache ---
+        cache = os.path.join(dossier_tmp, "cache.csv")
+        df_ancien = df_res_complet.copy()
+        cols_encours = [c for c in df_ancien.columns if c.endswith('_EnCours')]
+        df_ancien[cols_encours] = df_ancien[cols_encours] + 1
+        df_ancien.to_csv(cache, index=False)
+        mesurer('complet.comparer_cache', lambda: Script_complet.comparer_cache(df_res_complet, cache))
+        df_cache = pd.read_csv(cache)
+        df_bris, cb, ca = mesurer('ensemble.analyser_cache_series',
+                                  lambda: Script_ensemble.analyser_cache_series(df_res_ensemble, df_cache))
+
+        # --- HTML ---
+        df_bris_complet = Script_complet.comparer_cache(df_res_complet, cache)
+        mesurer('complet.generer_html',
+                lambda: Script_complet.generer_html(df_res_complet, df_bris_complet, os.path.join(dossier_tmp, "index.html")))
+        try:
+            import jinja2  # noqa: F401 (requis par DataFrame.style)
+            df_over = Script_ensemble.calculer_stats_over15_historique(df_global.copy())
+            mesurer('ensemble.sauvegarder_rapport_global_html',
+                    lambda: Script_ensemble.sauvegarder_rapport_global_html(df_res_ensemble, df_bris, cb, ca, pd.DataFrame(),
+                                                                            df_over, os.path.join(dossier_tmp, "Ft.html"), "Bench", {}))
+        except ImportError:
+            print("  (jinja2 absent : rapport ensemble non mesuré)")
+
+        # --- IA : features sur une seule ligue (algorithme quadratique) ---
+        if avec_ia:
+            try:
+                import IA
+                predicteur = IA.AdvancedFootballPredictor()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    df_ia = predicteur.load_data(fichiers[-1])
+                mesurer('IA.create_features', lambda: predicteur.create_features(df_ia))
+            except ImportError as e:
+                print(f"  (IA non mesurée : {e})")
+    finally:
+        shutil.rmtree(dossier_tmp, ignore_errors=True)
+    return mesures
+
+# ==============================================================================
+# 3. SAUVEGARDE / COMPARAISON
+# ==============================================================================
+
+def sauvegarder_resultats(mesures, parametres, dossier=DOSSIER_RESULTATS):
+    os.makedirs(dossier, exist_ok=True)
+    commit = commit_actuel()
+    horodatage = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    rapport = {
+        'commit': commit, 'date': horodatage, 'python': platform.python_version(),
+        'pandas': pd.__version__, 'numpy': np.__version__, 'machine': platform.machine(),
+        'parametres': parametres, 'etapes': mesures
+    }
+    chemin = os.path.join(dossier, f"bench_{horodatage}_{commit}.json")
+    with open(chemin, 'w', encoding='utf-8') as f:
+        json.dump(rapport, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Résultats : {os.path.abspath(chemin)}")
+    return chemin
+
+def comparer_resultats(fichier_reference, mesures, parametres=None):
+    """Affiche le ratio (médiane actuelle / médiane de référence) pour chaque étape commune."""
+    with open(fichier_reference, encoding='utf-8') as f:
+        reference = json.load(f)
+    print(f"\n📊 Comparaison avec {reference.get('commit', '?')} ({reference.get('date', '?')})")
+    if parametres is not None and reference.get('parametres') != parametres:
+        print("  ⚠️ Paramètres du jeu de données différents : comparaison indicative.")
+    regressions = 0
+    for nom, m in mesures.items():
+        if nom not in reference['etapes']: continue
+        avant = reference['etapes'][nom]['mediane']
+        ratio = m['mediane'] / avant if avant else float('inf')
+        etat = "🔴 RÉGRESSION" if ratio > SEUIL_REGRESSION else "🟢" if ratio < 1 / SEUIL_REGRESSION else "⚪"
+        if ratio > SEUIL_REGRESSION: regressions += 1
+        print(f"  {nom:<42} {avant:8.3f} s -> {m['mediane']:8.3f} s  x{ratio:5.2f} {etat}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark reproductible des étapes StatsMax.")
+    parser.add_argument('--ligues', type=int, default=4)
+    parser.add_argument('--saisons', type=int, default=3)
+    parser.add_argument('--equipes', type=int, default=20)
+    parser.add_argument('--graine', type=int, default=42)
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--dossier', default=None, help="Mesurer un vrai dossier (ex: CSV_Data) au lieu du jeu synthétique.")
+    parser.add_argument('--sans-ia', action='store_true', help="Ne pas mesurer IA.create_features.")
+    parser.add_argument('--comparer', default=None, help="Fichier JSON de référence à comparer.")
+    args = parser.parse_args()
+
+    parametres = {'dossier': args.dossier}
+    dossier_synth = None
+    if args.dossier is None:
+        parametres.update({'ligues': args.ligues, 'saisons': args.saisons, 'equipes': args.equipes, 'graine': args.graine})
+        dossier_synth = tempfile.mkdtemp(prefix="statsmax_synth_")
+        donnees_synthetiques.generer_dataset(dossier_synth, args.ligues, args.saisons, args.equipes, args.graine)
+
+    print("⏱️ Mesures en cours...")
+    try:
+        mesures = executer_benchmark(args.dossier or dossier_synth, args.repetitions, not args.sans_ia)
+    finally:
+        if dossier_synth: shutil.rmtree(dossier_synth, ignore_errors=True)
+
+    sauvegarder_resultats(mesures, parametres)
+    if args.comparer:
+        comparer_resultats(args.comparer, mesures, parametres)
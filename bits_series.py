@@ -0,0 +1,201 @@
+import pandas as pd
+import numpy as np
+import argparse
+import glob
+import hashlib
+import os
+
+import registre_stats
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+DOSSIER_CACHE_BITS = "cache_bits"  # un fichier .npz par historique (signature dans le nom)
+CACHE_MAX_FICHIERS = 8             # au-delà, les plus anciens sont supprimés
+BITS_MOT = 64
+
+# ==============================================================================
+# 1. EMPAQUETAGE (UN BITSET PAR ÉQUIPE ET PAR STAT)
+# ==============================================================================
+# L'historique d'une équipe occupe des mots uint64 consécutifs : le bit k du mot j est son
+# (64 * j + k)-ième match (ordre chronologique), les bits au-delà du dernier match sont nuls.
+# 1 bit par match et par stat au lieu d'un octet pour une colonne booléenne : 8 fois moins.
+
+def empaqueter(longue, stats=registre_stats.STATS_PRINCIPALES):
+    """
+    Bitsets de la table longue masquée (registre_stats.preparer_table) :
+    {'equipes', 'longueurs', 'offsets' (premier mot de chaque équipe), 'stats',
+     'mots' (stats x mots, uint64), 'annees' (année de chaque match, ordre des bits)}.
+    """
+    codes, equipes = pd.factorize(longue['Équipe'].astype(object))
+    ordre = np.lexsort((longue['Date'].to_numpy(), codes))
+    codes = codes[ordre]
+    masque = longue[registre_stats.COLONNE_MASQUE].to_numpy()[ordre]
+    annees = pd.DatetimeIndex(longue['Date'].to_numpy()[ordre]).year.to_numpy()
+
+    longueurs = np.bincount(codes, minlength=len(equipes))
+    offsets = np.r_[0, np.cumsum((longueurs + BITS_MOT - 1) // BITS_MOT)]
+    debuts = np.r_[0, np.cumsum(longueurs)[:-1]]
+    positions = offsets[codes] * BITS_MOT + np.arange(len(codes)) - debuts[codes]
+
+    noms = list(registre_stats.STATS)
+    mots = np.zeros((len(stats), offsets[-1]), dtype=np.uint64)
+    bits = np.zeros(offsets[-1] * BITS_MOT, dtype=bool)
+    for i, stat in enumerate(stats):
+        bits[positions] = ((masque >> masque.dtype.type(noms.index(stat))) & 1) == 1
+        mots[i] = np.packbits(bits, bitorder='little').view('<u8')
+    return {'equipes': pd.Index(equipes), 'longueurs': longueurs, 'offsets': offsets, 'stats': list(stats),
+            'mots': mots, 'annees': np.where(np.isnan(annees), -1, annees).astype(np.int16)}
+
+# ==============================================================================
+# 2. OPÉRATIONS BIT À BIT
+# ==============================================================================
+
+def _popcount_octets(mots):
+    """Repli numpy < 2 : bits de chaque mot de 64 bits dépliés octet par octet puis comptés."""
+    octets = mots.view(np.uint8).reshape(mots.shape + (8,))
+    return np.unpackbits(octets, axis=-1).sum(axis=-1, dtype=np.int64)
+
+def _popcount(mots):
+    if hasattr(np, 'bitwise_count'): return np.bitwise_count(mots)
+    return _popcount_octets(mots)
+
+def verifier_popcount(graine=0):
+    """Le repli octet par octet donne les mêmes comptes que np.bitwise_count (formes 1D et 2D)."""
+    if not hasattr(np, 'bitwise_count'): return None
+    rng = np.random.default_rng(graine)
+    formes = [(1,), (7,), (3, 2), (4, 8), (5, 17)]
+    return all(np.array_equal(_popcount_octets(m), np.bitwise_count(m).astype(np.int64))
+               for m in (rng.integers(0, np.iinfo(np.uint64).max, forme, dtype=np.uint64, endpoint=True) for forme in formes))
+
+def _bit_fort(mots):
+    """Position du bit de poids fort de chaque mot (-1 si nul), exacte : moitiés de 32 bits en flottant."""
+    haut, bas = (mots >> np.uint64(32)).astype(np.float64), (mots & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(haut > 0, np.frexp(haut)[1] + 31, np.frexp(bas)[1] - 1)
+
+def _par_equipe(h, valeurs, ufunc):
+    return ufunc.reduceat(valeurs, h['offsets'][:-1], axis=-1)
+
+def _rang_des_mots(h):
+    """Pour chaque mot : index du mot dans l'historique de son équipe, et bits valides."""
+    n_mots = np.diff(h['offsets'])
+    equipe_du_mot = np.repeat(np.arange(len(n_mots)), n_mots)
+    rang = np.arange(h['offsets'][-1]) - h['offsets'][:-1][equipe_du_mot]
+    valides = np.clip(h['longueurs'][equipe_du_mot] - rang * BITS_MOT, 0, BITS_MOT).astype(np.uint64)
+    plein = np.uint64(0xFFFFFFFFFFFFFFFF)
+    masques = np.where(valides >= BITS_MOT, plein, (np.uint64(1) << np.minimum(valides, BITS_MOT - 1)) - np.uint64(1))
+    return rang, masques
+
+def _dernier_bit(h, mots, rang):
+    """Position (dans l'historique de l'équipe) du dernier bit à 1 de chaque équipe, -1 si aucun."""
+    fort = _bit_fort(mots)
+    return _par_equipe(h, np.where(fort >= 0, rang * BITS_MOT + fort, -1), np.maximum).astype(np.int64)
+
+def pourcentages(h):
+    """% de réussite (stats x équipes) : popcount / nombre de matchs."""
+    return _par_equipe(h, _popcount(h['mots']).astype(np.int64), np.add) / h['longueurs'] * 100
+
+def series_en_cours(h):
+    """Série en cours (stats x équipes) : matchs depuis le dernier échec."""
+    rang, masques = _rang_des_mots(h)
+    dernier_echec = _dernier_bit(h, ~h['mots'] & masques, rang)
+    return h['longueurs'] - 1 - dernier_echec
+
+def records(h):
+    """
+    Plus longue série (stats x équipes) et position de la fin de sa dernière occurrence :
+    x &= x << 1 (avec retenue entre mots) efface à chaque tour le 1er bit de chaque série,
+    le record est le nombre de tours avant que le bitset de l'équipe devienne nul.
+    """
+    rang, _ = _rang_des_mots(h)
+    premier = rang == 0
+    x = h['mots'].copy()
+    record = np.zeros(x.shape[:1] + (len(h['longueurs']),), dtype=np.int64)
+    fin = np.full(record.shape, -1)
+    vivant = _par_equipe(h, x != 0, np.logical_or)
+    while vivant.any():
+        precedent = np.concatenate([np.zeros(x.shape[:1] + (1,), dtype=np.uint64), x[:, :-1]], axis=1)
+        suivant = x & ((x << np.uint64(1)) | np.where(premier, np.uint64(0), precedent >> np.uint64(BITS_MOT - 1)))
+        record += vivant
+        encore = _par_equipe(h, suivant != 0, np.logical_or)
+        termine = vivant & ~encore
+        if termine.any():
+            fin = np.where(termine, _dernier_bit(h, x, rang), fin)
+        x, vivant = suivant, encore
+    return record, fin
+
+def resumer(h):
+    """{stat}_Record, _Annee_Record, _EnCours, _Pct de chaque équipe (index Équipe), comme les rapports."""
+    record, fin = records(h)
+    encours, pct = series_en_cours(h), pourcentages(h)
+    debuts = np.r_[0, np.cumsum(h['longueurs'])[:-1]]
+    colonnes = {}
+    for i, stat in enumerate(h['stats']):
+        annee = h['annees'][debuts + np.maximum(fin[i], 0)].astype(object) if len(debuts) else np.zeros(0, dtype=object)
+        colonnes[f'{stat}_Record'] = record[i]
+        colonnes[f'{stat}_Annee_Record'] = np.where((fin[i] >= 0) & (annee != -1), annee, "N/A")
+        colonnes[f'{stat}_EnCours'] = encours[i]
+        colonnes[f'{stat}_Pct'] = pct[i]
+    return pd.DataFrame(colonnes, index=h['equipes'].rename('Équipe'))
+
+# ==============================================================================
+# 3. CACHE ENTRE LES EXÉCUTIONS
+# ==============================================================================
+
+def signature(longue, stats):
+    """Empreinte de l'historique (équipes, dates, masques) et de la liste des stats."""
+    cols = longue[['Équipe', 'Date', registre_stats.COLONNE_MASQUE]].astype({'Équipe': object})
+    empreinte = int(pd.util.hash_pandas_object(cols, index=False).to_numpy().sum(dtype=np.uint64))
+    return f"{empreinte:016x}_{hashlib.md5('|'.join(stats).encode()).hexdigest()[:8]}"
+
+def _elaguer(dossier):
+    fichiers = sorted(glob.glob(os.path.join(dossier, "*.npz")), key=os.path.getmtime, reverse=True)
+    for f in fichiers[CACHE_MAX_FICHIERS:]:
+        try: os.remove(f)
+        except OSError: pass
+
+def charger_ou_empaqueter(longue, stats=registre_stats.STATS_PRINCIPALES, dossier=DOSSIER_CACHE_BITS):
+    """
+    Bitsets de l'historique, relus du cache si le même historique a déjà été empaqueté.
+    Un fichier par signature : les processus parallèles (une table par lot de ligues)
+    ne se marchent pas dessus.
+    """
+    fichier = os.path.join(dossier, f"bits_{signature(longue, stats)}.npz")
+    if os.path.exists(fichier):
+        try:
+            with np.load(fichier) as z:
+                h = {cle: z[cle] for cle in ('longueurs', 'offsets', 'mots', 'annees')}
+                h['equipes'], h['stats'] = pd.Index(z['equipes'].tolist(), dtype=object), z['stats'].tolist()
+            if h['stats'] == list(stats): return h
+        except Exception as e:
+            print(f"⚠️ Cache des bitsets illisible ({e}) : reconstruction.")
+    h = empaqueter(longue, stats)
+    try:
+        os.makedirs(dossier, exist_ok=True)
+        temporaire = f"{fichier}.{os.getpid()}.tmp.npz"
+        np.savez(temporaire, equipes=h['equipes'].to_numpy(dtype=str), stats=np.array(h['stats']),
+                 **{cle: h[cle] for cle in ('longueurs', 'offsets', 'mots', 'annees')})
+        os.replace(temporaire, fichier)
+        _elaguer(dossier)
+    except OSError as e:
+        print(f"⚠️ Cache des bitsets non écrit ({e}).")
+    return h
+
+if __name__ == "__main__":
+    import time
+    import chargement
+    parser = argparse.ArgumentParser(description="Bitsets des séries : mémoire et durée face aux colonnes booléennes.")
+    parser.add_argument('--stat', choices=registre_stats.STATS_PRINCIPALES, default='FT +1.5')
+    args = parser.parse_args()
+
+    verifie = verifier_popcount()
+    print("popcount : np.bitwise_count absent, repli octet par octet" if verifie is None else f"{'✅' if verifie else '❌'} popcount : repli octet par octet identique à np.bitwise_count")
+    colonnes = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'HTHG', 'HTAG', 'FTR']
+    df = chargement.filtrer_historique(chargement.charger_historique(colonnes=colonnes), colonnes)
+    longue = registre_stats.preparer_table(df)
+    debut = time.perf_counter()
+    h = empaqueter(longue)
+    resume = resumer(h)
+    print(f"⏱️ Empaquetage + résumé : {time.perf_counter() - debut:.3f} s")
+    print(f"💾 Bitsets : {h['mots'].nbytes / 1e6:.2f} Mo | colonnes booléennes : {len(longue) * len(h['stats']) / 1e6:.2f} Mo")
+    print(resume[[c for c in resume.columns if c.startswith(f"{args.stat}_")]].sort_values(f"{args.stat}_Record", ascending=False).head(20).to_string())
@@ -0,0 +1,521 @@
+import pandas as pd
+import numpy as np
+import glob
+import hashlib
+import importlib.util
+import os
+import warnings
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+DOSSIER_PRINCIPAL_DATA = "CSV_Data"
+SAISON_ACTUELLE_DOSSIER = "data2025"
+
+# Toutes les variantes de noms de colonnes rencontrées dans les scripts
+MAPPING_COLONNES = {
+    'Home': 'HomeTeam', 'Home Team': 'HomeTeam', 'Team1': 'HomeTeam',
+    'Away': 'AwayTeam', 'Away Team': 'AwayTeam', 'Team2': 'AwayTeam',
+    'Match Date': 'Date', 'MatchDate': 'Date', 'DT': 'Date',
+    'HG': 'FTHG', 'HomeGoals': 'FTHG',
+    'AG': 'FTAG', 'AwayGoals': 'FTAG',
+    'Res': 'FTR',
+    'B36CA': 'B365CA'
+}
+
+SOURCE_FOOTBALL_DATA = 'football-data'
+SOURCE_FIXTUREDOWNLOAD = 'fixturedownload'
+
+# Formats de dates des fichiers football-data (jj/mm/aaaa, jj/mm/aa) et fixturedownload (avec l'heure)
+FORMATS_DATES = ['%d/%m/%Y', '%d/%m/%y', '%d/%m/%Y %H:%M']
+
+# Colonnes toujours lues (une ligne sans date ni équipes est inexploitable)
+COLONNES_CLES = ['Date', 'HomeTeam', 'AwayTeam']
+# Colonnes brutes du format fixturedownload d'où sont tirés FTHG / FTAG / FTR
+COLONNES_RESULTAT_TEXTE = ['Result', 'Match Number']
+
+# Fichiers fixturedownload (préfixe du nom, avant '-AAAA-fuseau') -> code football-data de la même compétition
+LIGUES_FIXTUREDOWNLOAD = {
+    'epl': 'E0', 'championship': 'E1', 'bundesliga': 'D1', 'ligue-1': 'F1', 'serie-a': 'I1',
+    'la-liga': 'SP1', 'eredivisie': 'N1', 'primeira-liga': 'P1', 'super-lig': 'T1'
+}
+# Nom d'équipe -> nom canonique (celui de football-data, qui couvre tout l'historique).
+# Seuls les noms que la clé normalisée (accents, casse, FC / SC / 1846...) ne suffit pas à rapprocher.
+ALIAS_EQUIPES = {
+    # Bundesliga
+    'FC Bayern München': 'Bayern Munich', 'Borussia Dortmund': 'Dortmund', 'Bayer 04 Leverkusen': 'Leverkusen',
+    'Borussia Mönchengladbach': "M'gladbach", 'Eintracht Frankfurt': 'Ein Frankfurt', 'Hamburger SV': 'Hamburg',
+    'Sport-Club Freiburg': 'Freiburg',
+    # Championship
+    'Birmingham City': 'Birmingham', 'Blackburn Rovers': 'Blackburn', 'Charlton Athletic': 'Charlton',
+    'Coventry City': 'Coventry', 'Derby County': 'Derby', 'Hull City': 'Hull', 'Ipswich Town': 'Ipswich',
+    'Leicester City': 'Leicester', 'Norwich City': 'Norwich', 'Oxford United': 'Oxford',
+    'Preston North End': 'Preston', 'Queens Park Rangers': 'QPR', 'Sheffield Wednesday': 'Sheffield Weds',
+    'Stoke City': 'Stoke', 'Swansea City': 'Swansea', 'West Bromwich Albion': 'West Brom',
+    # Premier League
+    'Man Utd': 'Man United', 'Spurs': 'Tottenham',
+    # Eredivisie
+    'AZ': 'AZ Alkmaar', 'PSV': 'PSV Eindhoven', 'Excelsior Rotterdam': 'Excelsior', 'Fortuna Sittard': 'For Sittard',
+    'Heracles Almelo': 'Heracles', 'N.E.C. Nijmegen': 'Nijmegen', 'PEC Zwolle': 'Zwolle',
+    # La Liga
+    'Athletic Club': 'Ath Bilbao', 'Atlético de Madrid': 'Ath Madrid', 'Deportivo Alavés': 'Alaves',
+    'RCD Espanyol de Barcelona': 'Espanol', 'Real Betis': 'Betis', 'Real Oviedo': 'Oviedo',
+    'Real Sociedad': 'Sociedad', 'Rayo Vallecano': 'Vallecano',
+    # Ligue 1
+    'Havre Athletic Club': 'Le Havre', 'LOSC Lille': 'Lille', 'Olympique Lyonnais': 'Lyon',
+    'Olympique de Marseille': 'Marseille', 'Paris Saint-Germain': 'Paris SG', 'RC Strasbourg Alsace': 'Strasbourg',
+    'Stade Brestois 29': 'Brest', 'Stade Rennais FC': 'Rennes',
+    # Liga Portugal
+    'AFS': 'AVS', 'Estoril Praia': 'Estoril', 'Estrela Amadora': 'Estrela', 'SC Braga': 'Sp Braga',
+    'Sporting CP': 'Sp Lisbon', 'Vitória SC': 'Guimaraes',
+    # Serie A
+    'Hellas Verona': 'Verona',
+    # Süper Lig
+    'Fatih Karagümrük': 'Karagumruk', 'Göztepe': 'Goztep', 'Istanbul Basaksehir': 'Buyuksehyr',
+    'Çaykur Rizespor': 'Rizespor',
+}
+# Mots ignorés par la clé normalisée des noms d'équipes (formes juridiques, sigles de club)
+MOTS_IGNORES_EQUIPES = {'fc', 'cf', 'afc', 'sc', 'ac', 'as', 'aj', 'ca', 'cd', 'ud', 'rc', 'rcd', 'ogc', 'sco',
+                        'sl', 'sv', 'fsv', 'vfb', 'vfl', 'tsg', 'de'}
+# Sources par ordre de préférence quand un match est présent dans plusieurs fichiers (à résultat égal)
+PRIORITE_SOURCES = [SOURCE_FOOTBALL_DATA, SOURCE_FIXTUREDOWNLOAD]
+# Champs dont la source retenue est notée après fusion (colonnes Source_<champ>)
+CHAMPS_SOURCES = ['Date', 'FTHG', 'FTAG', 'FTR', 'HTHG', 'HTAG']
+
+# Classeurs XLSX : chaque feuille est convertie une fois au schéma des CSV, puis relue du cache
+# tant que le fichier ne change pas (empreinte de son contenu dans le nom du cache)
+XLSX_DISPONIBLE = importlib.util.find_spec('openpyxl') is not None # optionnel : sans lui, classeurs ignorés
+DOSSIER_CACHE_XLSX = "cache_xlsx"
+VERSION_CACHE_XLSX = 1 # à incrémenter si la conversion change (invalide les caches existants)
+ORIGINE_DATES_EXCEL = '1899-12-30' # dates Excel stockées en nombre de jours (cellules sans format date)
+
+# Sans dossier de saison : une reprise après une pause de plus de N jours ouvre une nouvelle
+# saison si elle tombe à un mois près du mois de reprise habituel de la ligue
+PAUSE_INTERSAISON_JOURS = 45
+
+# ==============================================================================
+# 1. LECTURE D'UN FICHIER
+# ==============================================================================
+
+def lister_fichiers_csv(dossier=DOSSIER_PRINCIPAL_DATA):
+    return sorted(glob.glob(f"{dossier}/**/*.csv", recursive=True))
+
+def variantes_colonnes(colonnes):
+    """
+    Noms bruts à lire pour obtenir les colonnes normalisées demandées : le nom lui-même,
+    ses alias de MAPPING_COLONNES (Home, HG, Res...) et 'Result' pour les scores fixturedownload.
+    """
+    voulues = set(COLONNES_CLES) | set(colonnes)
+    variantes = set(voulues) | {alias for alias, nom in MAPPING_COLONNES.items() if nom in voulues}
+    if voulues & {'FTHG', 'FTAG', 'FTR'}: variantes |= set(COLONNES_RESULTAT_TEXTE)
+    return variantes
+
+def lire_csv(fichier, colonnes=None):
+    """
+    Lit un CSV en UTF-8, puis en latin1 si besoin. Renvoie None si illisible.
+    colonnes : noms normalisés utiles au rapport ; seules leurs variantes sont parsées
+    (les blocs de cotes bookmakers ne sont alors jamais convertis).
+    """
+    usecols = None
+    if colonnes is not None:
+        variantes = variantes_colonnes(colonnes)
+        usecols = lambda c: c in variantes
+    try: return pd.read_csv(fichier, on_bad_lines='skip', usecols=usecols)
+    except:
+        try: return pd.read_csv(fichier, on_bad_lines='skip', encoding='latin1', usecols=usecols)
+        except: return None
+
+def ajouter_colonnes(df, colonnes):
+    """
+    Ajoute ou remplace plusieurs colonnes en une concaténation (ordre des colonnes conservé).
+    Les fichiers football-data ont plus de 100 colonnes, chacune dans son bloc : les insérer
+    une par une (df[col] = ...) fragmente le cadre et déclenche des PerformanceWarning.
+    """
+    nouvelles = pd.DataFrame(colonnes, index=df.index)
+    ordre = list(df.columns) + [c for c in nouvelles.columns if c not in df.columns]
+    return pd.concat([df.drop(columns=[c for c in nouvelles.columns if c in df.columns]), nouvelles], axis=1)[ordre]
+
+def normaliser_colonnes(df):
+    """Renomme les alias et convertit le format fixturedownload ('Result' = '1 - 3')."""
+    df = df.rename(columns=MAPPING_COLONNES)
+    source = SOURCE_FOOTBALL_DATA
+
+    if 'Result' in df.columns:
+        resultat = df['Result'].astype(str)
+        if resultat.str.contains(' - ', regex=False).any() or 'Match Number' in df.columns:
+            source = SOURCE_FIXTUREDOWNLOAD
+            scores = resultat.str.split(' - ', expand=True)
+            if len(scores.columns) == 2:
+                fthg = pd.to_numeric(scores[0].str.strip(), errors='coerce')
+                ftag = pd.to_numeric(scores[1].str.strip(), errors='coerce')
+            else:
+                fthg = ftag = pd.Series(np.nan, index=df.index)
+            ftr = pd.Series(np.select([fthg > ftag, fthg < ftag], ['H', 'A'], default='D'), index=df.index).where(fthg.notna())
+            df = ajouter_colonnes(df.drop(columns=['Result']), {'FTHG': fthg, 'FTAG': ftag, 'FTR': ftr})
+        elif 'FTR' not in df.columns:
+            df = df.rename(columns={'Result': 'FTR'})
+
+    return ajouter_colonnes(df, {'Source': source})
+
+def parser_dates(serie):
+    """Dates au format jour/mois, puis mois/jour si le premier essai échoue massivement."""
+    # Formats explicites d'abord : l'inférence pandas échoue sur les années à 2 chiffres
+    # et retombe sur dateutil, valeur par valeur (la moitié du temps de chargement).
+    renseignees = serie.notna().sum()
+    for format_date in FORMATS_DATES:
+        dates = pd.to_datetime(serie, format=format_date, errors='coerce')
+        if renseignees and dates.notna().sum() == renseignees: return dates
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        dates = pd.to_datetime(serie, dayfirst=True, errors='coerce')
+        if dates.isna().mean() > 0.8:
+            dates = pd.to_datetime(serie, dayfirst=False, errors='coerce')
+    return dates
+
+# ==============================================================================
+# 2. CHARGEMENT GLOBAL (UNE SEULE LECTURE POUR TOUS LES RAPPORTS)
+# ==============================================================================
+
+def charger_historique(dossier=DOSSIER_PRINCIPAL_DATA, fichiers=None, colonnes=None):
+    """
+    Lit une seule fois tous les CSV (et classeurs XLSX) de CSV_Data et renvoie un DataFrame brut normalisé.
+    Chaque ligne garde son origine (LeagueCode, Saison, Fichier, Source) pour que
+    chaque rapport puisse reconstruire sa propre vue sans relire les fichiers.
+    Les matchs futurs (sans score) et le fichier fixtures.csv sont conservés ; un match présent
+    dans plusieurs sources n'apparaît qu'une fois, sous ses noms canoniques (reconcilier_sources).
+    colonnes : projection (union des COLONNES_REQUISES des rapports) ; None = tout lire.
+    """
+    if fichiers is None: fichiers = lister_fichiers_csv(dossier) + lister_classeurs(dossier)
+    print(f"📂 Chargement partagé de {len(fichiers)} fichiers...")
+
+    frames = []
+    for f in fichiers:
+        if f.lower().endswith('.xlsx'):
+            frames.extend(lire_classeur(f, colonnes))
+            continue
+        df = lire_csv(f, colonnes)
+        if df is None or df.empty: continue
+        df = normaliser_colonnes(df)
+        if not all(c in df.columns for c in ['Date', 'HomeTeam', 'AwayTeam']): continue
+
+        frames.append(ajouter_colonnes(df, {'Date': parser_dates(df['Date']), 'LeagueCode': os.path.basename(f).replace('.csv', ''),
+                                            'Saison': os.path.basename(os.path.dirname(f)), 'Fichier': f}))
+
+    if not frames: return pd.DataFrame()
+
+    df_brut = pd.concat(frames, ignore_index=True, sort=False)
+    df_brut = df_brut.dropna(subset=['HomeTeam', 'AwayTeam'])
+    for col in ['FTHG', 'FTAG', 'HTHG', 'HTAG']:
+        if col in df_brut.columns:
+            df_brut[col] = pd.to_numeric(df_brut[col], errors='coerce')
+    print(f"✅ {len(df_brut)} lignes chargées ({df_brut['LeagueCode'].nunique()} fichiers de ligue).")
+    return reconcilier_sources(df_brut.reset_index(drop=True))
+
+# ==============================================================================
+# 3. VUES PAR RAPPORT
+# ==============================================================================
+
+def est_fichier_fixtures(df_brut):
+    return df_brut['LeagueCode'].str.lower() == 'fixtures'
+
+def filtrer_historique(df_brut, colonnes_requises, codes=None, saison=None):
+    """
+    Équivalent vectorisé de la boucle « lire chaque fichier de ligue, garder
+    colonnes_requises, dropna » des scripts : hors fixtures.csv et hors format
+    fixturedownload, éventuellement restreint à quelques codes / une saison.
+    """
+    if df_brut is None or df_brut.empty: return pd.DataFrame(columns=colonnes_requises)
+    if any(c not in df_brut.columns for c in colonnes_requises): return pd.DataFrame(columns=colonnes_requises)
+    mask = ~est_fichier_fixtures(df_brut) & (df_brut['Source'] == SOURCE_FOOTBALL_DATA)
+    if codes is not None: mask &= df_brut['LeagueCode'].isin(list(codes))
+    if saison is not None: mask &= df_brut['Saison'] == saison
+    return df_brut.loc[mask, list(colonnes_requises) + ['LeagueCode']].dropna(subset=colonnes_requises).copy()
+
+def equipes_par_fichier(df_brut, codes=None, saison=None):
+    """
+    {LeagueCode: [équipes triées]} tel que construit par la pré-lecture des scripts :
+    quand un code existe dans plusieurs saisons, c'est la saison la plus récente qui donne
+    la liste des équipes (tous ses fichiers, une fois les sources réconciliées).
+    """
+    if df_brut is None or df_brut.empty: return {}
+    d = df_brut
+    if codes is not None: d = d[d['LeagueCode'].isin(list(codes))]
+    if saison is not None: d = d[d['Saison'] == saison]
+    ligues = {}
+    for code, groupe in d.groupby('LeagueCode', sort=False):
+        groupe = groupe[groupe['Saison'] == groupe['Saison'].max()]
+        teams = sorted(set(groupe['HomeTeam'].dropna()) | set(groupe['AwayTeam'].dropna()))
+        if teams: ligues[code] = teams
+    return ligues
+
+def equipes_saison(df_brut, saison=SAISON_ACTUELLE_DOSSIER, codes=None):
+    """Liste des équipes présentes dans les fichiers d'une saison (équipes « actives »)."""
+    if df_brut is None or df_brut.empty: return []
+    mask = df_brut['Saison'] == saison
+    if codes is not None: mask &= df_brut['LeagueCode'].isin(list(codes))
+    d = df_brut[mask]
+    return list(set(d['HomeTeam'].dropna()) | set(d['AwayTeam'].dropna()))
+
+def detecter_saisons(df, pause_jours=PAUSE_INTERSAISON_JOURS):
+    """
+    Saison de chaque match : le dossier de saison (colonne Saison) quand il est connu,
+    sinon déduite des dates de la ligue. Une reprise après une longue pause ouvre une saison
+    si elle tombe à un mois près du mois de reprise le plus fréquent de la ligue : trêves et
+    reprises exceptionnelles (juin 2020) restent dans leur saison.
+    Saisons détectées nommées saisonAAAA (année de leur premier match).
+    """
+    connue = df['Saison'].astype(object) if 'Saison' in df.columns else pd.Series(None, index=df.index, dtype=object)
+    if connue.notna().all(): return connue
+    ligue = df['LeagueCode'].astype(object).fillna('?') if 'LeagueCode' in df.columns else pd.Series('?', index=df.index)
+    ordre = pd.DataFrame({'ligue': ligue, 'date': df['Date']}).dropna(subset=['date']).sort_values(['ligue', 'date'], kind='stable')
+    ecart = ordre.groupby('ligue', sort=False)['date'].diff()
+    reprise = ecart > pd.Timedelta(days=pause_jours)
+    mois = ordre['date'].dt.month
+    mois_habituel = ordre['ligue'].map(mois[reprise].groupby(ordre['ligue'][reprise]).agg(lambda m: m.mode().min()))
+    distance = (mois - mois_habituel).abs()
+    proche = np.minimum(distance, 12 - distance) <= 1
+    debut = ecart.isna() | (reprise & (proche | mois_habituel.isna()))
+    annee = ordre['date'].where(debut).ffill().dt.year
+    detectee = ('saison' + annee.astype(str)).reindex(df.index)
+    return connue.fillna(detectee)
+
+# ==============================================================================
+# 4. SCHÉMA COMPACT EN MÉMOIRE
+# ==============================================================================
+# Colonnes conservées dans les tables de matchs des rapports (les ~100 colonnes bookmakers sont écartées)
+COLONNES_COMPACTES = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'HTHG', 'HTAG', 'FTR', 'HTR',
+                      'TotalGoals', 'TotalHTGoals', 'LeagueCode', 'Div', 'Saison']
+COLONNES_BUTS = ['FTHG', 'FTAG', 'HTHG', 'HTAG', 'TotalGoals', 'TotalHTGoals']
+COLONNES_CATEGORIES = ['LeagueCode', 'Div', 'FTR', 'HTR', 'Saison']
+
+def memoire_mo(df):
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+def type_equipes(*frames):
+    """Une seule liste de catégories pour HomeTeam et AwayTeam de toutes les tables (codes comparables)."""
+    noms = set()
+    for df in frames:
+        if df is None or df.empty: continue
+        noms |= set(df['HomeTeam'].dropna()) | set(df['AwayTeam'].dropna())
+    return pd.CategoricalDtype(sorted(noms))
+
+def compacter_matchs(df, dtype_equipes=None, garder=()):
+    """
+    Copie compacte d'une table de matchs : colonnes utiles seulement, équipes / ligues /
+    résultats en catégories, buts en int8. Les booléens des statistiques ne sont pas
+    stockés ici : registre_stats les évalue dans un masque sur la table longue.
+    """
+    colonnes = [c for c in COLONNES_COMPACTES + list(garder) if c in df.columns]
+    compact = df[colonnes].copy()
+    if dtype_equipes is None: dtype_equipes = type_equipes(df)
+    compact['HomeTeam'] = compact['HomeTeam'].astype(dtype_equipes)
+    compact['AwayTeam'] = compact['AwayTeam'].astype(dtype_equipes)
+    for col in COLONNES_CATEGORIES:
+        if col in compact.columns: compact[col] = compact[col].astype('category')
+    for col in COLONNES_BUTS:
+        if col not in compact.columns: continue
+        valeurs = pd.to_numeric(compact[col], errors='coerce')
+        # int8 si la colonne est complète (historique), float32 si des matchs futurs sont sans score
+        if valeurs.notna().all() and valeurs.between(-128, 127).all(): compact[col] = valeurs.astype(np.int8)
+        else: compact[col] = valeurs.astype(np.float32)
+    return compact
+
+def rapport_memoire(nom, df_avant, df_apres):
+    avant, apres = memoire_mo(df_avant), memoire_mo(df_apres)
+    print(f"🗜️ Mémoire {nom} : {avant:.1f} Mo -> {apres:.1f} Mo (x{avant / max(apres, 1e-9):.1f} plus léger, {len(df_apres)} lignes)")
+    return avant, apres
+
+# ==============================================================================
+# 5. RÉCONCILIATION DES SOURCES (NOMS CANONIQUES, MATCHS EN DOUBLE)
+# ==============================================================================
+
+def _par_valeur(serie, fonction):
+    """Applique fonction (Series -> Series alignée) aux seules valeurs distinctes de serie, puis diffuse le résultat par codes."""
+    codes, uniques = pd.factorize(serie.astype(object))
+    valeurs = np.append(np.asarray(fonction(pd.Series(uniques, dtype=object)), dtype=object), np.nan) # code -1 (NaN) -> NaN
+    return pd.Series(valeurs[codes], index=serie.index, dtype=object)
+
+def ligue_canonique(codes):
+    """Code football-data des fichiers fixturedownload (LIGUES_FIXTUREDOWNLOAD) ; les autres codes sont inchangés."""
+    return _par_valeur(codes, lambda u: u.str.replace(r'-\d{4}-[^-]+$', '', regex=True).map(LIGUES_FIXTUREDOWNLOAD).fillna(u))
+
+def cle_equipe(noms):
+    """Clé de rapprochement des noms : sans accents ni ponctuation, en minuscules, sans MOTS_IGNORES_EQUIPES ni nombres."""
+    simples = (noms.astype(str).str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+               .str.lower().str.replace(r'[^a-z0-9]+', ' ', regex=True))
+    return simples.str.split().map(lambda mots: ' '.join(m for m in mots if m not in MOTS_IGNORES_EQUIPES and not m.isdigit()))
+
+def _sources(df):
+    """Source de chaque ligne ; sans colonne Source (lecture propre à un script), déduite de 'Match Number'."""
+    if 'Source' in df.columns: return df['Source'].fillna(SOURCE_FOOTBALL_DATA)
+    if 'Match Number' in df.columns:
+        return pd.Series(np.where(df['Match Number'].notna(), SOURCE_FIXTUREDOWNLOAD, SOURCE_FOOTBALL_DATA), index=df.index)
+    return pd.Series(SOURCE_FOOTBALL_DATA, index=df.index)
+
+def table_equipes(df, ligues=None, sources=None):
+    """
+    Table des équipes canoniques : une ligne par (Ligue, Nom) rencontré, avec Canonique (nom
+    football-data), Id (entier commun à tous les noms d'une même équipe) et Methode :
+    'connu' (nom présent dans une ligne football-data), 'alias' (ALIAS_EQUIPES), 'cle' (même
+    clé normalisée qu'un seul nom connu de la ligue canonique) ou 'inconnu' (gardé tel quel).
+    """
+    if ligues is None: ligues = ligue_canonique(df['LeagueCode'])
+    if sources is None: sources = _sources(df)
+    connu = (sources == SOURCE_FOOTBALL_DATA).to_numpy()
+    noms = pd.DataFrame({'Ligue': np.concatenate([ligues.to_numpy(), ligues.to_numpy()]),
+                         'Nom': np.concatenate([df['HomeTeam'].to_numpy(dtype=object), df['AwayTeam'].to_numpy(dtype=object)])})
+    connus = pd.unique(noms['Nom'].to_numpy()[np.concatenate([connu, connu])])
+    noms = noms.drop_duplicates().reset_index(drop=True)
+    noms['Connu'] = noms['Nom'].isin(connus)
+    noms['Cle'] = cle_equipe(noms['Nom'])
+
+    noms['Propre'] = noms['Nom'].astype(str).str.strip() # 'Groningen ' (espace parasite) = 'Groningen'
+
+    # Clé -> nom connu, dans la ligue seulement ; une clé partagée par deux équipes connues n'est pas utilisée
+    references = noms[noms['Connu']].drop_duplicates(['Ligue', 'Cle', 'Propre']).drop_duplicates(['Ligue', 'Cle'], keep=False)
+    par_cle = noms[['Ligue', 'Cle']].merge(references[['Ligue', 'Cle', 'Propre']], on=['Ligue', 'Cle'], how='left')['Propre'].to_numpy()
+    alias = noms['Nom'].map(ALIAS_EQUIPES).to_numpy()
+    conditions = [noms['Connu'].to_numpy(), pd.notna(alias), pd.notna(par_cle)]
+    noms['Canonique'] = np.select(conditions, [noms['Propre'].to_numpy(), alias, par_cle], default=noms['Propre'].to_numpy())
+    noms['Methode'] = np.select(conditions, ['connu', 'alias', 'cle'], default='inconnu')
+    noms['Id'] = pd.Categorical(noms['Canonique']).codes
+    return noms.set_index(['Ligue', 'Nom'])[['Canonique', 'Id', 'Methode']]
+
+def cle_match(jours, ligues, domicile, exterieur):
+    """Clé hachée (uint64) d'un match : jour, ligue et équipes canoniques."""
+    return pd.util.hash_pandas_object(pd.DataFrame({'jour': jours, 'ligue': ligues, 'dom': domicile, 'ext': exterieur}), index=False).to_numpy()
+
+def reconcilier_sources(df):
+    """
+    Un match présent dans plusieurs sources (fichier football-data et calendrier fixturedownload
+    de la même ligue, ou deux fichiers football-data) devient une seule ligne :
+    - noms d'équipes et codes de ligue ramenés à leur forme canonique (table_equipes, calculée
+      sur les noms distincts puis diffusée à toutes les lignes) ;
+    - clé hachée (jour, ligue, domicile, extérieur) : l'heure de coup d'envoi est ignorée ;
+    - par clé, la ligne avec un résultat est préférée, puis la source la mieux classée dans
+      PRIORITE_SOURCES ; ses champs vides sont complétés par les autres lignes, et
+      Source_<champ> (CHAMPS_SOURCES) note d'où vient chaque valeur retenue.
+    Temps linéaire : hachage, tri stable d'un petit entier de priorité (tri par base) et
+    regroupement haché des seules lignes en double. Idempotent.
+    """
+    if df is None or df.empty or any(c not in df.columns for c in COLONNES_CLES): return df
+    sources = _sources(df)
+    ligues = ligue_canonique(df['LeagueCode']) if 'LeagueCode' in df.columns else pd.Series('', index=df.index, dtype=object)
+    table = table_equipes(df, ligues, sources)
+    canoniques = table['Canonique'].to_numpy()
+
+    nouvelles = {'Source': sources}
+    renommes = 0
+    for col in ['HomeTeam', 'AwayTeam']:
+        noms = canoniques[table.index.get_indexer(pd.MultiIndex.from_arrays([ligues, df[col]]))]
+        renommes += int((noms != df[col].to_numpy()).sum())
+        nouvelles[col] = noms
+    if 'LeagueCode' in df.columns: nouvelles['LeagueCode'] = ligues
+    for champ in CHAMPS_SOURCES:
+        if champ in df.columns and f'Source_{champ}' not in df.columns:
+            nouvelles[f'Source_{champ}'] = sources.where(df[champ].notna())
+    df = ajouter_colonnes(df, nouvelles)
+    inconnus = table[(table['Methode'] == 'inconnu')].index.get_level_values('Nom')
+    if len(inconnus) and (sources != SOURCE_FOOTBALL_DATA).any():
+        hors_fd = set(df.loc[(sources != SOURCE_FOOTBALL_DATA).to_numpy(), ['HomeTeam', 'AwayTeam']].stack())
+        inconnus = sorted(hors_fd & set(inconnus))
+        if inconnus: print(f"⚠️ {len(inconnus)} équipes sans équivalent football-data (noms gardés) : {', '.join(inconnus[:10])}")
+
+    cles = cle_match(df['Date'].dt.normalize(), ligues, df['HomeTeam'], df['AwayTeam'])
+    double = pd.Series(cles).duplicated(keep=False).to_numpy() & df['Date'].notna().to_numpy()
+    if not double.any():
+        if renommes: print(f"🔗 Réconciliation : {renommes} noms d'équipes ramenés au nom canonique.")
+        return df
+
+    positions = np.flatnonzero(double)
+    doubles = df.iloc[positions]
+    rang_source = doubles['Source'].map({s: i for i, s in enumerate(PRIORITE_SOURCES)}).fillna(len(PRIORITE_SOURCES)).to_numpy()
+    sans_resultat = doubles['FTHG'].isna().to_numpy() if 'FTHG' in doubles.columns else np.zeros(len(doubles), dtype=bool)
+    priorite = (sans_resultat * (len(PRIORITE_SOURCES) + 1) + rang_source).astype(np.int16)
+    ordre = np.argsort(priorite, kind='stable') # entiers 16 bits : numpy trie par base (radix), en temps linéaire
+    cles_doubles = cles[positions[ordre]]
+    fusion = doubles.iloc[ordre].groupby(cles_doubles, sort=False).first() # 1re valeur non vide de chaque champ
+    retenues = positions[ordre][~pd.Index(cles_doubles).duplicated()] # ligne prioritaire de chaque match, même ordre que fusion
+
+    garder = ~double
+    garder[retenues] = True
+    fusion.index = df.index[retenues]
+    resultat = df[garder].copy()
+    resultat.loc[fusion.index, fusion.columns] = fusion
+    print(f"🔗 Réconciliation : {len(positions) - len(fusion)} lignes en double fusionnées ({len(fusion)} matchs), "
+          f"{renommes} noms d'équipes ramenés au nom canonique.")
+    return resultat
+
+# ==============================================================================
+# 6. CLASSEURS XLSX (CONVERSION UNIQUE, CACHE PAR EMPREINTE)
+# ==============================================================================
+
+def lister_classeurs(dossier=DOSSIER_PRINCIPAL_DATA):
+    return sorted(glob.glob(f"{dossier}/**/*.xlsx", recursive=True))
+
+def empreinte_fichier(fichier, taille_bloc=1 << 20):
+    """SHA-1 du contenu du fichier (lu par blocs)."""
+    h = hashlib.sha1()
+    with open(fichier, 'rb') as f:
+        for bloc in iter(lambda: f.read(taille_bloc), b''): h.update(bloc)
+    return h.hexdigest()
+
+def _dates_classeur(serie):
+    """Dates d'une feuille : déjà converties par openpyxl, nombres de jours Excel, ou texte comme dans les CSV."""
+    if pd.api.types.is_datetime64_any_dtype(serie): return serie
+    if pd.api.types.is_numeric_dtype(serie): return pd.to_datetime(serie, unit='D', origin=ORIGINE_DATES_EXCEL, errors='coerce')
+    return parser_dates(serie)
+
+def convertir_classeur(fichier):
+    """
+    Toutes les feuilles d'un classeur au schéma de charger_historique (colonnes normalisées,
+    Date, LeagueCode, Saison, Fichier, Source). LeagueCode : colonne Div des feuilles
+    football-data (Latest_Results mélange les ligues), sinon nom de la feuille, ou du fichier
+    s'il n'a qu'une feuille ; fixtures.xlsx garde 'fixtures' comme fixtures.csv.
+    """
+    feuilles = pd.read_excel(fichier, sheet_name=None)
+    base = os.path.splitext(os.path.basename(fichier))[0]
+    frames = []
+    for nom, df in feuilles.items():
+        if df.empty: continue
+        df = normaliser_colonnes(df)
+        if not all(c in df.columns for c in COLONNES_CLES): continue
+        code = base if len(feuilles) == 1 else str(nom)
+        frames.append(ajouter_colonnes(df, {
+            'Date': _dates_classeur(df['Date']),
+            'LeagueCode': df['Div'].astype(object).fillna(code) if 'Div' in df.columns and base.lower() != 'fixtures' else code,
+            'Saison': os.path.basename(os.path.dirname(fichier)), 'Fichier': f"{fichier}:{nom}"}))
+    return frames
+
+def lire_classeur(fichier, colonnes=None, dossier_cache=DOSSIER_CACHE_XLSX):
+    """
+    Feuilles converties d'un classeur (liste de DataFrames), relues du cache si le fichier n'a
+    pas changé : seule la première lecture d'une version du classeur paie l'analyse XLSX.
+    colonnes : même projection que lire_csv, appliquée après le cache (qui garde tout).
+    Sans openpyxl, les classeurs sont ignorés.
+    """
+    if not XLSX_DISPONIBLE:
+        print(f"⚠️ openpyxl absent : {os.path.basename(fichier)} ignoré.")
+        return []
+    base = os.path.splitext(os.path.basename(fichier))[0]
+    cache = os.path.join(dossier_cache, f"{base}_{empreinte_fichier(fichier)[:16]}_v{VERSION_CACHE_XLSX}.pkl")
+    frames = None
+    if os.path.exists(cache):
+        try: frames = pd.read_pickle(cache)
+        except Exception as e: print(f"⚠️ Cache XLSX illisible ({e}) : reconversion de {os.path.basename(fichier)}.")
+    if frames is None:
+        try: frames = convertir_classeur(fichier)
+        except Exception as e:
+            print(f"⚠️ Classeur illisible {fichier} : {e}")
+            return []
+        try:
+            os.makedirs(dossier_cache, exist_ok=True)
+            for ancien in glob.glob(os.path.join(dossier_cache, f"{glob.escape(base)}_*.pkl")): os.remove(ancien) # versions précédentes
+            temporaire = f"{cache}.{os.getpid()}.tmp"
+            pd.to_pickle(frames, temporaire)
+            os.replace(temporaire, cache)
+        except OSError as e:
+            print(f"⚠️ Cache XLSX non écrit ({e}).")
+    if colonnes is None: return frames
+    voulues = set(COLONNES_CLES) | set(colonnes) | {'LeagueCode', 'Saison', 'Fichier', 'Source'}
+    return [df[[c for c in df.columns if c in voulues]] for df in frames]
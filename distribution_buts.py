@@ -0,0 +1,110 @@
+import pandas as pd
+import numpy as np
+import argparse
+
+import chargement
+import registre_stats
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+BUTS_MAX = 10 # dernier casier = BUTS_MAX buts ou plus
+LIGNES = [0.5, 1.5, 2.5, 3.5, 4.5, 5.5, 6.5]
+
+# Quantités comptées pour chaque match, du point de vue de l'équipe
+MESURES = ['total', 'marques', 'encaisses', 'mt', '2mt']
+LIEUX = ['dom', 'ext', 'tous']
+
+# ==============================================================================
+# 1. HISTOGRAMMES
+# ==============================================================================
+
+def _valeurs_mesures(longue):
+    """Matrice (len(MESURES), n) des buts par mesure, plafonnés à BUTS_MAX."""
+    bm, be = longue['BM'].to_numpy(), longue['BE'].to_numpy()
+    bm_mt, be_mt = longue['BM_MT'].to_numpy(), longue['BE_MT'].to_numpy()
+    total, total_mt = bm + be, bm_mt + be_mt
+    valeurs = np.vstack([total, bm, be, total_mt, np.maximum(total - total_mt, 0)])
+    return np.clip(valeurs, 0, BUTS_MAX).astype(np.int64)
+
+def fenetre(longue, derniers=None, saison=None):
+    """Restreint la table longue aux derniers matchs de chaque équipe et/ou à une saison."""
+    if saison is not None: longue = longue[longue['Saison'] == saison]
+    if derniers:
+        if 'Date' in longue.columns: longue = longue.sort_values('Date', kind='stable')
+        rang = longue.groupby('Équipe', sort=False, observed=True).cumcount(ascending=False)
+        longue = longue[rang < derniers]
+    return longue
+
+def calculer_distributions(longue, derniers=None, saison=None):
+    """
+    Histogrammes du nombre de buts par équipe, lieu et mesure, en un seul bincount
+    sur toute la table longue (registre_stats.table_longue). Les cumuls donnent
+    ensuite la fréquence de n'importe quelle ligne en O(1).
+    Renvoie {'equipes', 'histogrammes', 'cumuls'} ; histogrammes[mesure] est de forme
+    (équipes, LIEUX, BUTS_MAX + 1).
+    """
+    longue = fenetre(longue, derniers, saison)
+    codes, equipes = pd.factorize(longue['Équipe'].astype(object), sort=True)
+    lieu = np.where(longue['Domicile'].to_numpy(), 0, 1)
+    valeurs = _valeurs_mesures(longue)
+
+    n_equipes, n_casiers = len(equipes), BUTS_MAX + 1
+    mesure = np.repeat(np.arange(len(MESURES)), len(codes))
+    cles = ((mesure * n_equipes + np.tile(codes, len(MESURES))) * 2 + np.tile(lieu, len(MESURES))) * n_casiers + valeurs.ravel()
+    comptes = np.bincount(cles, minlength=len(MESURES) * n_equipes * 2 * n_casiers)
+    comptes = comptes.reshape(len(MESURES), n_equipes, 2, n_casiers)
+    comptes = np.concatenate([comptes, comptes.sum(axis=2, keepdims=True)], axis=2) # + 'tous'
+
+    histogrammes = {m: comptes[i] for i, m in enumerate(MESURES)}
+    return {
+        'equipes': pd.Index(equipes),
+        'histogrammes': histogrammes,
+        'cumuls': {m: h.cumsum(axis=2) for m, h in histogrammes.items()},
+    }
+
+# ==============================================================================
+# 2. FRÉQUENCES PAR LIGNE
+# ==============================================================================
+
+def _indice_ligne(ligne):
+    k = int(np.floor(ligne))
+    if ligne - k != 0.5 or not 0 <= k < BUTS_MAX: raise ValueError(f"Ligne invalide : {ligne} (0.5 à {BUTS_MAX - 0.5})")
+    return k
+
+def frequence(distrib, equipe, ligne, mesure='total', lieu='tous', sens='plus'):
+    """% de matchs de l'équipe au-dessus (sens='plus') ou en dessous de la ligne. None si aucun match."""
+    cumul = distrib['cumuls'][mesure][distrib['equipes'].get_loc(equipe), LIEUX.index(lieu)]
+    n = cumul[-1]
+    if n == 0: return None
+    sous = cumul[_indice_ligne(ligne)]
+    return (n - sous) / n * 100 if sens == 'plus' else sous / n * 100
+
+def tableau_lignes(distrib, mesure='total', lieu='tous', lignes=LIGNES, sens='plus'):
+    """Un DataFrame (une ligne par équipe) : Matchs, nombre et % au-dessus / en dessous de chaque ligne."""
+    cumul = distrib['cumuls'][mesure][:, LIEUX.index(lieu), :]
+    n = cumul[:, -1]
+    tableau = pd.DataFrame({'Matchs': n}, index=distrib['equipes'])
+    signe = '+' if sens == 'plus' else '-'
+    for ligne in lignes:
+        sous = cumul[:, _indice_ligne(ligne)]
+        compte = n - sous if sens == 'plus' else sous
+        tableau[f'{signe}{ligne}'] = compte
+        tableau[f'% {signe}{ligne}'] = np.where(n > 0, compte / np.maximum(n, 1) * 100, np.nan)
+    return tableau
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distribution des buts par équipe (toutes lignes 0.5 à 6.5).")
+    parser.add_argument('equipe', nargs='?', default=None)
+    parser.add_argument('--mesure', choices=MESURES, default='total')
+    parser.add_argument('--lieu', choices=LIEUX, default='tous')
+    parser.add_argument('--derniers', type=int, default=None, help="Seulement les N derniers matchs de chaque équipe.")
+    parser.add_argument('--saison', default=None, help="Seulement une saison (nom de dossier, ex: data2025).")
+    args = parser.parse_args()
+
+    df_brut = chargement.charger_historique(colonnes=['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'HTHG', 'HTAG'])
+    df = chargement.filtrer_historique(df_brut, ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG'], saison=args.saison)
+    df = df.join(df_brut[['HTHG', 'HTAG']]).sort_values('Date')
+    distrib = calculer_distributions(registre_stats.table_longue(df), args.derniers)
+    tableau = tableau_lignes(distrib, args.mesure, args.lieu)
+    print(tableau.loc[[args.equipe]] if args.equipe else tableau.sort_values('% +2.5', ascending=False).head(30))
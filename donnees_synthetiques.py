@@ -0,0 +1,143 @@
+import pandas as pd
+import numpy as np
+import os
+import argparse
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+# Colonnes d'un fichier football-data récent (CSV_Data/data2024/E0.csv)
+COLONNES_FOOTBALL_DATA = [
+    'Div', 'Date', 'Time', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR', 'HTHG', 'HTAG', 'HTR', 'Referee',
+    'HS', 'AS', 'HST', 'AST', 'HF', 'AF', 'HC', 'AC', 'HY', 'AY', 'HR', 'AR',
+    'B365H', 'B365D', 'B365A', 'BWH', 'BWD', 'BWA', 'BFH', 'BFD', 'BFA', 'PSH', 'PSD', 'PSA',
+    'WHH', 'WHD', 'WHA', '1XBH', '1XBD', '1XBA', 'MaxH', 'MaxD', 'MaxA', 'AvgH', 'AvgD', 'AvgA',
+    'BFEH', 'BFED', 'BFEA', 'B365>2.5', 'B365<2.5', 'P>2.5', 'P<2.5', 'Max>2.5', 'Max<2.5', 'Avg>2.5', 'Avg<2.5',
+    'BFE>2.5', 'BFE<2.5', 'AHh', 'B365AHH', 'B365AHA', 'PAHH', 'PAHA', 'MaxAHH', 'MaxAHA', 'AvgAHH', 'AvgAHA',
+    'BFEAHH', 'BFEAHA', 'B365CH', 'B365CD', 'B365CA', 'BWCH', 'BWCD', 'BWCA', 'BFCH', 'BFCD', 'BFCA',
+    'PSCH', 'PSCD', 'PSCA', 'WHCH', 'WHCD', 'WHCA', '1XBCH', '1XBCD', '1XBCA', 'MaxCH', 'MaxCD', 'MaxCA',
+    'AvgCH', 'AvgCD', 'AvgCA', 'BFECH', 'BFECD', 'BFECA', 'B365C>2.5', 'B365C<2.5', 'PC>2.5', 'PC<2.5',
+    'MaxC>2.5', 'MaxC<2.5', 'AvgC>2.5', 'AvgC<2.5', 'BFEC>2.5', 'BFEC<2.5', 'AHCh', 'B365CAHH', 'B365CAHA',
+    'PCAHH', 'PCAHA', 'MaxCAHH', 'MaxCAHA', 'AvgCAHH', 'AvgCAHA', 'BFECAHH', 'BFECAHA'
+]
+
+# Codes réels : les dictionnaires de noms de ligues des scripts s'appliquent tels quels
+CODES_LIGUES = ['E0', 'D1', 'F1', 'I1', 'SP1', 'N1', 'P1', 'B1', 'SC0', 'T1', 'G1',
+                'E1', 'D2', 'F2', 'I2', 'SP2', 'E2', 'E3', 'SC1', 'SC2', 'SC3', 'EC']
+
+SAISON_FINALE = 2025
+
+# ==============================================================================
+# 1. GÉNÉRATION D'UNE SAISON
+# ==============================================================================
+
+def _calendrier(n_equipes, rng):
+    """Aller-retour complet : liste de journées de paires (domicile, extérieur)."""
+    equipes = list(range(n_equipes))
+    if n_equipes % 2: equipes.append(None)
+    n = len(equipes)
+    journees = []
+    for j in range(n - 1):
+        paires = []
+        for i in range(n // 2):
+            a, b = equipes[i], equipes[n - 1 - i]
+            if a is not None and b is not None:
+                paires.append((a, b) if (j + i) % 2 == 0 else (b, a))
+        journees.append(paires)
+        equipes = [equipes[0]] + [equipes[-1]] + equipes[1:-1]
+    retour = [[(b, a) for a, b in paires] for paires in journees]
+    return journees + retour
+
+def _cotes(proba, rng, marge=1.06):
+    return np.round(np.clip(1 / (proba * marge) * rng.uniform(0.97, 1.03, size=proba.shape), 1.01, 41), 2)
+
+def generer_saison(code, annee, noms_equipes, rng, matchs_futurs=0):
+    """Une saison football-data synthétique (mêmes colonnes que E0.csv), buts tirés d'une loi de Poisson."""
+    forces = rng.normal(0, 0.3, size=len(noms_equipes))
+    lignes = []
+    debut = pd.Timestamp(year=annee, month=8, day=10)
+    for num_journee, paires in enumerate(_calendrier(len(noms_equipes), rng)):
+        date = debut + pd.Timedelta(days=7 * num_journee)
+        for dom, ext in paires:
+            lignes.append((date, dom, ext))
+
+    n = len(lignes)
+    dom = np.array([l[1] for l in lignes]); ext = np.array([l[2] for l in lignes])
+    lam_dom = np.exp(0.35 + forces[dom] - forces[ext])
+    lam_ext = np.exp(0.10 + forces[ext] - forces[dom])
+    fthg = rng.poisson(lam_dom); ftag = rng.poisson(lam_ext)
+    hthg = rng.binomial(fthg, 0.45); htag = rng.binomial(ftag, 0.45)
+
+    df = pd.DataFrame(index=range(n), columns=COLONNES_FOOTBALL_DATA)
+    df['Div'] = code
+    df['Date'] = [l[0].strftime('%d/%m/%Y') for l in lignes]
+    df['Time'] = rng.choice(['15:00', '17:30', '20:00', '20:45'], size=n)
+    df['HomeTeam'] = np.array(noms_equipes)[dom]
+    df['AwayTeam'] = np.array(noms_equipes)[ext]
+    df['FTHG'] = fthg; df['FTAG'] = ftag
+    df['FTR'] = np.select([fthg > ftag, fthg < ftag], ['H', 'A'], default='D')
+    df['HTHG'] = hthg; df['HTAG'] = htag
+    df['HTR'] = np.select([hthg > htag, hthg < htag], ['H', 'A'], default='D')
+    df['Referee'] = rng.choice(['A Taylor', 'M Oliver', 'S Hooper', 'R Jones'], size=n)
+    for col, lam in [('HS', 13), ('AS', 11), ('HST', 5), ('AST', 4), ('HF', 11), ('AF', 11),
+                     ('HC', 6), ('AC', 5), ('HY', 2), ('AY', 2), ('HR', 0.1), ('AR', 0.1)]:
+        df[col] = rng.poisson(lam, size=n)
+
+    # Cotes 1X2 / +-2.5 cohérentes avec les forces, déclinées pour chaque bookmaker
+    diff = forces[dom] - forces[ext] + 0.25
+    p_dom = 1 / (1 + np.exp(-1.6 * diff)) * 0.75
+    p_nul = np.full(n, 0.26)
+    p_ext = np.clip(1 - p_dom - p_nul, 0.05, None)
+    p_over = np.clip(1 - np.exp(-(lam_dom + lam_ext)) * (1 + (lam_dom + lam_ext) + (lam_dom + lam_ext) ** 2 / 2), 0.05, 0.95)
+    for col in COLONNES_FOOTBALL_DATA[24:]:
+        if col in ('AHh', 'AHCh'): df[col] = np.round(-diff * 2) / 4
+        elif col.endswith('>2.5'): df[col] = _cotes(p_over, rng)
+        elif col.endswith('<2.5'): df[col] = _cotes(1 - p_over, rng)
+        elif col.endswith('AHH'): df[col] = _cotes(np.full(n, 0.5), rng)
+        elif col.endswith('AHA'): df[col] = _cotes(np.full(n, 0.5), rng)
+        elif col.endswith('H'): df[col] = _cotes(p_dom, rng)
+        elif col.endswith('D'): df[col] = _cotes(p_nul, rng)
+        elif col.endswith('A'): df[col] = _cotes(p_ext, rng)
+
+    if matchs_futurs:
+        # Fin de saison pas encore jouée : lignes sans score, comme dans les fichiers en cours
+        df.loc[n - matchs_futurs:, ['FTHG', 'FTAG', 'FTR', 'HTHG', 'HTAG', 'HTR']] = np.nan
+    return df
+
+# ==============================================================================
+# 2. GÉNÉRATION D'UN DOSSIER COMPLET
+# ==============================================================================
+
+def generer_dataset(dossier, n_ligues=4, n_saisons=3, n_equipes=20, graine=42, matchs_futurs=10):
+    """
+    Écrit dossier/data20xx/<code>.csv pour n_ligues × n_saisons, avec la même arborescence
+    et les mêmes colonnes que CSV_Data. La graine rend le jeu de données reproductible.
+    Renvoie la liste des fichiers écrits.
+    """
+    if n_ligues > len(CODES_LIGUES): raise ValueError(f"Maximum {len(CODES_LIGUES)} ligues.")
+    rng = np.random.default_rng(graine)
+    fichiers = []
+    for code in CODES_LIGUES[:n_ligues]:
+        # Un réservoir d'équipes plus large que la ligue : montées / descentes d'une saison à l'autre
+        reservoir = [f"{code} Team {i:02d}" for i in range(int(n_equipes * 1.3))]
+        for annee in range(SAISON_FINALE - n_saisons + 1, SAISON_FINALE + 1):
+            noms = list(rng.choice(reservoir, size=n_equipes, replace=False))
+            futurs = matchs_futurs if annee == SAISON_FINALE else 0
+            df = generer_saison(code, annee, noms, rng, matchs_futurs=futurs)
+            dossier_saison = os.path.join(dossier, f"data{annee}")
+            os.makedirs(dossier_saison, exist_ok=True)
+            chemin = os.path.join(dossier_saison, f"{code}.csv")
+            df.to_csv(chemin, index=False)
+            fichiers.append(chemin)
+    print(f"🧪 Jeu synthétique : {len(fichiers)} fichiers ({n_ligues} ligues × {n_saisons} saisons × {n_equipes} équipes) dans {dossier}")
+    return fichiers
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génère un CSV_Data synthétique au format football-data.")
+    parser.add_argument('dossier')
+    parser.add_argument('--ligues', type=int, default=4)
+    parser.add_argument('--saisons', type=int, default=3)
+    parser.add_argument('--equipes', type=int, default=20)
+    parser.add_argument('--graine', type=int, default=42)
+    args = parser.parse_args()
+    generer_dataset(args.dossier, args.ligues, args.saisons, args.equipes, args.graine)
@@ -0,0 +1,158 @@
+import pandas as pd
+import numpy as np
+import argparse
+
+import chargement
+import registre_stats
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+FENETRE_RECENTE = 10 # colonne {stat}_Pct_Recent des rapports : les N derniers matchs
+DEMI_VIE_JOURS = 365 # taux pondérés : un match d'il y a un an compte moitié moins que celui d'hier
+DECALAGE_JOURS = 2 ** 31 # clé (équipe, jour) = code << 32 | jour + décalage, toujours positive
+
+# ==============================================================================
+# 1. INDEX DES CUMULS
+# ==============================================================================
+# Les lignes de la table longue sont triées par équipe puis date : les matchs d'une équipe
+# occupent une plage [debut, fin[ contiguë. cumuls[i, k] = réussites de la stat i sur les
+# k premières lignes, donc les réussites d'une fenêtre [a, b[ valent cumuls[i, b] - cumuls[i, a].
+
+def _jours(dates):
+    jours = pd.to_datetime(pd.Series(dates)).to_numpy().astype('datetime64[D]').astype(np.int64)
+    return np.where(pd.isna(dates), -DECALAGE_JOURS, jours) + DECALAGE_JOURS
+
+def construire_index(longue, stats=registre_stats.STATS_PRINCIPALES):
+    """
+    Index des cumuls de la table longue masquée (registre_stats.preparer_table) :
+    {'equipes', 'debuts', 'fins', 'debuts_saison', 'cles', 'stats', 'cumuls'}.
+    Les matchs sans date se placent en tête de leur équipe.
+    """
+    codes, equipes = pd.factorize(longue['Équipe'].astype(object))
+    dates = longue['Date'].to_numpy() if 'Date' in longue.columns else np.full(len(longue), np.datetime64('NaT'))
+    cles = (codes.astype(np.int64) << 32) | _jours(dates)
+    ordre = np.argsort(cles, kind='stable')
+    cles, codes = cles[ordre], codes[ordre]
+    masque = longue[registre_stats.COLONNE_MASQUE].to_numpy()[ordre]
+
+    bornes = np.searchsorted(codes, np.arange(len(equipes) + 1))
+    saisons = pd.factorize(chargement.detecter_saisons(longue).to_numpy()[ordre])[0]
+    nouvelle = np.r_[True, (saisons[1:] != saisons[:-1]) | (codes[1:] != codes[:-1])] if len(codes) else np.zeros(0, dtype=bool)
+    debuts_saison = np.zeros(len(equipes), dtype=np.int64)
+    np.maximum.at(debuts_saison, codes[nouvelle], np.flatnonzero(nouvelle))
+
+    noms = list(registre_stats.STATS)
+    cumuls = np.zeros((len(stats), len(codes) + 1), dtype=np.int32)
+    for i, stat in enumerate(stats):
+        np.cumsum(((masque >> masque.dtype.type(noms.index(stat))) & 1) == 1, out=cumuls[i, 1:])
+    return {'equipes': pd.Index(equipes), 'debuts': bornes[:-1], 'fins': bornes[1:], 'debuts_saison': debuts_saison,
+            'cles': cles, 'stats': list(stats), 'cumuls': cumuls}
+
+# ==============================================================================
+# 2. REQUÊTES EN O(1) (EN LOT)
+# ==============================================================================
+
+def _diffuser(valeur, n):
+    return None if valeur is None else np.broadcast_to(np.asarray(valeur), (n,))
+
+def plages(index, equipes, derniers=None, depuis=None, avant=None, saison_en_cours=False):
+    """
+    Plages [a, b[ de lignes de l'index pour chaque requête (une par équipe de la liste) :
+    matchs à partir de la date depuis (incluse), strictement avant la date avant, limités
+    aux derniers N matchs et/ou à la saison en cours. Chaque paramètre est un scalaire ou
+    un tableau de même longueur que equipes. Équipe inconnue : plage vide.
+    """
+    equipes = np.asarray(equipes, dtype=object)
+    n = len(equipes)
+    codes = index['equipes'].get_indexer(equipes)
+    connue = codes >= 0
+    codes = np.where(connue, codes, 0)
+    a = np.where(connue, index['debuts'][codes] if len(index['debuts']) else 0, 0)
+    b = np.where(connue, index['fins'][codes] if len(index['fins']) else 0, 0)
+    base = codes.astype(np.int64) << 32
+    if avant is not None:
+        b = np.minimum(b, np.searchsorted(index['cles'], base | _jours(_diffuser(avant, n)), side='left'))
+    if depuis is not None:
+        a = np.maximum(a, np.searchsorted(index['cles'], base | _jours(_diffuser(depuis, n)), side='left'))
+    if saison_en_cours:
+        a = np.maximum(a, index['debuts_saison'][codes] if len(index['debuts_saison']) else 0)
+    if derniers is not None:
+        a = np.maximum(a, b - _diffuser(derniers, n).astype(np.int64))
+    return a, np.maximum(a, b)
+
+def taux_fenetres(index, equipes, stats=None, **fenetre):
+    """
+    Taux de réussite de chaque stat sur une fenêtre de matchs par requête (voir plages) :
+    deux lectures et une soustraction par requête et par stat, quel que soit le nombre de
+    requêtes. Une ligne par requête : Équipe, Matchs, {stat}_Succes, {stat}_Pct (NaN sans match).
+    Ex. : taux_fenetres(index, df['HomeTeam'], avant=df['Date'], derniers=10) donne le taux
+    de chaque équipe sur ses 10 matchs précédant chaque match (variables de modèle sans fuite).
+    """
+    a, b = plages(index, equipes, **fenetre)
+    matchs = b - a
+    resultat = {'Équipe': np.asarray(equipes, dtype=object), 'Matchs': matchs}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for stat in stats or index['stats']:
+            cumul = index['cumuls'][index['stats'].index(stat)]
+            succes = cumul[b] - cumul[a]
+            resultat[f'{stat}_Succes'] = succes
+            resultat[f'{stat}_Pct'] = np.where(matchs > 0, succes / matchs * 100, np.nan)
+    return pd.DataFrame(resultat)
+
+def taux_recents(index, stats=None, derniers=FENETRE_RECENTE):
+    """{stat}_Pct_Recent de chaque équipe de l'index (ses N derniers matchs), index Équipe."""
+    stats = stats or index['stats']
+    taux = taux_fenetres(index, index['equipes'], stats, derniers=derniers).set_index('Équipe')
+    return taux[[f'{stat}_Pct' for stat in stats]].rename(columns=lambda c: f'{c}_Recent')
+
+def formater_recent(valeur):
+    return "-" if pd.isna(valeur) else f"{valeur:.0f}%"
+
+# ==============================================================================
+# 3. TAUX PONDÉRÉS DANS LE TEMPS (DÉCROISSANCE EXPONENTIELLE)
+# ==============================================================================
+
+def poids_temporels(dates, demi_vie_jours=DEMI_VIE_JOURS, reference=None):
+    """2^(-âge / demi-vie) de chaque match, âge en jours avant reference (défaut : le match le plus récent) ; 0 sans date."""
+    dates = pd.to_datetime(pd.Series(dates)).to_numpy()
+    reference = np.datetime64(reference) if reference is not None else dates.max()
+    age = (reference - dates) / np.timedelta64(1, 'D')
+    return np.where(np.isnan(age), 0.0, np.exp2(-age / demi_vie_jours))
+
+def taux_ponderes(longue, stats=registre_stats.STATS_PRINCIPALES, demi_vie_jours=DEMI_VIE_JOURS, par=('Équipe',), reference=None):
+    """
+    {stat}_Pct_Pondere de chaque groupe (par défaut chaque équipe) de la table longue masquée :
+    moyenne des réussites pondérée par poids_temporels, en une somme groupée pour toutes les
+    stats et tous les groupes. Égale à la moyenne exponentielle (pandas ewm, halflife en
+    temps, adjust=True) du dernier match de l'historique ordonné de chaque équipe :
+    la date de référence se simplifie dans le rapport des sommes.
+    """
+    poids = poids_temporels(longue['Date'], demi_vie_jours, reference)
+    masque = longue[registre_stats.COLONNE_MASQUE].to_numpy()
+    noms = list(registre_stats.STATS)
+    ponderes = pd.DataFrame({stat: poids * (((masque >> masque.dtype.type(noms.index(stat))) & 1) == 1) for stat in stats})
+    ponderes['Poids'] = poids
+    for col in par: ponderes[col] = longue[col].astype(object).to_numpy()
+    sommes = ponderes.groupby(list(par), sort=False).sum()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return pd.DataFrame({f'{stat}_Pct_Pondere': sommes[stat] / sommes['Poids'] * 100 for stat in stats}, index=sommes.index)
+
+def formater_pondere(valeur):
+    return "-" if valeur is None or pd.isna(valeur) else f"{valeur:.1f}%"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Taux de réussite d'une équipe sur plusieurs fenêtres (cumuls, O(1) par fenêtre).")
+    parser.add_argument('equipe')
+    parser.add_argument('--fenetres', type=int, nargs='+', default=[5, 10, 20, 50], help="Tailles des fenêtres (N derniers matchs).")
+    args = parser.parse_args()
+
+    colonnes = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'HTHG', 'HTAG', 'FTR']
+    df = chargement.filtrer_historique(chargement.charger_historique(colonnes=colonnes), colonnes)
+    index = construire_index(registre_stats.preparer_table(df, [args.equipe]))
+    n = len(args.fenetres)
+    lignes = [taux_fenetres(index, [args.equipe] * n, derniers=args.fenetres).assign(Fenetre=[f"{k} derniers" for k in args.fenetres])]
+    lignes.append(taux_fenetres(index, [args.equipe], saison_en_cours=True).assign(Fenetre="Saison en cours"))
+    lignes.append(taux_fenetres(index, [args.equipe]).assign(Fenetre="Tout l'historique"))
+    tableau = pd.concat(lignes).set_index('Fenetre')
+    print(tableau[['Matchs'] + [f'{stat}_Pct' for stat in index['stats']]].rename(columns=lambda c: c.replace('_Pct', '')).round(1).T.to_string())
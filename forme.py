@@ -0,0 +1,93 @@
+import pandas as pd
+import numpy as np
+import argparse
+from numpy.lib.stride_tricks import sliding_window_view
+
+import chargement
+import noyaux
+import registre_stats
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+N_FORME = 5
+PONDERATIONS = [0.2, 0.4, 0.6, 0.8, 1.0] # du plus ancien au plus récent
+POINTS = {'V': 5, 'N': 1, 'D': -3}
+BONUS_ATTAQUE = 2 # 3 buts marqués ou plus
+BONUS_CS = 2      # aucun but encaissé
+
+FORME_INSUFFISANTE = (0, "Pas assez de matchs")
+FORME_INCONNUE = (0, "N/A")
+
+# ==============================================================================
+# 1. SÉRIE DE FORME (TOUTES LES ÉQUIPES, TOUS LES MATCHS)
+# ==============================================================================
+
+def serie_forme(longue):
+    """
+    Score de forme pondéré de chaque équipe à l'issue de chacun de ses matchs, calculé
+    en une passe sur la table longue (registre_stats.table_longue) :
+    V/N/D = +5/+1/-3, +2 si 3 buts marqués ou plus, +2 si aucun but encaissé,
+    pondérations 0.2 ... 1.0 sur les N_FORME derniers matchs joués.
+    Renvoie une ligne par match joué (triée par équipe puis date) :
+    Équipe, Date, Form_Score, Form_Last_5_Str (NaN / None avant le 5e match) et
+    Form_Score_Avant (forme à la veille du match, utilisable comme variable de modèle).
+    """
+    ftr = longue['FTR'].astype(object)
+    joues = longue[ftr.notna().to_numpy() & (ftr != 'NA').to_numpy()]
+    codes, _ = pd.factorize(joues['Équipe'].astype(object))
+    dates = joues['Date'].to_numpy() if 'Date' in joues.columns else np.zeros(len(joues))
+    ordre = np.lexsort((dates, codes)) # par équipe puis date, stable
+    joues, codes = joues.iloc[ordre], codes[ordre]
+
+    # Points de chaque match (V uniquement sur victoire, N sur FTR == 'D', sinon défaite)
+    res = joues['RES'].to_numpy()
+    lettre = np.where(res == 'V', 'V', np.where(res == 'N', 'N', 'D')).astype(object)
+    bm = pd.to_numeric(joues['FTHG'].where(joues['Domicile'], joues['FTAG']), errors='coerce').to_numpy(dtype=float)
+    be = pd.to_numeric(joues['FTAG'].where(joues['Domicile'], joues['FTHG']), errors='coerce').to_numpy(dtype=float)
+    points = np.select([lettre == 'V', lettre == 'N'], [POINTS['V'], POINTS['N']], default=POINTS['D'])
+    points = points + np.where(bm >= 3, BONUS_ATTAQUE, 0) + np.where(be == 0, BONUS_CS, 0)
+
+    # Rang du match dans l'historique de l'équipe : la fenêtre n'est complète qu'à partir du 5e
+    debut_groupe = np.r_[True, codes[1:] != codes[:-1]] if len(codes) else np.zeros(0, dtype=bool)
+    rang = np.arange(len(codes)) - np.maximum.accumulate(np.where(debut_groupe, np.arange(len(codes)), 0))
+    complet = rang >= N_FORME - 1
+
+    # Fenêtres glissantes (match t-4 ... t), sommées dans l'ordre du calcul d'origine
+    bourrage = N_FORME - 1
+    score = noyaux.somme_ponderee_glissante(points, debut_groupe, PONDERATIONS)
+    fen_lettres = sliding_window_view(np.r_[np.full(bourrage, '', dtype=object), lettre], N_FORME)
+    chaine = fen_lettres[:, -1]
+    for k in range(N_FORME - 2, -1, -1):
+        chaine = chaine + ", " + fen_lettres[:, k]
+
+    serie = pd.DataFrame({
+        'Équipe': joues['Équipe'].to_numpy(), 'Date': joues['Date'].to_numpy() if 'Date' in joues.columns else None,
+        'Form_Score': np.where(complet, score, np.nan),
+        'Form_Last_5_Str': np.where(complet, chaine, None),
+    }, index=joues.index)
+    avant = np.r_[np.nan, serie['Form_Score'].to_numpy()[:-1]] if len(serie) else np.zeros(0)
+    serie['Form_Score_Avant'] = np.where(debut_groupe, np.nan, avant)
+    return serie
+
+def forme_actuelle(longue):
+    """{équipe: (Form_Score, Form_Last_5_Str)} à la date du dernier match joué de chaque équipe."""
+    equipes = longue['Équipe'].astype(object).unique()
+    if 'FTR' not in longue.columns or 'FTHG' not in longue.columns:
+        return {eq: FORME_INCONNUE for eq in equipes}
+    formes = {eq: FORME_INSUFFISANTE for eq in equipes}
+    derniers = serie_forme(longue).groupby('Équipe', sort=False, observed=True).tail(1)
+    derniers = derniers[derniers['Form_Score'].notna()]
+    formes.update(zip(derniers['Équipe'].astype(object), zip(derniers['Form_Score'].tolist(), derniers['Form_Last_5_Str'])))
+    return formes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Historique du score de forme d'une équipe.")
+    parser.add_argument('equipe')
+    parser.add_argument('--derniers', type=int, default=20, help="Nombre de matchs affichés.")
+    args = parser.parse_args()
+
+    colonnes = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR']
+    df = chargement.filtrer_historique(chargement.charger_historique(colonnes=colonnes), colonnes)
+    serie = serie_forme(registre_stats.table_longue(df, [args.equipe]))
+    print(serie.drop(columns='Équipe').tail(args.derniers).to_string(index=False))
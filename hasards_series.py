@@ -0,0 +1,212 @@
+import pandas as pd
+import numpy as np
+import argparse
+import os
+
+import noyaux
+import registre_stats
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+FICHIER_HASARDS = "hasards_series.npz"
+LONGUEUR_MAX = 40    # séries plus longues regroupées dans la dernière case
+EFFECTIF_MIN = 30    # en dessous, la table de la ligue cède la place à la table toutes ligues
+Z_CONFIANCE = 1.96   # intervalle de Wilson à 95 %
+TOUTES = 'Toutes'
+
+# ==============================================================================
+# 1. LONGUEUR DE SÉRIE AVANT CHAQUE MATCH (RLE VECTORISÉ)
+# ==============================================================================
+
+def series_avant(c, debut_groupe, initiale):
+    """
+    Longueur de la série en cours AVANT chaque match (0 si le match précédent a échoué).
+    c : réussites triées par équipe puis date ; initiale : série de l'équipe avant le 1er
+    match de son groupe (reprise incrémentale), répétée sur les lignes du groupe.
+    """
+    apres = noyaux.series_apres(c, debut_groupe, initiale)
+    avant = np.r_[0, apres[:-1]] if len(c) else apres
+    return np.where(debut_groupe, initiale, avant), apres
+
+# ==============================================================================
+# 2. CONSTRUCTION DES TABLES
+# ==============================================================================
+
+def tables_vides(stats, ligues=()):
+    ligues = [TOUTES] + sorted(set(ligues) - {TOUTES})
+    forme = (len(stats), len(ligues), LONGUEUR_MAX + 1)
+    return {'stats': list(stats), 'ligues': ligues, 'a_risque': np.zeros(forme, dtype=np.int64),
+            'prolonges': np.zeros(forme, dtype=np.int64),
+            'etat': pd.DataFrame(columns=['Derniere_Date', 'Ligue'] + list(stats)).rename_axis('Équipe'),
+            'matchs': 0}
+
+def accumuler(tables, longue):
+    """
+    Ajoute les matchs de la table longue masquée (registre_stats.preparer_table) aux tables :
+    à chaque match joué avec une série de longueur n > 0 en cours, a_risque[n] += 1 et,
+    si la série continue, prolonges[n] += 1. Les séries encore ouvertes ne comptent
+    que pour les longueurs déjà dépassées : les tables restent exactes quand elles
+    sont complétées plus tard avec les nouveaux matchs (même état final).
+    """
+    if longue.empty: return tables
+    ligues = longue['LeagueCode'].astype(object).fillna('?').to_numpy() if 'LeagueCode' in longue.columns else np.full(len(longue), '?')
+    nouvelles = sorted(set(ligues) - set(tables['ligues']))
+    if nouvelles:
+        tables['ligues'] += nouvelles
+        ajout = np.zeros((len(tables['stats']), len(nouvelles), LONGUEUR_MAX + 1), dtype=np.int64)
+        tables['a_risque'] = np.concatenate([tables['a_risque'], ajout], axis=1)
+        tables['prolonges'] = np.concatenate([tables['prolonges'], ajout.copy()], axis=1)
+
+    codes, equipes = pd.factorize(longue['Équipe'].astype(object))
+    ordre = np.lexsort((longue['Date'].to_numpy(), codes))
+    codes, ligues = codes[ordre], ligues[ordre]
+    masque = longue[registre_stats.COLONNE_MASQUE].to_numpy()[ordre]
+    dates = longue['Date'].to_numpy()[ordre]
+    debut_groupe = np.r_[True, codes[1:] != codes[:-1]]
+    fin_groupe = np.r_[codes[1:] != codes[:-1], True]
+    code_ligue = pd.Index(tables['ligues']).get_indexer(ligues)
+
+    etat = tables['etat'].reindex(equipes)
+    noms = list(registre_stats.STATS)
+    n_cases = len(tables['ligues']) * (LONGUEUR_MAX + 1)
+    for i, stat in enumerate(tables['stats']):
+        c = ((masque >> masque.dtype.type(noms.index(stat))) & 1) == 1
+        initiale = etat[stat].fillna(0).to_numpy(dtype=np.int64)[codes]
+        avant, apres = series_avant(c, debut_groupe, initiale)
+        risque = avant > 0
+        cles = code_ligue[risque] * (LONGUEUR_MAX + 1) + np.minimum(avant[risque], LONGUEUR_MAX)
+        tables['a_risque'][i] += np.bincount(cles, minlength=n_cases).reshape(-1, LONGUEUR_MAX + 1)
+        tables['prolonges'][i] += np.bincount(cles[c[risque]], minlength=n_cases).reshape(-1, LONGUEUR_MAX + 1)
+        etat[stat] = apres[fin_groupe]
+    # La ligne TOUTES est la somme des ligues
+    for cle in ('a_risque', 'prolonges'):
+        tables[cle][:, 0] = tables[cle][:, 1:].sum(axis=1)
+
+    etat['Derniere_Date'] = dates[fin_groupe]
+    etat['Ligue'] = ligues[fin_groupe]
+    anciens = tables['etat'].drop(equipes, errors='ignore')
+    tables['etat'] = etat if anciens.empty else pd.concat([anciens, etat])
+    tables['matchs'] += len(longue)
+    return tables
+
+def construire(longue, stats=registre_stats.STATS_PRINCIPALES):
+    """Tables complètes depuis tout l'historique."""
+    ligues = longue['LeagueCode'].astype(object).dropna().unique() if 'LeagueCode' in longue.columns else []
+    return accumuler(tables_vides(stats, ligues), longue)
+
+# ==============================================================================
+# 3. SAUVEGARDE ET MISE À JOUR INCRÉMENTALE
+# ==============================================================================
+
+def sauvegarder(tables, fichier=FICHIER_HASARDS):
+    """Écriture dans un fichier temporaire puis os.replace : une exécution interrompue ne laisse jamais de .npz tronqué."""
+    etat = tables['etat']
+    temporaire = f"{fichier}.{os.getpid()}.tmp.npz"
+    try:
+        np.savez_compressed(
+            temporaire, stats=np.array(tables['stats']), ligues=np.array(tables['ligues']),
+            a_risque=tables['a_risque'], prolonges=tables['prolonges'], matchs=tables['matchs'],
+            equipes=etat.index.to_numpy(dtype=str), etat_ligues=etat['Ligue'].to_numpy(dtype=str),
+            etat_dates=pd.to_datetime(etat['Derniere_Date']).to_numpy(dtype='datetime64[ns]'),
+            etat_series=etat[tables['stats']].to_numpy(dtype=np.int64))
+        os.replace(temporaire, fichier)
+    except OSError as e:
+        print(f"⚠️ Tables de hasard non écrites ({e}).")
+        if os.path.exists(temporaire): os.remove(temporaire)
+
+def charger(fichier=FICHIER_HASARDS):
+    if not os.path.exists(fichier): return None
+    try:
+        with np.load(fichier) as z:
+            stats = z['stats'].tolist()
+            etat = pd.DataFrame(z['etat_series'], columns=stats, index=pd.Index(z['equipes'].tolist(), name='Équipe'))
+            etat.insert(0, 'Ligue', z['etat_ligues'].tolist())
+            etat.insert(0, 'Derniere_Date', z['etat_dates'])
+            return {'stats': stats, 'ligues': z['ligues'].tolist(), 'a_risque': z['a_risque'], 'prolonges': z['prolonges'],
+                    'etat': etat, 'matchs': int(z['matchs'])}
+    except Exception as e:
+        print(f"⚠️ Tables de hasard illisibles ({e}) : reconstruction.")
+        return None
+
+def mettre_a_jour(longue, fichier=FICHIER_HASARDS, stats=registre_stats.STATS_PRINCIPALES):
+    """
+    Reprend les tables sauvegardées et n'y ajoute que les matchs postérieurs au dernier
+    match traité de chaque équipe. Reconstruction complète si les stats ont changé ou si
+    l'historique ne correspond plus (matchs corrigés ou supprimés).
+    """
+    tables = charger(fichier)
+    nouveaux = None
+    if tables is not None and tables['stats'] == list(stats):
+        derniere = longue['Équipe'].astype(object).map(tables['etat']['Derniere_Date'])
+        nouveaux = longue[derniere.isna().to_numpy() | (longue['Date'] > derniere).to_numpy()]
+        if tables['matchs'] + len(nouveaux) != len(longue): nouveaux = None
+    if nouveaux is None:
+        print("🧮 Tables de hasard : construction complète...")
+        tables = construire(longue, stats)
+    else:
+        print(f"🧮 Tables de hasard : {len(nouveaux)} nouvelles lignes.")
+        tables = accumuler(tables, nouveaux)
+    sauvegarder(tables, fichier)
+    return tables
+
+# ==============================================================================
+# 4. LECTURE O(1)
+# ==============================================================================
+
+def wilson(succes, n, z=Z_CONFIANCE):
+    """Intervalle de confiance de Wilson d'une proportion (bornes NaN si n == 0)."""
+    succes, n = np.asarray(succes, dtype=float), np.asarray(n, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        p = succes / n
+        centre = (p + z ** 2 / (2 * n)) / (1 + z ** 2 / n)
+        marge = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / (1 + z ** 2 / n)
+    return centre - marge, centre + marge
+
+def taux(tables, stat, longueur, ligue=TOUTES):
+    """
+    Fréquence historique à laquelle une série de cette longueur a continué :
+    (taux, borne basse, borne haute, effectif). Ligue à faible effectif : table toutes ligues.
+    """
+    i = tables['stats'].index(stat)
+    n = min(int(longueur), LONGUEUR_MAX)
+    j = tables['ligues'].index(ligue) if ligue in tables['ligues'] else 0
+    if tables['a_risque'][i, j, n] < EFFECTIF_MIN: j = 0
+    a_risque, prolonges = tables['a_risque'][i, j, n], tables['prolonges'][i, j, n]
+    if a_risque == 0: return np.nan, np.nan, np.nan, 0
+    bas, haut = wilson(prolonges, a_risque)
+    return prolonges / a_risque, float(bas), float(haut), int(a_risque)
+
+def ajouter_taux(df, tables, stats=registre_stats.STATS_PRINCIPALES):
+    """{stat}_Hasard : % historique de prolongation d'une série de la longueur en cours (ligue de l'équipe)."""
+    if df.empty: return df
+    ligues = df['Équipe'].map(tables['etat']['Ligue']).fillna(TOUTES)
+    nouvelles = {}
+    for stat in stats:
+        if f'{stat}_EnCours' not in df.columns: continue
+        nouvelles[f'{stat}_Hasard'] = [taux(tables, stat, n, l)[0] * 100 if n > 0 else np.nan
+                                       for n, l in zip(df[f'{stat}_EnCours'], ligues)]
+    return pd.concat([df, pd.DataFrame(nouvelles, index=df.index)], axis=1)
+
+def tableau(tables, stat, ligue=TOUTES, longueur_max=15):
+    """Table de hasard lisible : une ligne par longueur de série."""
+    i, j = tables['stats'].index(stat), tables['ligues'].index(ligue)
+    a_risque, prolonges = tables['a_risque'][i, j, 1:longueur_max + 1], tables['prolonges'][i, j, 1:longueur_max + 1]
+    bas, haut = wilson(prolonges, a_risque)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return pd.DataFrame({'Séries': a_risque, 'Prolongées': prolonges, '% Prolongation': prolonges / a_risque * 100,
+                             'IC bas': bas * 100, 'IC haut': haut * 100}, index=pd.RangeIndex(1, longueur_max + 1, name='Longueur'))
+
+if __name__ == "__main__":
+    import chargement
+    parser = argparse.ArgumentParser(description="Tables de hasard des séries : P(série de n -> n+1) sur tout l'historique.")
+    parser.add_argument('stat', choices=registre_stats.STATS_PRINCIPALES)
+    parser.add_argument('--ligue', default=TOUTES)
+    parser.add_argument('--fichier', default=FICHIER_HASARDS)
+    args = parser.parse_args()
+
+    colonnes = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'HTHG', 'HTAG', 'FTR']
+    df_brut = chargement.charger_historique(colonnes=colonnes)
+    df = chargement.filtrer_historique(df_brut, colonnes)
+    tables = mettre_a_jour(registre_stats.preparer_table(df), args.fichier)
+    print(tableau(tables, args.stat, args.ligue).round(1).to_string())
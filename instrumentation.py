@@ -0,0 +1,147 @@
+import cProfile
+import datetime
+import functools
+import json
+import os
+import platform
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try: import resource
+except ImportError: resource = None  # Windows
+
+try: import psutil
+except ImportError: psutil = None
+
+# ==============================================================================
+# ÉTAT DE L'EXÉCUTION EN COURS
+# ==============================================================================
+_ETAT = {'mesures': [], 'dossier_profils': None, 'debut': None}
+_VERROU = threading.Lock()
+_PILE = threading.local() # étapes imbriquées, par thread (les rapports tournent en parallèle)
+
+# ==============================================================================
+# 1. MÉMOIRE
+# ==============================================================================
+
+def rss_actuel_mo():
+    """RSS courant du processus (psutil si disponible, sinon /proc sous Linux)."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 1024 ** 2
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except Exception:
+        return None
+
+def rss_pic_mo():
+    """
+    RSS maximal atteint depuis le lancement du processus (ru_maxrss) : valeur monotone,
+    propre au processus et non à une étape (voir rss_pic_hausse_mo dans mesurer_etape).
+    """
+    if resource is None: return None
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pic / 1024 ** 2 if platform.system() == 'Darwin' else pic / 1024
+
+# ==============================================================================
+# 2. MESURE D'UNE ÉTAPE
+# ==============================================================================
+
+def demarrer_execution(dossier_profils=None, memoire=False):
+    """
+    Remet les mesures à zéro. dossier_profils : active le cProfile des étapes « chaudes ».
+    memoire : active tracemalloc (pic d'allocation Python par étape, ~2x plus lent ;
+    avec plusieurs rapports en parallèle, les pics se mélangent : utiliser --jobs 1).
+    """
+    with _VERROU:
+        _ETAT['mesures'] = []
+        _ETAT['dossier_profils'] = dossier_profils
+        _ETAT['debut'] = datetime.datetime.now().isoformat(timespec='seconds')
+    if dossier_profils: os.makedirs(dossier_profils, exist_ok=True)
+    if memoire and not tracemalloc.is_tracing(): tracemalloc.start()
+
+@contextmanager
+def mesurer_etape(nom, chaude=False, **infos):
+    """
+    Mesure le temps mur, le temps CPU (du thread), la mémoire et les compteurs
+    renseignés par l'appelant dans le dict renvoyé (lignes, cache_hits...).
+    Mémoire : rss_mo (RSS en fin d'étape), rss_pic_hausse_mo (hausse du pic RSS du processus
+    pendant l'étape : 0 si l'étape reste sous le pic déjà atteint ; inclut les rapports qui
+    tournent en parallèle dans d'autres threads) et, avec tracemalloc,
+    tracemalloc_pic_mo (pic d'allocation Python de l'étape elle-même).
+
+        with mesurer_etape('chargement') as m:
+            df = ...
+            m['lignes'] = len(df)
+    """
+    pile = getattr(_PILE, 'noms', None)
+    if pile is None: pile = _PILE.noms = []
+    chemin = '/'.join(pile + [nom])
+    pile.append(nom)
+
+    mesure = {'etape': chemin, 'thread': threading.current_thread().name, **infos}
+    profil = None
+    if chaude and _ETAT['dossier_profils']:
+        profil = cProfile.Profile()
+        try: profil.enable()
+        except ValueError: profil = None # un autre profileur est déjà actif (Python >= 3.12)
+    if tracemalloc.is_tracing(): tracemalloc.reset_peak()
+    pic_debut = rss_pic_mo()
+    t0, c0 = time.perf_counter(), time.thread_time()
+    mesure['statut'] = 'OK'
+    try:
+        yield mesure
+    except BaseException:
+        mesure['statut'] = 'ERREUR'
+        raise
+    finally:
+        mesure['mur_s'] = round(time.perf_counter() - t0, 4)
+        mesure['cpu_s'] = round(time.thread_time() - c0, 4)
+        mesure['rss_mo'] = rss_actuel_mo()
+        pic_fin = rss_pic_mo()
+        mesure['rss_pic_hausse_mo'] = round(pic_fin - pic_debut, 2) if pic_fin is not None else None
+        if tracemalloc.is_tracing(): mesure['tracemalloc_pic_mo'] = round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 2)
+        if profil is not None:
+            profil.disable()
+            fichier = os.path.join(_ETAT['dossier_profils'], chemin.replace('/', '__') + '.prof')
+            profil.dump_stats(fichier)
+            mesure['profil'] = fichier
+        pile.pop()
+        with _VERROU: _ETAT['mesures'].append(mesure)
+
+def instrumenter(nom=None, chaude=False):
+    """Décorateur : mesure chaque appel de la fonction comme une étape."""
+    def decorateur(fonction):
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            with mesurer_etape(nom or fonction.__name__, chaude=chaude):
+                return fonction(*args, **kwargs)
+        return enveloppe
+    return decorateur
+
+# ==============================================================================
+# 3. RAPPORT
+# ==============================================================================
+
+def mesures():
+    with _VERROU: return list(_ETAT['mesures'])
+
+def ecrire_rapport(chemin, **meta):
+    """Écrit le rapport d'exécution JSON (une entrée par étape, dans l'ordre de fin)."""
+    rapport = {
+        'debut': _ETAT['debut'], 'fin': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(), 'plateforme': platform.platform(),
+        'meta': meta, 'etapes': mesures()
+    }
+    with open(chemin, 'w', encoding='utf-8') as f:
+        json.dump(rapport, f, indent=2, ensure_ascii=False, default=str)
+    print(f"📝 Rapport d'exécution : {os.path.abspath(chemin)}")
+    return chemin
+
+def afficher_bilan():
+    print(f"\n  {'Étape':<34} {'Statut':<7} {'Mur (s)':>8} {'CPU (s)':>8} {'RSS (Mo)':>9} {'Lignes':>8}")
+    for m in sorted(mesures(), key=lambda m: m['etape']):
+        rss = f"{m['rss_mo']:.0f}" if m.get('rss_mo') is not None else "-"
+        print(f"  {m['etape']:<34} {m['statut']:<7} {m['mur_s']:>8.2f} {m['cpu_s']:>8.2f} {rss:>9} {m.get('lignes', ''):>8}")
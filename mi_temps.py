@@ -0,0 +1,101 @@
+import pandas as pd
+import numpy as np
+import argparse
+
+import chargement
+import registre_stats
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+MARGE_MAX = 3 # écarts au-delà de ±3 buts regroupés : le signe (donc le résultat) reste exact
+MARGES = list(range(-MARGE_MAX, MARGE_MAX + 1))
+RESULTATS = ['V', 'N', 'D'] # mi-temps : mène / nul / mené ; fin de match : gagne / nul / perd
+LIEUX = ['dom', 'ext', 'tous']
+
+# Stratégies = une case (ou une ligne partielle) de la matrice MT -> FT des résultats :
+# nom -> (état à la mi-temps, états finaux comptés comme réussite)
+STRATEGIES = {
+    'Bottle': ('V', ('N', 'D')),     # menait à la pause, ne gagne pas
+    'Tient': ('V', ('V',)),          # menait à la pause, gagne
+    'Retour': ('D', ('V', 'N')),     # mené à la pause, ne perd pas
+    'Nul_MT_Gagne': ('N', ('V',)),   # nul à la pause, gagne
+}
+
+# ==============================================================================
+# 1. MATRICES DE TRANSITION
+# ==============================================================================
+
+def _ecart(bm, be):
+    return np.clip(bm - be, -MARGE_MAX, MARGE_MAX).astype(np.int64) + MARGE_MAX
+
+def calculer_transitions(longue):
+    """
+    Transitions écart de buts à la mi-temps -> écart final (point de vue de l'équipe), par
+    équipe et lieu, en un seul bincount sur la table longue (registre_stats.table_longue) :
+    un tableau croisé groupé de toutes les équipes à la fois.
+    Renvoie {'equipes', 'marges' (équipes, LIEUX, écart MT, écart FT), 'resultats' (équipes, LIEUX, 3, 3)}.
+    """
+    codes, equipes = pd.factorize(longue['Équipe'].astype(object), sort=True)
+    lieu = np.where(longue['Domicile'].to_numpy(), 0, 1)
+    mt = _ecart(longue['BM_MT'].to_numpy(), longue['BE_MT'].to_numpy())
+    ft = _ecart(longue['BM'].to_numpy(), longue['BE'].to_numpy())
+
+    n_equipes, n_marges = len(equipes), len(MARGES)
+    cles = ((codes * 2 + lieu) * n_marges + mt) * n_marges + ft
+    comptes = np.bincount(cles, minlength=n_equipes * 2 * n_marges ** 2).reshape(n_equipes, 2, n_marges, n_marges)
+    comptes = np.concatenate([comptes, comptes.sum(axis=1, keepdims=True)], axis=1) # + 'tous'
+
+    # écart -> résultat (V si > 0, N si 0, D si < 0) : les matrices 3x3 sont des sommes de blocs
+    vers_resultat = np.zeros((n_marges, len(RESULTATS)), dtype=np.int64)
+    vers_resultat[np.arange(n_marges), np.select([np.array(MARGES) > 0, np.array(MARGES) == 0], [0, 1], 2)] = 1
+    resultats = np.einsum('elij,ia,jb->elab', comptes, vers_resultat, vers_resultat)
+    return {'equipes': pd.Index(equipes), 'marges': comptes, 'resultats': resultats}
+
+# ==============================================================================
+# 2. LECTURES (STRATÉGIES, LIVE)
+# ==============================================================================
+
+def taux(trans, depart, arrivees, lieu='tous'):
+    """
+    Pour toutes les équipes : matchs dans l'état depart à la pause (Base), dont finis dans un
+    des états arrivees (Nb), et % (NaN sans base). Simple lecture des matrices.
+    """
+    m = trans['resultats'][:, LIEUX.index(lieu)]
+    i, js = RESULTATS.index(depart), [RESULTATS.index(a) for a in arrivees]
+    base, nb = m[:, i, :].sum(axis=1), m[:, i, js].sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pct = np.where(base > 0, nb / base * 100, np.nan)
+    return pd.DataFrame({'Base': base, 'Nb': nb, 'Pct': pct}, index=trans['equipes'].rename('Équipe'))
+
+def strategies(trans, lieu='tous'):
+    """{nom}_Base, {nom}_Nb, {nom}_Pct de chaque stratégie de STRATEGIES, index Équipe."""
+    return pd.concat([taux(trans, depart, arrivees, lieu).add_prefix(f'{nom}_') for nom, (depart, arrivees) in STRATEGIES.items()], axis=1)
+
+def matrice(trans, equipe, lieu='tous', marges=False, pourcentages=True):
+    """
+    Matrice MT -> FT d'une équipe (lignes : état à la pause, colonnes : état final), en % de
+    chaque ligne par défaut : la ligne de l'état courant à la pause donne directement les
+    probabilités historiques de chaque issue (pari en direct).
+    """
+    m = trans['marges' if marges else 'resultats'][trans['equipes'].get_loc(equipe), LIEUX.index(lieu)]
+    etats = [f"{e:+d}" if abs(e) < MARGE_MAX else f"{e:+d}{'+' if e > 0 else '-'}" for e in MARGES] if marges else RESULTATS
+    tableau = pd.DataFrame(m, index=pd.Index(etats, name='MT'), columns=pd.Index(etats, name='FT'))
+    if pourcentages:
+        tableau = tableau.div(tableau.sum(axis=1).replace(0, np.nan), axis=0) * 100
+    return tableau
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Matrice mi-temps -> fin de match d'une équipe (résultats ou écarts de buts).")
+    parser.add_argument('equipe')
+    parser.add_argument('--lieu', choices=LIEUX, default='tous')
+    parser.add_argument('--marges', action='store_true', help="Écarts de buts (-3 à +3) au lieu des résultats V/N/D.")
+    parser.add_argument('--comptes', action='store_true', help="Nombres de matchs au lieu des %.")
+    args = parser.parse_args()
+
+    colonnes = ['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'HTHG', 'HTAG']
+    df = chargement.filtrer_historique(chargement.charger_historique(colonnes=colonnes + ['Date']), colonnes)
+    trans = calculer_transitions(registre_stats.table_longue(df, [args.equipe]))
+    if args.equipe not in trans['equipes']: raise SystemExit(f"❌ Équipe inconnue : {args.equipe}")
+    print(matrice(trans, args.equipe, args.lieu, args.marges, not args.comptes).round(1).to_string())
+    print(strategies(trans, args.lieu).loc[args.equipe].round(1).to_string())
@@ -0,0 +1,150 @@
+import numpy as np
+import argparse
+from numpy.lib.stride_tricks import sliding_window_view
+
+try: import numba
+except ImportError: numba = None  # optionnel : repli numpy vectorisé
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+# Chaque noyau séquentiel est écrit une fois sous forme de boucle sur des tableaux numpy
+# (_boucle_*). Si numba est installé, la boucle est compilée à la volée ; sinon la version
+# numpy vectorisée (_numpy_*) prend le relais, avec des résultats identiques (entiers, ou
+# sommes flottantes effectuées dans le même ordre).
+UTILISER_JIT = True
+JIT_DISPONIBLE = numba is not None
+
+def _compiler(boucle):
+    return numba.njit(cache=True)(boucle) if JIT_DISPONIBLE else boucle
+
+def _choisir(boucle_compilee, repli):
+    return boucle_compilee if JIT_DISPONIBLE and UTILISER_JIT else repli
+
+# ==============================================================================
+# 1. SÉRIES
+# ==============================================================================
+
+def _boucle_series_apres(c, debut_groupe, initiale):
+    apres = np.zeros(len(c), dtype=np.int64)
+    courant = 0
+    for i in range(len(c)):
+        if debut_groupe[i]: courant = initiale[i]
+        courant = courant + 1 if c[i] else 0
+        apres[i] = courant
+    return apres
+
+def _numpy_series_apres(c, debut_groupe, initiale):
+    idx = np.arange(len(c))
+    depart = np.maximum.accumulate(np.where(debut_groupe, idx, 0))
+    coupure = np.maximum.accumulate(np.where(~c, idx, -1))
+    premiere_serie = coupure < depart # aucun échec depuis le début du groupe
+    return np.where(c, idx - np.maximum(coupure, depart - 1) + np.where(premiere_serie, initiale, 0), 0)
+
+_jit_series_apres = _compiler(_boucle_series_apres)
+
+def series_apres(c, debut_groupe, initiale):
+    """Longueur de la série en cours APRÈS chaque ligne (groupes contigus ; initiale : série avant le groupe, répétée sur ses lignes)."""
+    c, debut_groupe = np.ascontiguousarray(c, dtype=np.bool_), np.ascontiguousarray(debut_groupe, dtype=np.bool_)
+    initiale = np.ascontiguousarray(initiale, dtype=np.int64)
+    return _choisir(_jit_series_apres, _numpy_series_apres)(c, debut_groupe, initiale)
+
+# ==============================================================================
+# 2. FENÊTRES GLISSANTES
+# ==============================================================================
+
+def _boucle_somme_ponderee(valeurs, debut_groupe, poids):
+    n, w = len(valeurs), len(poids)
+    sortie = np.zeros(n)
+    rang = 0
+    for i in range(n):
+        rang = 0 if debut_groupe[i] else rang + 1
+        s = 0.0
+        for k in range(w):
+            decalage = w - 1 - k
+            s = s + (valeurs[i - decalage] * poids[k] if decalage <= rang else 0.0)
+        sortie[i] = s
+    return sortie
+
+def _numpy_somme_ponderee(valeurs, debut_groupe, poids):
+    w = len(poids)
+    idx = np.arange(len(valeurs))
+    rang = idx - np.maximum.accumulate(np.where(debut_groupe, idx, 0))
+    fenetres = sliding_window_view(np.r_[np.zeros(w - 1), valeurs], w)
+    sortie = np.zeros(len(valeurs))
+    for k in range(w):
+        sortie = sortie + np.where(w - 1 - k <= rang, fenetres[:, k] * poids[k], 0.0)
+    return sortie
+
+_jit_somme_ponderee = _compiler(_boucle_somme_ponderee)
+
+def somme_ponderee_glissante(valeurs, debut_groupe, poids):
+    """
+    Somme pondérée des len(poids) dernières valeurs de chaque ligne (poids du plus ancien au
+    plus récent), sans sortir du groupe : les positions avant le début du groupe comptent 0.
+    """
+    valeurs = np.ascontiguousarray(valeurs, dtype=np.float64)
+    debut_groupe = np.ascontiguousarray(debut_groupe, dtype=np.bool_)
+    poids = np.ascontiguousarray(poids, dtype=np.float64)
+    return _choisir(_jit_somme_ponderee, _numpy_somme_ponderee)(valeurs, debut_groupe, poids)
+
+def _boucle_sommes_fenetres(valeurs, debuts, fins):
+    sortie = np.zeros((len(debuts),) + valeurs.shape[1:], dtype=valeurs.dtype)
+    for q in range(len(debuts)):
+        for i in range(debuts[q], fins[q]):
+            sortie[q] += valeurs[i]
+    return sortie
+
+def _numpy_sommes_fenetres(valeurs, debuts, fins):
+    cumuls = np.concatenate([np.zeros((1,) + valeurs.shape[1:], dtype=valeurs.dtype), np.cumsum(valeurs, axis=0)])
+    return cumuls[fins] - cumuls[debuts]
+
+_jit_sommes_fenetres = _compiler(_boucle_sommes_fenetres)
+
+def sommes_fenetres(valeurs, debuts, fins):
+    """Somme des lignes [debut, fin[ de valeurs (entiers : cumuls exacts) pour chaque fenêtre."""
+    valeurs = np.ascontiguousarray(valeurs, dtype=np.int64)
+    debuts, fins = np.ascontiguousarray(debuts, dtype=np.int64), np.ascontiguousarray(fins, dtype=np.int64)
+    return _choisir(_jit_sommes_fenetres, _numpy_sommes_fenetres)(valeurs, debuts, fins)
+
+def fenetres_precedentes(codes, dates, n):
+    """
+    Pour des lignes triées par groupe (codes) puis date : fenêtre [debut, fin[ des n dernières
+    lignes du même groupe strictement antérieures à la date de chaque ligne.
+    """
+    idx = np.arange(len(codes))
+    nouveau_groupe = np.r_[True, codes[1:] != codes[:-1]] if len(codes) else np.zeros(0, dtype=bool)
+    nouvelle_date = nouveau_groupe | (np.r_[True, dates[1:] != dates[:-1]] if len(codes) else nouveau_groupe)
+    debut_groupe = np.maximum.accumulate(np.where(nouveau_groupe, idx, 0))
+    fins = np.maximum.accumulate(np.where(nouvelle_date, idx, 0))
+    return np.maximum(debut_groupe, fins - n), fins
+
+if __name__ == "__main__":
+    import time
+    parser = argparse.ArgumentParser(description="Vérifie que chaque noyau donne les mêmes résultats en boucle (JIT) et en numpy.")
+    parser.add_argument('--taille', type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    c = rng.random(args.taille) < 0.7
+    debut = rng.random(args.taille) < 0.01; debut[0] = True
+    initiale = rng.integers(0, 5, args.taille)[np.cumsum(debut) - 1] # constante par groupe
+    valeurs = rng.integers(-3, 8, args.taille).astype(float)
+    poids = np.array([0.2, 0.4, 0.6, 0.8, 1.0])
+    fins = np.sort(rng.integers(0, args.taille, 5000)); debuts = np.maximum(fins - rng.integers(0, 20, 5000), 0)
+    entiers = rng.integers(0, 5, (args.taille, 3))
+
+    cas = {
+        'series_apres': (_jit_series_apres, _numpy_series_apres, (c, debut, initiale)),
+        'somme_ponderee_glissante': (_jit_somme_ponderee, _numpy_somme_ponderee, (valeurs, debut, poids)),
+        'sommes_fenetres': (_jit_sommes_fenetres, _numpy_sommes_fenetres, (entiers, debuts, fins)),
+    }
+    print(f"JIT {'disponible (numba ' + numba.__version__ + ')' if JIT_DISPONIBLE else 'absent : boucles Python pures'}")
+    for nom, (compilee, repli, entrees) in cas.items():
+        compilee(*entrees) # compilation
+        durees = {}
+        for etiquette, f in (('boucle', compilee), ('numpy', repli)):
+            t0 = time.perf_counter(); sortie = f(*entrees); durees[etiquette] = time.perf_counter() - t0
+            durees[etiquette + '_sortie'] = sortie
+        identique = np.array_equal(durees['boucle_sortie'], durees['numpy_sortie'])
+        print(f"  {'✅' if identique else '❌'} {nom:<26} boucle {durees['boucle'] * 1000:8.2f} ms | numpy {durees['numpy'] * 1000:8.2f} ms")
@@ -0,0 +1,136 @@
+import pandas as pd
+import numpy as np
+import os
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+# Colonnes utiles aux analyses par équipe (les colonnes bookmakers ne sont pas partagées)
+COLONNES_ANALYSE = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'HTHG', 'HTAG', 'FTR',
+                    'LeagueCode', 'Saison', 'TotalGoals', 'TotalHTGoals']
+
+# ==============================================================================
+# 1. MÉMOIRE PARTAGÉE
+# ==============================================================================
+
+def partager_colonnes(df, colonnes=None):
+    """
+    Copie les colonnes de df dans des blocs multiprocessing.shared_memory.
+    Les chaînes (équipes, FTR...) sont codées en entiers : seules les catégories
+    (quelques centaines de noms) voyagent par pickle.
+    Renvoie (blocs, description) ; description suffit à reconstruire le DataFrame.
+    """
+    if colonnes is None:
+        colonnes = [c for c in COLONNES_ANALYSE if c in df.columns] + [c for c in df.columns if c.startswith('Cond_')]
+    blocs = []
+    description = {'n': len(df), 'colonnes': []}
+    for col in colonnes:
+        serie = df[col]
+        categories, dtype_origine = None, None
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            valeurs = serie.to_numpy(dtype='datetime64[ns]')
+        elif pd.api.types.is_bool_dtype(serie) or pd.api.types.is_numeric_dtype(serie):
+            valeurs = serie.to_numpy()
+        else:
+            codes, uniques = pd.factorize(serie)
+            valeurs = codes.astype(np.int32)
+            categories, dtype_origine = list(uniques), serie.dtype
+        valeurs = np.ascontiguousarray(valeurs)
+        shm = shared_memory.SharedMemory(create=True, size=max(valeurs.nbytes, 1))
+        np.ndarray(valeurs.shape, dtype=valeurs.dtype, buffer=shm.buf)[:] = valeurs
+        blocs.append(shm)
+        description['colonnes'].append((col, shm.name, valeurs.dtype.str, categories, dtype_origine))
+    return blocs, description
+
+def reconstruire_df(description):
+    """Reconstruit (dans un processus fils) le DataFrame à partir des blocs partagés."""
+    n = description['n']
+    donnees = {}
+    for col, nom_bloc, dtype, categories, dtype_origine in description['colonnes']:
+        shm = shared_memory.SharedMemory(name=nom_bloc)
+        try:
+            valeurs = np.ndarray((n,), dtype=np.dtype(dtype), buffer=shm.buf).copy()
+        finally:
+            shm.close()
+        if categories is not None:
+            # -1 = valeur manquante lors du factorize ; le type d'origine (catégorie, chaîne) est rétabli
+            valeurs = pd.Series(pd.Categorical.from_codes(valeurs, categories=categories)).astype(dtype_origine)
+        donnees[col] = valeurs
+    return pd.DataFrame(donnees)
+
+def liberer(blocs):
+    for shm in blocs:
+        shm.close()
+        shm.unlink()
+
+# ==============================================================================
+# 2. EXÉCUTION PAR LIGUE
+# ==============================================================================
+
+_CONTEXTE_PROCESSUS = {} # rempli une fois par processus fils (initialiser_processus)
+
+def partager_arguments(args):
+    """Arguments supplémentaires : les DataFrames (fixtures...) passent par la mémoire partagée, le reste tel quel."""
+    blocs, partages = [], []
+    for arg in args:
+        if isinstance(arg, pd.DataFrame):
+            blocs_arg, description = partager_colonnes(arg, list(arg.columns))
+            blocs += blocs_arg
+            partages.append(('df', description))
+        else:
+            partages.append(('valeur', arg))
+    return blocs, partages
+
+def initialiser_processus(description, partages):
+    """Initialiseur du pool : historique et arguments reconstruits une seule fois par processus."""
+    _CONTEXTE_PROCESSUS['df'] = reconstruire_df(description)
+    _CONTEXTE_PROCESSUS['args'] = tuple(reconstruire_df(valeur) if genre == 'df' else valeur for genre, valeur in partages)
+
+def _executer_lot(fonction, sous_ligues):
+    df, args = _CONTEXTE_PROCESSUS['df'], _CONTEXTE_PROCESSUS['args']
+    # On ne garde que les matchs des équipes du lot : les filtres par équipe sont ensuite bien plus courts
+    equipes = [eq for equipes_ligue in sous_ligues.values() for eq in equipes_ligue]
+    df = df[df['HomeTeam'].isin(equipes) | df['AwayTeam'].isin(equipes)]
+    return fonction(df, sous_ligues, *args)
+
+def decouper_lots(ligues_dict, taille_lot=None):
+    """Une tâche par ligue, ou par paquet de taille_lot équipes. L'ordre d'origine est conservé."""
+    lots = []
+    for code, equipes in ligues_dict.items():
+        if not taille_lot:
+            lots.append({code: equipes})
+            continue
+        for i in range(0, len(equipes), taille_lot):
+            lots.append({code: equipes[i:i + taille_lot]})
+    return lots
+
+def executer_par_ligue(fonction, df, ligues_dict, *args, n_workers=None, taille_lot=None, colonnes=None):
+    """
+    Exécute fonction(df, ligues_dict, *args) -> DataFrame en parallèle, ligue par ligue
+    (analyser_donnees, calculer_stats_globales...). Les ligues sont indépendantes : chaque
+    processus reçoit les tableaux de matchs via la mémoire partagée et un sous-dictionnaire
+    de ligues. Les DataFrames de *args (fixtures) sont partagés de la même façon ; historique
+    et arguments sont reconstruits une fois par processus, pas une fois par lot.
+    Les résultats sont concaténés dans l'ordre de ligues_dict, comme en série.
+    """
+    lots = decouper_lots(ligues_dict, taille_lot)
+    if not lots: return pd.DataFrame()
+    n_workers = min(n_workers or os.cpu_count() or 1, len(lots))
+    print(f"⚙️ Calcul parallèle : {len(lots)} lots sur {n_workers} processus...")
+
+    blocs, description = partager_colonnes(df, colonnes)
+    blocs_args = []
+    try:
+        blocs_args, partages = partager_arguments(args)
+        contexte = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=contexte,
+                                 initializer=initialiser_processus, initargs=(description, partages)) as executor:
+            resultats = list(executor.map(_executer_lot, [fonction] * len(lots), lots))
+    finally:
+        liberer(blocs + blocs_args)
+
+    resultats = [r for r in resultats if r is not None and not r.empty]
+    return pd.concat(resultats, ignore_index=True) if resultats else pd.DataFrame()
@@ -0,0 +1,132 @@
+import argparse
+import importlib.util
+import inspect
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import chargement
+import instrumentation
+
+# ==============================================================================
+# CONFIGURATION DES ÉTAPES
+# ==============================================================================
+# nom de l'étape -> (script, fonction appelée avec le DataFrame brut partagé)
+ETAPES = {
+    'complet': ('Script_complet.py', 'main'),
+    'ensemble': ('Script_ensemble.py', 'main'),
+    'safe_bets': ('Safe_bet.py', 'analyser_historique'),
+    'strategies': ('Strategies.py', 'analyser_strategies_historique'),
+    'nuls': ('ScriptNuls.py', 'main'),
+    'over15': ('ScriptOver1,5.py', 'main'),
+    'sans_nul': ('ScriptNonNuls.py', 'main'),
+}
+
+DOSSIER_SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+FICHIER_RAPPORT = "rapport_execution.json"
+DOSSIER_PROFILS = "profils"
+
+# ==============================================================================
+# 1. OUTILS
+# ==============================================================================
+
+def importer_script(nom_fichier):
+    """Importe un script par son nom de fichier (nécessaire pour 'ScriptOver1,5.py')."""
+    nom_module = os.path.splitext(nom_fichier)[0].replace(',', '_')
+    spec = importlib.util.spec_from_file_location(nom_module, os.path.join(DOSSIER_SCRIPTS, nom_fichier))
+    module = importlib.util.module_from_spec(spec)
+    # Enregistré dans sys.modules pour que ses fonctions restent picklables (calcul parallèle)
+    sys.modules[nom_module] = module
+    spec.loader.exec_module(module)
+    return module
+
+def executer_etape(nom, fonction, df_brut):
+    """Exécute une étape et renvoie (statut, durée en secondes)."""
+    try:
+        with instrumentation.mesurer_etape(nom) as m:
+            fonction(df_brut)
+    except Exception:
+        print(f"❌ Étape '{nom}' en erreur :\n{traceback.format_exc()}")
+    print(f"⏱️ Étape '{nom}' terminée en {m['mur_s']:.2f} s ({m['statut']})")
+    return m['statut'], m['mur_s']
+
+# ==============================================================================
+# 2. PIPELINE
+# ==============================================================================
+
+def executer_pipeline(etapes=None, dossier=chargement.DOSSIER_PRINCIPAL_DATA, jobs=None, workers=None,
+                      rapport=FICHIER_RAPPORT, profil=False, memoire=False):
+    """
+    Charge CSV_Data une seule fois puis lance les rapports demandés.
+    Les rapports ne dépendent que de l'historique chargé : ils tournent en parallèle
+    (threads) sur le même DataFrame, chacun travaillant sur ses propres copies.
+    workers > 1 active en plus le calcul par ligue multi-processus des rapports qui le supportent.
+    Chaque étape (et sous-étape des rapports) est mesurée dans le fichier JSON rapport ;
+    profil=True écrit un cProfile des étapes lourdes dans DOSSIER_PROFILS.
+    """
+    etapes = list(etapes) if etapes else list(ETAPES)
+    inconnues = [e for e in etapes if e not in ETAPES]
+    if inconnues: raise ValueError(f"Étapes inconnues : {inconnues} (disponibles : {list(ETAPES)})")
+
+    if profil and jobs != 1:
+        # cProfile ne suit que le thread qui l'active, et un seul profileur à la fois depuis Python 3.12
+        print("ℹ️ --profile : rapports exécutés l'un après l'autre.")
+        jobs = 1
+    instrumentation.demarrer_execution(DOSSIER_PROFILS if profil else None, memoire)
+    t_total = time.perf_counter()
+    print(f"--- PIPELINE : {', '.join(etapes)} ---")
+
+    # Import des scripts dans le thread principal (évite les imports concurrents)
+    fonctions = {}
+    colonnes = set()
+    for nom in etapes:
+        module = importer_script(ETAPES[nom][0])
+        fonction = getattr(module, ETAPES[nom][1])
+        # Projection : on ne lit que l'union des colonnes déclarées (None dès qu'un script n'en déclare pas)
+        requises = getattr(module, 'COLONNES_REQUISES', None)
+        colonnes = colonnes | set(requises) if colonnes is not None and requises is not None else None
+        if workers and 'n_workers' in inspect.signature(fonction).parameters:
+            fonction = partial(fonction, n_workers=workers)
+        fonctions[nom] = fonction
+
+    with instrumentation.mesurer_etape('chargement', chaude=True) as m:
+        df_brut = chargement.charger_historique(dossier, colonnes=sorted(colonnes) if colonnes is not None else None)
+        m['lignes'] = len(df_brut)
+        m['colonnes'] = len(df_brut.columns)
+    duree_chargement = m['mur_s']
+    print(f"⏱️ Étape 'chargement' terminée en {duree_chargement:.2f} s")
+    if df_brut.empty:
+        print(f"ERREUR: Aucun fichier CSV trouvé dans {dossier}")
+        return {}
+
+    bilan = {'chargement': ("OK", duree_chargement)}
+    with ThreadPoolExecutor(max_workers=jobs or len(etapes)) as executor:
+        futures = {nom: executor.submit(executer_etape, nom, fonctions[nom], df_brut) for nom in etapes}
+        for nom in etapes:
+            bilan[nom] = futures[nom].result()
+
+    print("\n--- BILAN PIPELINE ---")
+    instrumentation.afficher_bilan()
+    duree_totale = time.perf_counter() - t_total
+    print(f"  {'TOTAL':<34} {'':<7} {duree_totale:>8.2f}")
+    if rapport:
+        instrumentation.ecrire_rapport(rapport, etapes=etapes, dossier=dossier, jobs=jobs, workers=workers,
+                                       total_s=round(duree_totale, 4))
+    return bilan
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lance plusieurs rapports StatsMax avec un seul chargement de CSV_Data.")
+    parser.add_argument('etapes', nargs='*', metavar='ETAPE',
+                        help=f"Rapports à générer (défaut : tous). Choix : {', '.join(ETAPES)}")
+    parser.add_argument('--jobs', type=int, default=None, help="Nombre de rapports exécutés en parallèle.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processus pour le calcul des séries par ligue (rapports complet et ensemble).")
+    parser.add_argument('--dossier', default=chargement.DOSSIER_PRINCIPAL_DATA, help="Dossier des CSV.")
+    parser.add_argument('--rapport', default=FICHIER_RAPPORT, help="Rapport d'exécution JSON (temps, mémoire, lignes par étape).")
+    parser.add_argument('--profile', action='store_true', help=f"cProfile des étapes lourdes dans {DOSSIER_PROFILS}/.")
+    parser.add_argument('--memoire', action='store_true', help="Pic d'allocation par étape via tracemalloc (plus lent).")
+    args = parser.parse_args()
+    executer_pipeline(args.etapes, args.dossier, args.jobs, args.workers, args.rapport, args.profile, args.memoire)
@@ -0,0 +1,87 @@
+import pandas as pd
+import numpy as np
+import argparse
+
+import fenetres_stats
+import registre_stats
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+COLONNE_LIGUE = 'Ligue' # colonne de regroupement de la table des résultats des rapports
+
+# ==============================================================================
+# 1. RANGS DANS LA LIGUE (TABLE DES RÉSULTATS)
+# ==============================================================================
+
+def ajouter_rangs(df, stats=registre_stats.STATS_PRINCIPALES, par=COLONNE_LIGUE):
+    """
+    Ajoute {stat}_Pctile (percentile 0-100 du _Pct de l'équipe dans sa ligue) et {stat}_Z
+    (écart à la moyenne de la ligue en écarts-types) pour toutes les stats, en une
+    opération groupée sur la table des résultats. Z = NaN si la ligue n'a pas de dispersion.
+    """
+    colonnes = [f'{stat}_Pct' for stat in stats if f'{stat}_Pct' in df.columns]
+    if df.empty or not colonnes: return df
+    groupes = df.groupby(par, sort=False)[colonnes]
+    valeurs = df[colonnes].astype(float)
+    pctile = groupes.rank(pct=True) * 100
+    ecart = groupes.transform('std', ddof=0).replace(0, np.nan)
+    z = (valeurs - groupes.transform('mean')) / ecart
+    pctile.columns = [c.replace('_Pct', '_Pctile') for c in colonnes]
+    z.columns = [c.replace('_Pct', '_Z') for c in colonnes]
+    return pd.concat([df, pctile, z], axis=1)
+
+def formater_rang(ligne, stat):
+    """'P87 · z +1.2' : percentile et z-score de la stat dans la ligue de l'équipe."""
+    pctile, z = ligne.get(f'{stat}_Pctile'), ligne.get(f'{stat}_Z')
+    if pctile is None or pd.isna(pctile): return "-"
+    return f"P{pctile:.0f}" + ("" if pd.isna(z) else f" · z {z:+.1f}")
+
+# ==============================================================================
+# 2. BILAN PAR LIGUE ET PAR ÉQUIPE (UNE PASSE SUR LA TABLE LONGUE)
+# ==============================================================================
+
+def bilan_ligues(longue, stats, par='LeagueCode', demi_vie_jours=None):
+    """
+    Réussites par (ligue, équipe) et moyennes de ligue de chaque stat en une agrégation
+    groupée sur la table longue masquée de toutes les ligues :
+    {'equipes': index (ligue, Équipe) -> Matchs, {stat}_Pct, {stat}_Pctile, {stat}_Z,
+     'ligues': index ligue -> Matchs, {stat}_Pct}.
+    Moyenne de ligue = % de lignes (équipe, match) réussies : pour une stat de match
+    (nul, total de buts), c'est exactement le % de matchs de la ligue.
+    demi_vie_jours : ajoute {stat}_Pct_Pondere aux deux tables (fenetres_stats.taux_ponderes,
+    même date de référence pour toutes les ligues).
+    """
+    masque = longue[registre_stats.COLONNE_MASQUE].to_numpy()
+    noms = list(registre_stats.STATS)
+    lignes = pd.DataFrame({stat: ((masque >> masque.dtype.type(noms.index(stat))) & 1).astype(np.int64) for stat in stats})
+    lignes['Matchs'] = 1
+    lignes[par] = longue[par].astype(object).to_numpy()
+    lignes['Équipe'] = longue['Équipe'].astype(object).to_numpy()
+
+    equipes = lignes.groupby([par, 'Équipe'], sort=False).sum()
+    ligues = equipes.groupby(level=par, sort=False).sum()
+    for table in (equipes, ligues):
+        for stat in stats:
+            table[f'{stat}_Pct'] = table.pop(stat) / table['Matchs'] * 100
+    ligues['Matchs'] //= 2
+    equipes = ajouter_rangs(equipes.reset_index(), stats, par=par).set_index([par, 'Équipe'])
+    if demi_vie_jours is not None:
+        equipes = equipes.join(fenetres_stats.taux_ponderes(longue, stats, demi_vie_jours, par=(par, 'Équipe')))
+        ligues = ligues.join(fenetres_stats.taux_ponderes(longue, stats, demi_vie_jours, par=(par,)))
+    return {'equipes': equipes, 'ligues': ligues}
+
+if __name__ == "__main__":
+    import chargement
+    parser = argparse.ArgumentParser(description="Percentile et z-score de chaque équipe dans sa ligue.")
+    parser.add_argument('ligue', help="Code de ligue (ex: E0).")
+    parser.add_argument('--stat', choices=registre_stats.STATS_PRINCIPALES, default='FT +1.5')
+    args = parser.parse_args()
+
+    colonnes = ['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'HTHG', 'HTAG', 'FTR']
+    df_brut = chargement.charger_historique(colonnes=colonnes)
+    df = chargement.filtrer_historique(df_brut, colonnes, codes=[args.ligue])
+    bilan = bilan_ligues(registre_stats.preparer_table(df), registre_stats.STATS_PRINCIPALES)
+    print(f"Moyenne {args.ligue} : {bilan['ligues'].at[args.ligue, f'{args.stat}_Pct']:.1f}% ({bilan['ligues'].at[args.ligue, 'Matchs']} matchs)")
+    colonnes_stat = ['Matchs'] + [f'{args.stat}_{suite}' for suite in ('Pct', 'Pctile', 'Z')]
+    print(bilan['equipes'].loc[args.ligue, colonnes_stat].sort_values(f'{args.stat}_Pct', ascending=False).round(2).to_string())
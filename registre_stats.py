@@ -0,0 +1,128 @@
+import pandas as pd
+import numpy as np
+from functools import lru_cache
+
+# ==============================================================================
+# REGISTRE DES STATISTIQUES
+# ==============================================================================
+# Chaque statistique est déclarée UNE fois : nom affiché -> (colonne Cond_*, expression).
+# Les expressions portent sur la table longue (une ligne par équipe et par match) :
+#   BM, BE, TB          buts marqués / encaissés / total du match (FT)
+#   BM_MT, BE_MT, TB_MT idem à la mi-temps
+#   RES                 résultat de l'équipe : 'V', 'N', 'D' ('' si inconnu)
+#   DOM                 True si l'équipe joue à domicile
+STATS = {
+    'FT Marque':   ('Cond_FT_Score',      "BM > 0"),
+    'FT CS':       ('Cond_FT_CS',         "BE == 0"),
+    'FT No CS':    ('Cond_FT_No_CS',      "BE > 0"),
+    'FT -0.5':     ('Cond_Moins_0_5_FT',  "TB < 0.5"),
+    'FT +1.5':     ('Cond_Plus_1_5_FT',   "TB > 1.5"),
+    'FT -1.5':     ('Cond_Moins_1_5_FT',  "TB < 1.5"),
+    'FT +2.5':     ('Cond_Plus_2_5_FT',   "TB > 2.5"),
+    'FT -2.5':     ('Cond_Moins_2_5_FT',  "TB < 2.5"),
+    'FT +3.5':     ('Cond_Plus_3_5_FT',   "TB > 3.5"),
+    'FT -3.5':     ('Cond_Moins_3_5_FT',  "TB < 3.5"),
+    'FT Nuls':     ('Cond_Draw_FT',       "RES == 'N'"),
+    'MT +0.5':     ('Cond_Plus_0_5_HT',   "TB_MT > 0.5"),
+    'MT -0.5':     ('Cond_Moins_0_5_HT',  "TB_MT < 0.5"),
+    'MT +1.5':     ('Cond_Plus_1_5_HT',   "TB_MT > 1.5"),
+    'MT -1.5':     ('Cond_Moins_1_5_HT',  "TB_MT < 1.5"),
+    # Marchés supplémentaires : calculés dans la même passe, affichés si un rapport les liste
+    'FT +4.5':     ('Cond_Plus_4_5_FT',   "TB > 4.5"),
+    'FT BTTS':     ('Cond_BTTS_FT',       "(BM > 0) & (BE > 0)"),
+    'FT Équipe +1.5': ('Cond_Equipe_Plus_1_5_FT', "BM > 1.5"),
+    'FT Invaincu': ('Cond_Invaincu_FT',   "RES != 'D'"),
+    'FT Muet':     ('Cond_Muet_FT',       "BM == 0"),
+    'FT Défaite':  ('Cond_Defaite_FT',    "RES == 'D'"),
+}
+
+# Les 15 statistiques historiques des rapports complet / ensemble
+STATS_PRINCIPALES = list(STATS)[:15]
+
+VARIABLES = ['BM', 'BE', 'TB', 'BM_MT', 'BE_MT', 'TB_MT', 'RES', 'DOM']
+COLONNE_MASQUE = 'Stat_Masque'
+
+# ==============================================================================
+# 1. TABLE LONGUE (POINT DE VUE DE CHAQUE ÉQUIPE)
+# ==============================================================================
+
+def table_longue(df, equipes=None):
+    """
+    Chaque match devient deux lignes (domicile puis extérieur) avec les colonnes
+    d'origine + Équipe, Domicile et les variables de perspective (BM, BE, RES...).
+    Les lignes d'une même équipe restent dans l'ordre de df.
+    """
+    n = len(df)
+    positions = np.concatenate([np.arange(n), np.arange(n)])
+    domicile = np.concatenate([np.ones(n, dtype=bool), np.zeros(n, dtype=bool)])
+    equipe = np.concatenate([df['HomeTeam'].to_numpy(dtype=object), df['AwayTeam'].to_numpy(dtype=object)])
+    garder = np.ones(2 * n, dtype=bool) if equipes is None else pd.Series(equipe).isin(list(equipes)).to_numpy()
+    ordre = np.lexsort((~domicile[garder], positions[garder])) # par match, domicile d'abord
+    positions, domicile, equipe = positions[garder][ordre], domicile[garder][ordre], equipe[garder][ordre]
+
+    longue = df.iloc[positions].reset_index(drop=True)
+    longue['Équipe'] = pd.Categorical(equipe, dtype=df['HomeTeam'].dtype) if isinstance(df['HomeTeam'].dtype, pd.CategoricalDtype) else equipe
+    longue['Domicile'] = domicile
+
+    def buts(col):
+        if col not in longue.columns: return np.zeros(len(longue))
+        return pd.to_numeric(longue[col], errors='coerce').fillna(0).to_numpy()
+    fthg, ftag, hthg, htag = buts('FTHG'), buts('FTAG'), buts('HTHG'), buts('HTAG')
+    longue['BM'] = np.where(domicile, fthg, ftag); longue['BE'] = np.where(domicile, ftag, fthg)
+    longue['BM_MT'] = np.where(domicile, hthg, htag); longue['BE_MT'] = np.where(domicile, htag, hthg)
+
+    ftr = longue['FTR'].astype(object).to_numpy() if 'FTR' in longue.columns else np.full(len(longue), None)
+    gagne = np.where(domicile, ftr == 'H', ftr == 'A')
+    perdu = np.where(domicile, ftr == 'A', ftr == 'H')
+    longue['RES'] = np.select([gagne, ftr == 'D', perdu], ['V', 'N', 'D'], default='')
+    return longue
+
+# ==============================================================================
+# 2. COMPILATION ET ÉVALUATION
+# ==============================================================================
+
+@lru_cache(maxsize=None)
+def compiler(noms):
+    """
+    Compile les expressions des statistiques demandées en UNE fonction numpy
+    (variables -> matrice de booléens n x len(noms)), mise en cache par liste de noms.
+    """
+    inconnues = [nom for nom in noms if nom not in STATS]
+    if inconnues: raise KeyError(f"Statistiques inconnues : {inconnues}")
+    lignes = ",\n".join(f"        ({STATS[nom][1]})" for nom in noms)
+    source = f"def plan({', '.join(VARIABLES)}):\n    return np.column_stack([\n{lignes},\n    ])\n"
+    espace = {'np': np}
+    exec(compile(source, '<registre_stats>', 'exec'), espace)
+    return espace['plan']
+
+def evaluer(longue, noms=None):
+    """Évalue toutes les statistiques en une passe ; renvoie un masque (bit i = noms[i])."""
+    noms = tuple(noms or STATS)
+    TB = longue['BM'].to_numpy() + longue['BE'].to_numpy()
+    TB_MT = longue['BM_MT'].to_numpy() + longue['BE_MT'].to_numpy()
+    drapeaux = compiler(noms)(longue['BM'].to_numpy(), longue['BE'].to_numpy(), TB,
+                              longue['BM_MT'].to_numpy(), longue['BE_MT'].to_numpy(), TB_MT,
+                              longue['RES'].to_numpy(), longue['Domicile'].to_numpy())
+    type_masque = np.uint16 if len(noms) <= 16 else np.uint32 if len(noms) <= 32 else np.uint64
+    poids = (np.ones(len(noms), dtype=type_masque) << np.arange(len(noms), dtype=type_masque))
+    return (drapeaux.astype(type_masque) * poids).sum(axis=1, dtype=type_masque)
+
+def preparer_table(df, equipes=None, noms=None):
+    """Table longue + masque de toutes les statistiques (colonne Stat_Masque)."""
+    longue = table_longue(df, equipes)
+    longue[COLONNE_MASQUE] = evaluer(longue, noms)
+    return longue
+
+def deplier(longue, stats, noms=None):
+    """Copie de longue (ex. les matchs d'une équipe) avec les colonnes Cond_* des stats demandées."""
+    noms = list(noms or STATS)
+    longue = longue.copy()
+    masque = longue[COLONNE_MASQUE].to_numpy()
+    for stat in stats:
+        bit = noms.index(stat)
+        longue[STATS[stat][0]] = ((masque >> masque.dtype.type(bit)) & 1) == 1
+    return longue
+
+def par_equipe(longue):
+    """{équipe: ses lignes de la table longue}, dans l'ordre d'origine."""
+    return {eq: d for eq, d in longue.groupby('Équipe', sort=False, observed=True)}
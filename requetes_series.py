@@ -0,0 +1,341 @@
+import pandas as pd
+import numpy as np
+import argparse
+import ast
+import time
+from functools import lru_cache
+
+import chargement
+import hasards_series
+import registre_stats
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+COLONNES_MAGASIN = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'HTHG', 'HTAG', 'FTR', 'B365H', 'B365D', 'B365A']
+TAILLE_CACHE = 256 # masques intermédiaires gardés en mémoire
+DERNIERS_DETAILS = 5 # résultats affichés à côté d'une sécheresse
+
+# Événements suivis par les sécheresses (« matchs depuis le dernier X ») : stat du registre -> libellé
+EVENEMENTS = {'FT Nuls': 'nul', 'FT CS': 'clean sheet', 'FT Muet': 'match sans marquer', 'FT +3.5': 'match à +3.5 buts', 'FT Défaite': 'défaite'}
+
+# Colonnes utilisables dans les prédicats (en plus de celles de la table longue : BM, BE, RES...)
+AIDE_COLONNES = """
+  Domicile (bool), Équipe, Adversaire, LeagueCode, Saison, Date,
+  Cote / Cote_Nul / Cote_Adv (B365 du point de vue de l'équipe), Favori (bool),
+  Rang_Adv (classement final de l'adversaire dans sa ligue-saison), Moitie_Haute_Adv (bool),
+  BM, BE, BM_MT, BE_MT, RES ('V', 'N', 'D')
+Exemples :
+  "Domicile"
+  "~Domicile & Moitie_Haute_Adv"
+  "Favori & (Cote < 1.8) & (Saison >= 'data2020')"
+"""
+
+# ==============================================================================
+# 1. MAGASIN DE MATCHS (TABLE LONGUE ENRICHIE)
+# ==============================================================================
+
+_MAGASIN = {'table': None}
+
+def _classements(longue):
+    """Classement final (points, puis différence de buts) de chaque équipe dans sa ligue-saison."""
+    points = np.select([longue['RES'] == 'V', longue['RES'] == 'N'], [3, 1], default=0)
+    bilan = longue.assign(Points=points, Diff=longue['BM'] - longue['BE']).groupby(
+        ['LeagueCode', 'Saison', 'Équipe'], observed=True)[['Points', 'Diff']].sum().reset_index()
+    bilan = bilan.sort_values(['LeagueCode', 'Saison', 'Points', 'Diff'], ascending=[True, True, False, False])
+    bilan['Rang'] = bilan.groupby(['LeagueCode', 'Saison'], observed=True).cumcount() + 1
+    bilan['Taille'] = bilan.groupby(['LeagueCode', 'Saison'], observed=True)['Équipe'].transform('size')
+    return bilan[['LeagueCode', 'Saison', 'Équipe', 'Rang', 'Taille']]
+
+def construire_magasin(df):
+    """
+    Table longue masquée (registre_stats.preparer_table) triée par équipe puis date, avec
+    l'adversaire, les cotes du point de vue de l'équipe et le classement final de l'adversaire
+    (classement de fin de saison : à utiliser pour l'exploration, pas comme prédiction).
+    """
+    longue = registre_stats.preparer_table(df)
+    longue['Équipe'] = longue['Équipe'].astype(object)
+    dom = longue['Domicile'].to_numpy()
+    longue['Adversaire'] = np.where(dom, longue['AwayTeam'].astype(object), longue['HomeTeam'].astype(object))
+    if {'B365H', 'B365D', 'B365A'} <= set(longue.columns):
+        cote_h, cote_a = pd.to_numeric(longue['B365H'], errors='coerce'), pd.to_numeric(longue['B365A'], errors='coerce')
+        longue['Cote'] = np.where(dom, cote_h, cote_a)
+        longue['Cote_Adv'] = np.where(dom, cote_a, cote_h)
+        longue['Cote_Nul'] = pd.to_numeric(longue['B365D'], errors='coerce')
+        longue['Favori'] = longue['Cote'] < longue['Cote_Adv']
+    if {'LeagueCode', 'Saison'} <= set(longue.columns):
+        rangs = _classements(longue).rename(columns={'Équipe': 'Adversaire', 'Rang': 'Rang_Adv'})
+        longue = longue.merge(rangs, on=['LeagueCode', 'Saison', 'Adversaire'], how='left')
+        longue['Moitie_Haute_Adv'] = (longue['Rang_Adv'] <= longue['Taille'] / 2).to_numpy()
+        longue = longue.drop(columns='Taille')
+
+    codes, _ = pd.factorize(longue['Équipe'])
+    ordre = np.lexsort((longue['Date'].to_numpy(), codes))
+    return longue.iloc[ordre].reset_index(drop=True)
+
+def charger_magasin(df=None, dossier=chargement.DOSSIER_PRINCIPAL_DATA):
+    """Construit le magasin (depuis df ou les CSV) et vide les caches de masques."""
+    if df is None:
+        df_brut = chargement.charger_historique(dossier, colonnes=COLONNES_MAGASIN)
+        df = chargement.filtrer_historique(df_brut, ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR'])
+        df = df.join(df_brut[[c for c in COLONNES_MAGASIN + ['Saison'] if c in df_brut.columns and c not in df.columns]])
+    _MAGASIN['table'] = construire_magasin(df)
+    _masque_expression.cache_clear()
+    _drapeau_stat.cache_clear()
+    return _MAGASIN['table']
+
+# ==============================================================================
+# 2. MASQUES MÉMOÏSÉS
+# ==============================================================================
+
+_SYMBOLES = {
+    ast.Add: '+', ast.Sub: '-', ast.Mult: '*', ast.Div: '/', ast.FloorDiv: '//', ast.Mod: '%', ast.Pow: '**',
+    ast.BitAnd: '&', ast.BitOr: '|', ast.BitXor: '^', ast.LShift: '<<', ast.RShift: '>>',
+    ast.And: 'and', ast.Or: 'or', ast.Invert: '~', ast.Not: 'not ', ast.USub: '-', ast.UAdd: '+',
+    ast.Eq: '==', ast.NotEq: '!=', ast.Lt: '<', ast.LtE: '<=', ast.Gt: '>', ast.GtE: '>=', ast.In: 'in', ast.NotIn: 'not in',
+}
+
+def _normaliser(noeud):
+    """
+    Texte entièrement parenthésé d'un nœud : clé de cache stable, et priorités explicites pour
+    DataFrame.eval (où & et | passent après les comparaisons, contrairement à Python :
+    ast.unparse écrirait '(BM & BE) > 0' sans ses parenthèses).
+    """
+    if isinstance(noeud, ast.BinOp):
+        return f"({_normaliser(noeud.left)} {_SYMBOLES[type(noeud.op)]} {_normaliser(noeud.right)})"
+    if isinstance(noeud, ast.BoolOp):
+        return "(" + f" {_SYMBOLES[type(noeud.op)]} ".join(_normaliser(v) for v in noeud.values) + ")"
+    if isinstance(noeud, ast.UnaryOp):
+        return f"({_SYMBOLES[type(noeud.op)]}{_normaliser(noeud.operand)})"
+    if isinstance(noeud, ast.Compare):
+        return "(" + _normaliser(noeud.left) + "".join(f" {_SYMBOLES[type(op)]} {_normaliser(c)}" for op, c in zip(noeud.ops, noeud.comparators)) + ")"
+    return ast.unparse(noeud)
+
+def _operandes(noeud):
+    """Opérandes d'un &, |, ~ (and, or, not) ; None pour tout autre nœud."""
+    if isinstance(noeud, ast.BinOp) and isinstance(noeud.op, (ast.BitAnd, ast.BitOr)): return [noeud.left, noeud.right]
+    if isinstance(noeud, ast.BoolOp): return noeud.values
+    if isinstance(noeud, ast.UnaryOp) and isinstance(noeud.op, (ast.Invert, ast.Not)): return [noeud.operand]
+    return None
+
+@lru_cache(maxsize=TAILLE_CACHE)
+def _masque_expression(expression):
+    """
+    Valeur d'une expression normalisée. &, |, ~ (and, or, not) combinent des sous-masques
+    eux-mêmes en cache seulement si tous leurs opérandes sont booléens ; sinon (colonnes
+    entières : 'BM & BE', '~BM') l'expression entière est évaluée par DataFrame.eval, avec
+    le sens pandas (opérations bit à bit).
+    """
+    noeud = ast.parse(expression, mode='eval').body
+    operandes = _operandes(noeud)
+    valeurs = None
+    if operandes is not None:
+        try: valeurs = [_masque_expression(_normaliser(o)) for o in operandes]
+        except Exception: pass # opérande non évaluable seul (constante) : expression entière ci-dessous
+        if valeurs is not None and all(v.dtype == bool for v in valeurs):
+            if isinstance(noeud, ast.UnaryOp): resultat = ~valeurs[0]
+            elif isinstance(getattr(noeud, 'op', None), (ast.BitAnd, ast.And)): resultat = np.logical_and.reduce(valeurs)
+            else: resultat = np.logical_or.reduce(valeurs)
+            resultat.setflags(write=False)
+            return resultat
+    resultat = _MAGASIN['table'].eval(expression, engine='python')
+    if isinstance(resultat, pd.Series) and pd.api.types.is_bool_dtype(resultat.dtype):
+        resultat = resultat.fillna(False).to_numpy(dtype=bool) # booléens nullables : NA = faux
+    resultat = np.array(resultat)
+    resultat.setflags(write=False) # partagé par le cache
+    return resultat
+
+def masque(expression):
+    """Lignes du magasin satisfaisant le prédicat (None ou '' : toutes)."""
+    if _MAGASIN['table'] is None: raise RuntimeError("Magasin non chargé : appeler charger_magasin().")
+    if not expression: return np.ones(len(_MAGASIN['table']), dtype=bool)
+    resultat = _masque_expression(_normaliser(ast.parse(expression, mode='eval').body))
+    if resultat.dtype != bool:
+        raise ValueError(f"Prédicat non booléen ({resultat.dtype}) : {expression!r}. Comparer explicitement, ex: 'BM > 0'.")
+    return resultat
+
+@lru_cache(maxsize=None)
+def _drapeau_stat(stat):
+    valeurs = _MAGASIN['table'][registre_stats.COLONNE_MASQUE].to_numpy()
+    return ((valeurs >> valeurs.dtype.type(list(registre_stats.STATS).index(stat))) & 1) == 1
+
+# ==============================================================================
+# 3. SÉRIES SUR UN SOUS-ENSEMBLE
+# ==============================================================================
+
+def resumer_series(table, lignes, stats, drapeau, par=('Équipe',)):
+    """
+    Record / Année du record / Série en cours / % de chaque stat, par groupe (équipe, ou
+    équipe et saison...), sur les lignes retenues d'une table triée par équipe puis date :
+    une série = lignes retenues consécutives du même groupe.
+    drapeau(stat) : réussites de la stat sur toute la table. Mêmes colonnes que les rapports :
+    {stat}_Record, _Annee_Record, _EnCours, _Pct.
+    """
+    cles = [table[col].astype(object).to_numpy()[lignes] for col in par]
+    debut_groupe = np.ones(len(lignes), dtype=bool)
+    if len(lignes): debut_groupe[1:] = np.logical_or.reduce([cle[1:] != cle[:-1] for cle in cles])
+    codes = np.cumsum(debut_groupe) - 1
+    fin_groupe = np.r_[debut_groupe[1:], True] if len(lignes) else debut_groupe
+    n_groupes = int(debut_groupe.sum())
+    annees = pd.DatetimeIndex(table['Date'].to_numpy()[lignes]).year.to_numpy()
+    ligues = table['LeagueCode'].astype(object).to_numpy()[lignes] if 'LeagueCode' in table.columns else np.full(len(lignes), '?')
+
+    resultat = {col: cle[debut_groupe] for col, cle in zip(par, cles)}
+    resultat.update({'Ligue': ligues[fin_groupe], 'Matchs': np.bincount(codes, minlength=n_groupes)})
+    for stat in stats:
+        c = drapeau(stat)[lignes]
+        _, apres = hasards_series.series_avant(c, debut_groupe, np.zeros(len(c), dtype=np.int64))
+        record = np.zeros(n_groupes, dtype=np.int64)
+        np.maximum.at(record, codes, apres)
+        # Année du record : fin de la dernière série de longueur maximale
+        fin_record = np.full(n_groupes, -1)
+        est_record = (apres == record[codes]) & (apres > 0)
+        np.maximum.at(fin_record, codes[est_record], np.flatnonzero(est_record))
+        resultat[f'{stat}_Record'] = record
+        resultat[f'{stat}_Annee_Record'] = np.where(fin_record >= 0, annees[np.maximum(fin_record, 0)].astype(object), "N/A")
+        resultat[f'{stat}_EnCours'] = apres[fin_groupe]
+        resultat[f'{stat}_Pct'] = np.bincount(codes, weights=c) / resultat['Matchs'] * 100
+    return pd.DataFrame(resultat)
+
+def interroger(expression=None, stats=registre_stats.STATS_PRINCIPALES, equipes=None):
+    """Séries de chaque équipe sur les seuls matchs du magasin qui satisfont le prédicat (cf. resumer_series)."""
+    table = _MAGASIN['table']
+    garder = masque(expression)
+    if equipes is not None: garder = garder & masque(" | ".join(f"(Équipe == {eq!r})" for eq in equipes))
+    lignes = np.flatnonzero(garder)
+    if len(lignes) == 0: return pd.DataFrame()
+    return resumer_series(table, lignes, stats, _drapeau_stat)
+
+# ==============================================================================
+# 4. DOMICILE / EXTÉRIEUR
+# ==============================================================================
+
+LIEUX = {'Dom': True, 'Ext': False} # suffixe des colonnes -> valeur de Domicile
+
+def _trier_par_equipe(longue):
+    """Table longue masquée triée par équipe puis date, et sa fonction drapeau(stat)."""
+    codes, _ = pd.factorize(longue['Équipe'].astype(object))
+    ordre = np.lexsort((longue['Date'].to_numpy(), codes))
+    table = longue.iloc[ordre].reset_index(drop=True)
+    table['Équipe'] = table['Équipe'].astype(object)
+    valeurs = table[registre_stats.COLONNE_MASQUE].to_numpy()
+    noms = list(registre_stats.STATS)
+    return table, lambda stat: ((valeurs >> valeurs.dtype.type(noms.index(stat))) & 1) == 1
+
+def series_par_lieu(longue, stats=registre_stats.STATS_PRINCIPALES):
+    """
+    Les séries de chaque stat à domicile seulement et à l'extérieur seulement, pour toutes les
+    équipes de la table longue masquée, en une passe vectorisée par contexte.
+    Colonnes {stat}_Dom_Record, _Dom_Annee_Record, _Dom_EnCours, _Dom_Pct (idem _Ext_), index Équipe.
+    """
+    table, drapeau = _trier_par_equipe(longue)
+    parties = []
+    for suffixe, domicile in LIEUX.items():
+        res = resumer_series(table, np.flatnonzero(table['Domicile'].to_numpy() == domicile), stats, drapeau)
+        res = res.set_index('Équipe').drop(columns=['Ligue', 'Matchs'])
+        parties.append(res.rename(columns=lambda c: c.replace('_', f'_{suffixe}_', 1))) # noms de stats sans '_'
+    return pd.concat(parties, axis=1)
+
+# ==============================================================================
+# 5. SAISONS
+# ==============================================================================
+
+def series_par_saison(longue, stats=registre_stats.STATS_PRINCIPALES):
+    """
+    Record / Série en cours / % de chaque stat pour chaque (équipe, saison), en une passe
+    groupée : les séries repartent de zéro à chaque saison (chargement.detecter_saisons).
+    """
+    table, drapeau = _trier_par_equipe(longue)
+    table['Saison'] = chargement.detecter_saisons(table).to_numpy()
+    return resumer_series(table, np.arange(len(table)), stats, drapeau, par=('Équipe', 'Saison'))
+
+def series_saison_actuelle(longue, stats=registre_stats.STATS_PRINCIPALES):
+    """
+    La saison en cours de chaque équipe (sa dernière saison jouée), index Équipe :
+    Saison_Actuelle, {stat}_Saison_Record, {stat}_Saison_EnCours, {stat}_Saison_Pct.
+    """
+    saisons = series_par_saison(longue, stats).groupby('Équipe', sort=False).tail(1).set_index('Équipe')
+    colonnes = {'Saison': 'Saison_Actuelle'}
+    for stat in stats:
+        for suite in ('Record', 'EnCours', 'Pct'): colonnes[f'{stat}_{suite}'] = f'{stat}_Saison_{suite}'
+    return saisons[list(colonnes)].rename(columns=colonnes)
+
+def formater_saison(ligne, stat):
+    """'3 / 5 (62%)' : série en cours dans la saison / record de la saison (% de la saison)."""
+    encours, record, pct = (ligne.get(f'{stat}_Saison_{suite}') for suite in ('EnCours', 'Record', 'Pct'))
+    if encours is None or pd.isna(encours): return "-"
+    return f"{int(encours)} / {int(record)} ({pct:.0f}%)"
+
+def formater_lieux(ligne, stat):
+    """'Dom 3 (5) · Ext 1 (4)' : série en cours (record) par lieu, le lieu du prochain match mis en avant."""
+    morceaux = []
+    for suffixe in LIEUX:
+        encours, record = ligne.get(f'{stat}_{suffixe}_EnCours'), ligne.get(f'{stat}_{suffixe}_Record')
+        if encours is None or pd.isna(encours): continue
+        texte = f"{suffixe} {int(encours)} ({int(record)})"
+        morceaux.append(f"<strong class='ctx-actif'>{texte}</strong>" if ligne.get('Lieu_Prochain') == suffixe else texte)
+    return " · ".join(morceaux) if morceaux else "-"
+
+# ==============================================================================
+# 6. SÉCHERESSES (MATCHS DEPUIS LE DERNIER ÉVÉNEMENT)
+# ==============================================================================
+
+def secheresses(longue, evenements=tuple(EVENEMENTS), derniers=DERNIERS_DETAILS):
+    """
+    Pour chaque équipe de la table longue masquée (toutes ligues et saisons, sans coupure
+    entre saisons) et chaque événement : une sécheresse est une série de matchs SANS
+    l'événement, d'où en une passe groupée par événement (resumer_series sur le drapeau inversé)
+    {ev}_Depuis (matchs depuis le dernier), {ev}_Record_Sans (plus longue sécheresse),
+    {ev}_Annee_Record, {ev}_Pct (% de matchs avec l'événement).
+    Derniers : résultats V/N/D des derniers matchs (le plus récent d'abord), lus dans la
+    même table triée. Index Équipe, avec Ligue (dernière ligue jouée) et Matchs.
+    """
+    table, drapeau = _trier_par_equipe(longue)
+    res = resumer_series(table, np.arange(len(table)), list(evenements), lambda ev: ~drapeau(ev)).set_index('Équipe')
+    colonnes = {}
+    for ev in evenements:
+        res[f'{ev}_Pct'] = 100 - res[f'{ev}_Pct']
+        colonnes.update({f'{ev}_EnCours': f'{ev}_Depuis', f'{ev}_Record': f'{ev}_Record_Sans'})
+
+    fins = np.r_[np.flatnonzero(table['Équipe'].to_numpy()[1:] != table['Équipe'].to_numpy()[:-1]), len(table) - 1] if len(table) else np.zeros(0, dtype=np.int64)
+    debuts = np.r_[0, fins[:-1] + 1] if len(table) else fins
+    decalages = fins[:, None] - np.arange(derniers)[None, :]
+    valides = decalages >= debuts[:, None]
+    resultats = np.where(valides, table['RES'].to_numpy()[np.maximum(decalages, 0)], '')
+    res['Derniers'] = pd.Series([list(r[v]) for r, v in zip(resultats, valides)], index=table['Équipe'].to_numpy()[fins])
+    return res.rename(columns=colonnes)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Séries conditionnelles : Record / En cours / % sur un sous-ensemble de matchs.",
+                                     epilog=AIDE_COLONNES, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('predicat', nargs='?', default=None)
+    parser.add_argument('--stat', action='append', choices=list(registre_stats.STATS), help="Répétable (défaut : les 15 principales).")
+    parser.add_argument('--ligue', default=None)
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--interactif', action='store_true', help="Saisir des prédicats à la suite (magasin et masques gardés en mémoire).")
+    args = parser.parse_args()
+
+    charger_magasin()
+    stats = args.stat or registre_stats.STATS_PRINCIPALES
+
+    def afficher(predicat):
+        t0 = time.perf_counter()
+        res = interroger(predicat, stats)
+        duree = time.perf_counter() - t0
+        if res.empty: print("Aucun match."); return
+        if args.ligue: res = res[res['Ligue'] == args.ligue]
+        stat = stats[0]
+        cols = ['Ligue', 'Équipe', 'Matchs', f'{stat}_EnCours', f'{stat}_Record', f'{stat}_Annee_Record', f'{stat}_Pct']
+        print(res.sort_values([f'{stat}_EnCours', f'{stat}_Record'], ascending=False)[cols].head(args.top).round(1).to_string(index=False))
+        infos = _masque_expression.cache_info()
+        print(f"⏱️ {duree * 1000:.0f} ms (cache masques : {infos.hits} hits / {infos.misses} calculs)")
+
+    if args.interactif:
+        while True:
+            try: predicat = input("\nprédicat> ").strip()
+            except EOFError: break
+            if predicat in ('q', 'quit', 'exit'): break
+            try: afficher(predicat)
+            except Exception as e: print(f"❌ {e}")
+    else:
+        afficher(args.predicat)
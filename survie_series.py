@@ -0,0 +1,133 @@
+import pandas as pd
+import numpy as np
+import argparse
+
+import registre_stats
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+HORIZON = 1                # matchs supplémentaires affichés dans les rapports (colonne {stat}_Survie)
+TIRAGES_MONTE_CARLO = 0    # > 0 : estimation Monte Carlo (incertitude sur les taux) au lieu de la forme close
+TAILLE_LOT_TIRAGES = 20000 # tirages simulés par lot (mémoire bornée)
+
+# Même événement vu par l'adversaire : stat de l'équipe -> (stat de l'adversaire, complément ?)
+# Les stats de match (totaux, nul) sont symétriques ; les stats d'équipe se lisent en miroir.
+STATS_ADVERSAIRE = {
+    'FT Marque': ('FT No CS', False), # l'équipe marque = l'adversaire encaisse
+    'FT No CS':  ('FT Marque', False),
+    'FT CS':     ('FT Marque', True), # clean sheet = l'adversaire ne marque pas
+}
+
+# ==============================================================================
+# 1. TRANSITIONS (CHAÎNE DE MARKOV À DEUX ÉTATS PAR ÉQUIPE ET STAT)
+# ==============================================================================
+
+def transitions(longue, stats=registre_stats.STATS_PRINCIPALES):
+    """
+    Compte, pour chaque équipe et chaque stat, les matchs réussis suivis d'un autre
+    match ({stat}_N1) et ceux suivis d'une nouvelle réussite ({stat}_N11), en une passe
+    sur la table longue masquée (registre_stats.preparer_table).
+    """
+    codes, equipes = pd.factorize(longue['Équipe'].astype(object))
+    dates = longue['Date'].to_numpy() if 'Date' in longue.columns else np.zeros(len(longue))
+    ordre = np.lexsort((dates, codes))
+    codes, masque = codes[ordre], longue[registre_stats.COLONNE_MASQUE].to_numpy()[ordre]
+    meme_equipe = codes[1:] == codes[:-1]
+    noms = list(registre_stats.STATS)
+
+    comptes = {}
+    for stat in stats:
+        c = ((masque >> masque.dtype.type(noms.index(stat))) & 1) == 1
+        suivi = c[:-1] & meme_equipe
+        comptes[f'{stat}_N1'] = np.bincount(codes[1:][suivi], minlength=len(equipes))
+        comptes[f'{stat}_N11'] = np.bincount(codes[1:][suivi & c[1:]], minlength=len(equipes))
+    return pd.DataFrame(comptes, index=pd.Index(equipes, name='Équipe'))
+
+# ==============================================================================
+# 2. PROBABILITÉS DE PROLONGATION
+# ==============================================================================
+
+def probabilite_geometrique(pct, k=HORIZON):
+    """Matchs indépendants au taux de base de l'équipe (colonne _Pct) : p^k."""
+    return (np.asarray(pct, dtype=float) / 100) ** k
+
+def probabilite_markov(p_premier, p_suite, k=HORIZON):
+    """Prochain match à p_premier (ajusté à l'adversaire), les suivants à P(réussite | réussite)."""
+    return np.asarray(p_premier, dtype=float) * np.asarray(p_suite, dtype=float) ** (k - 1)
+
+def simuler(n11, n1, p_adversaire, k=HORIZON, tirages=100000, graine=0):
+    """
+    Monte Carlo vectorisé sur toutes les séries à la fois : à chaque tirage, le taux
+    P(réussite | réussite) est tiré dans sa loi a posteriori Beta(N11 + 1, N1 - N11 + 1)
+    (incertitude des petits historiques), puis les k matchs sont simulés.
+    p_adversaire : taux de l'adversaire pour le prochain match (NaN = inconnu).
+    Renvoie la fréquence de prolongation sur k matchs pour chaque série.
+    """
+    rng = np.random.default_rng(graine)
+    n11, n1 = np.asarray(n11, dtype=float), np.asarray(n1, dtype=float)
+    p_adversaire = np.asarray(p_adversaire, dtype=float)
+    succes = np.zeros(len(n11))
+    restants = tirages
+    while restants > 0:
+        lot = min(restants, TAILLE_LOT_TIRAGES)
+        p = rng.beta(n11 + 1, n1 - n11 + 1, size=(lot, len(n11)))
+        p_premier = np.where(np.isnan(p_adversaire), p, (p + np.nan_to_num(p_adversaire)) / 2)
+        vivant = rng.random((lot, len(n11))) < p_premier
+        for _ in range(k - 1):
+            vivant &= rng.random((lot, len(n11))) < p
+        succes += vivant.sum(axis=0)
+        restants -= lot
+    return succes / tirages
+
+def _taux_adversaire(df, stat, adversaires):
+    """% de l'adversaire pour l'événement de la stat (NaN si adversaire inconnu)."""
+    stat_adv, complement = STATS_ADVERSAIRE.get(stat, (stat, False))
+    pct = df.drop_duplicates('Équipe').set_index('Équipe')[f'{stat_adv}_Pct'] / 100
+    taux = adversaires.map(pct).astype(float)
+    return 1 - taux if complement else taux
+
+def ajouter_probabilites(df, trans, stats=registre_stats.STATS_PRINCIPALES, k=HORIZON, tirages=TIRAGES_MONTE_CARLO):
+    """
+    Ajoute {stat}_Survie (% de chances de prolonger la série en cours de k matchs) à chaque
+    ligne dont la série est active. P(réussite | réussite) lissée (Laplace) ; pour le prochain
+    match, moyenne avec le taux de l'adversaire (colonne Adversaire) quand il est connu.
+    Sans transitions pour l'équipe : estimation géométrique sur _Pct.
+    """
+    if df.empty: return df
+    adversaires = df['Adversaire'] if 'Adversaire' in df.columns else pd.Series(None, index=df.index, dtype=object)
+    nouvelles = {}
+    for stat in stats:
+        if f'{stat}_EnCours' not in df.columns: continue
+        n11 = df['Équipe'].map(trans[f'{stat}_N11']).to_numpy(dtype=float)
+        n1 = df['Équipe'].map(trans[f'{stat}_N1']).to_numpy(dtype=float)
+        p_adv = _taux_adversaire(df, stat, adversaires).to_numpy()
+        p_suite = (n11 + 1) / (n1 + 2)
+        p_premier = np.where(np.isnan(p_adv), p_suite, (p_suite + p_adv) / 2)
+        proba = probabilite_markov(p_premier, p_suite, k)
+        if tirages:
+            connu = ~np.isnan(n1)
+            proba[connu] = simuler(n11[connu], n1[connu], p_adv[connu], k, tirages)
+        proba = np.where(np.isnan(n1), probabilite_geometrique(df[f'{stat}_Pct'], k), proba)
+        nouvelles[f'{stat}_Survie'] = np.where(df[f'{stat}_EnCours'].to_numpy() > 0, proba * 100, np.nan)
+    return pd.concat([df, pd.DataFrame(nouvelles, index=df.index)], axis=1)
+
+def formater_survie(valeur):
+    return "-" if pd.isna(valeur) else f"{valeur:.0f}%"
+
+if __name__ == "__main__":
+    import chargement
+    parser = argparse.ArgumentParser(description="Probabilité de prolonger les séries en cours (forme close vs Monte Carlo).")
+    parser.add_argument('equipe')
+    parser.add_argument('-k', type=int, default=3, help="Nombre de matchs supplémentaires.")
+    parser.add_argument('--tirages', type=int, default=200000)
+    args = parser.parse_args()
+
+    colonnes = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'HTHG', 'HTAG', 'FTR']
+    df = chargement.filtrer_historique(chargement.charger_historique(colonnes=colonnes), colonnes).sort_values('Date')
+    trans = transitions(registre_stats.preparer_table(df, [args.equipe])).loc[args.equipe]
+    for stat in registre_stats.STATS_PRINCIPALES:
+        n11, n1 = trans[f'{stat}_N11'], trans[f'{stat}_N1']
+        p = (n11 + 1) / (n1 + 2)
+        mc = simuler([n11], [n1], [np.nan], args.k, args.tirages)[0]
+        print(f"  {stat:<10} P(r|r) = {p:5.1%} ({n11}/{n1})   +{args.k} : forme close {probabilite_markov(p, p, args.k):6.1%} | Monte Carlo {mc:6.1%}")